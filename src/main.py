@@ -1,25 +1,53 @@
+import logging
 import sys
+from src.utils import startup
 from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QTimer
 from src.views.main_window import MainWindow
-from src.models.database import engine, Base
-from src.utils.config import APP_NAME
+from src.models.migrations import migrate
+from src.models.database import SessionLocal, engine, reader_engine
+from src.models.financial import close_periods
+from src.utils.config import APP_NAME, DEBUG, TRACING_ENABLED
+from src.utils.sql_monitor import install_sql_monitor
+from src.utils.tracing import install_tracing
+from src.utils.watchdog import EventLoopWatchdog
 
 def setup_database():
-    """Create all database tables"""
-    Base.metadata.create_all(bind=engine)
+    """Bring the database schema up to date and close finished ledger periods"""
+    migrate()
+    db = SessionLocal()
+    try:
+        close_periods(db)
+        db.commit()
+    finally:
+        db.close()
 
 def main():
+    logging.basicConfig(level=logging.INFO if DEBUG else logging.WARNING)
+    if DEBUG:
+        install_sql_monitor(engine, reader_engine)
+    if TRACING_ENABLED:
+        install_tracing(engine, reader_engine)
+    
     # Initialize database
     setup_database()
 
     # Create Qt application
     app = QApplication(sys.argv)
     
+    # Report handlers that block the event loop
+    watchdog = EventLoopWatchdog()
+    watchdog.start()
+    app.aboutToQuit.connect(watchdog.stop)
+    
     # Create and show main window
     window = MainWindow()
     window.setWindowTitle(APP_NAME)
     window.show()
     
+    # Runs once the event loop has painted the login screen
+    QTimer.singleShot(0, lambda: startup.mark("login"))
+    
     # Start application event loop
     sys.exit(app.exec())
 
@@ -0,0 +1,3 @@
+# Import every model so relationships declared by class name can always be
+# resolved, whichever model module a caller imports first
+from . import user, member, biometric, attendance, subscription, financial, rollups
@@ -1,10 +1,15 @@
-from datetime import datetime
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, Boolean
+from datetime import datetime, timedelta
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, Boolean, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 
 class AttendanceRecord(Base):
     __tablename__ = "attendance_records"
+    __table_args__ = (
+        Index("ix_attendance_records_member_check_in", "member_id", "check_in"),
+        Index("ix_attendance_records_check_in", "check_in"),
+        Index("ix_attendance_records_change_seq", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     member_id = Column(Integer, ForeignKey('members.id'), nullable=False)
@@ -13,6 +18,8 @@ class AttendanceRecord(Base):
     fingerprint_verified = Column(Boolean, default=False)
     recorded_by = Column(Integer, ForeignKey('users.id'))
     notes = Column(String(255))
+    # Set by the change tracking triggers on every write
+    change_seq = Column(Integer)
 
     # Relationships
     member = relationship("Member", back_populates="attendance_records")
@@ -25,6 +32,59 @@ class AttendanceRecord(Base):
             return None
         return self.check_out - self.check_in
 
+    # A visit left open longer than this is not closed by a new scan
+    OPEN_VISIT_HOURS = 12
+
+    @classmethod
+    def get_open_visit(cls, db, member_id: int, now: datetime = None):
+        """Get the member's latest visit that has not been checked out"""
+        now = now or datetime.utcnow()
+        return db.query(cls).filter(
+            cls.member_id == member_id,
+            cls.check_in >= now - timedelta(hours=cls.OPEN_VISIT_HOURS),
+            cls.check_out == None
+        ).order_by(cls.check_in.desc()).first()
+
+    @classmethod
+    def check_in_member(cls, db, member_id: int, fingerprint_verified: bool = False,
+                        recorded_by: int = None, now: datetime = None):
+        """Open a new visit for a member"""
+        record = cls(
+            member_id=member_id,
+            check_in=now or datetime.utcnow(),
+            fingerprint_verified=fingerprint_verified,
+            recorded_by=recorded_by
+        )
+        db.add(record)
+        return record
+
+    @classmethod
+    def check_out_member(cls, db, member_id: int, now: datetime = None):
+        """Close the member's open visit; returns None if there is none"""
+        now = now or datetime.utcnow()
+        record = cls.get_open_visit(db, member_id, now)
+        if record:
+            record.check_out = now
+        return record
+
+    @classmethod
+    def record_scan(cls, db, member_id: int, fingerprint_verified: bool = False,
+                    recorded_by: int = None, now: datetime = None, may_check_in: bool = True):
+        """Check the member out if a visit is open, otherwise check them in.
+
+        An open visit is closed even when may_check_in is False (the
+        membership ran out during the visit); only a new visit needs it.
+        Returns (record, checked_in), or (None, False) if no visit was
+        open and may_check_in is False.
+        """
+        now = now or datetime.utcnow()
+        record = cls.check_out_member(db, member_id, now)
+        if record:
+            return record, False
+        if not may_check_in:
+            return None, False
+        return cls.check_in_member(db, member_id, fingerprint_verified, recorded_by, now), True
+
     @classmethod
     def get_member_attendance(cls, db, member_id: int, start_date: datetime, end_date: datetime):
         """Get attendance records for a member within a date range"""
@@ -0,0 +1,57 @@
+from datetime import datetime
+import zlib
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Index
+from sqlalchemy.orm import relationship
+from .database import Base
+
+class MemberBiometric(Base):
+    __tablename__ = "member_biometrics"
+    __table_args__ = (
+        Index("ix_member_biometrics_member_finger", "member_id", "finger", unique=True),
+    )
+
+    # Storage format of the template column; bump when the encoding changes
+    CURRENT_VERSION = 1
+
+    id = Column(Integer, primary_key=True, index=True)
+    member_id = Column(Integer, ForeignKey('members.id'), nullable=False)
+    finger = Column(Integer, nullable=False, default=0)
+    template = Column(LargeBinary, nullable=False)  # zlib-compressed sensor template
+    template_format = Column(String(20), nullable=False, default="r30x")
+    version = Column(Integer, nullable=False, default=CURRENT_VERSION)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    member = relationship("Member", back_populates="biometrics")
+
+    @staticmethod
+    def encode(raw: bytes) -> bytes:
+        """Compress a raw sensor template for storage"""
+        return zlib.compress(raw, 9)
+
+    @staticmethod
+    def decode(stored: bytes, version: int = CURRENT_VERSION) -> bytes:
+        """Return the raw sensor template from its stored form"""
+        if version != MemberBiometric.CURRENT_VERSION:
+            raise ValueError(f"نسخة قالب البصمة غير مدعومة: {version}")
+        return zlib.decompress(stored)
+
+    @property
+    def raw_template(self) -> bytes:
+        return self.decode(self.template, self.version)
+
+    @raw_template.setter
+    def raw_template(self, raw: bytes):
+        self.template = self.encode(raw)
+        self.version = self.CURRENT_VERSION
+
+    @classmethod
+    def enroll(cls, db, member_id: int, raw: bytes, finger: int = 0):
+        """Store or replace a member's template for one finger"""
+        biometric = db.query(cls).filter(cls.member_id == member_id, cls.finger == finger).first()
+        if not biometric:
+            biometric = cls(member_id=member_id, finger=finger)
+            db.add(biometric)
+        biometric.raw_template = raw
+        return biometric
@@ -0,0 +1,98 @@
+from sqlalchemy import text
+
+# Every write to a tracked table bumps that table's seq in table_changes, so
+# a view can tell whether anything changed since its last refresh with a
+# single tiny query. Deletes also record delete_seq, because deleted rows
+# cannot be found by a delta query and the view has to reload instead.
+TRACKED_TABLES = ("members", "attendance_records", "subscriptions", "transactions")
+
+# Tables whose rows carry the seq of their last write in a change_seq column,
+# so a refresh can fetch just the rows written after its watermark
+ROW_SEQ_TABLES = ("attendance_records",)
+
+def _table_triggers(table: str) -> list:
+    bump = f"UPDATE table_changes SET seq = seq + 1 WHERE table_name = '{table}';"
+    stamp = when = ""
+    if table in ROW_SEQ_TABLES:
+        stamp = (
+            f" UPDATE {table} SET change_seq = (SELECT seq FROM table_changes WHERE table_name = '{table}')"
+            f" WHERE id = NEW.id;"
+        )
+        # Stamping the row is an update too; it must not count as another change
+        when = " WHEN NEW.change_seq IS OLD.change_seq"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_changes_ai AFTER INSERT ON {table} BEGIN {bump}{stamp} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_changes_au AFTER UPDATE ON {table}{when} BEGIN {bump}{stamp} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_changes_ad AFTER DELETE ON {table} BEGIN "
+        f"UPDATE table_changes SET seq = seq + 1, delete_seq = seq + 1 WHERE table_name = '{table}'; END",
+    ]
+
+CHANGE_TRACKING_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS table_changes (
+        table_name TEXT PRIMARY KEY,
+        seq INTEGER NOT NULL DEFAULT 0,
+        delete_seq INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    *(f"INSERT OR IGNORE INTO table_changes (table_name) VALUES ('{table}')" for table in TRACKED_TABLES),
+    *(statement for table in TRACKED_TABLES for statement in _table_triggers(table)),
+]
+
+# Per-day versions: every write bumps the version of the day(s) its date
+# column falls on, so a cached result over a date range is stale exactly
+# when the sum of the versions of the days it covers has grown.
+DAY_TRACKED_TABLES = {
+    "attendance_records": "check_in",
+    "subscriptions": "start_date",
+    "transactions": "date",
+}
+
+# Columns whose updates can change a cached result, for tables where that
+# is not every column: attendance is counted by check-in day, so check-outs
+# and change_seq stamps leave the report cache alone
+DAY_UPDATE_COLUMNS = {"attendance_records": "check_in"}
+
+def _bump_day(table: str, day: str) -> str:
+    return (
+        f"INSERT INTO day_changes (table_name, day, version) VALUES ('{table}', date({day}), 1) "
+        f"ON CONFLICT(table_name, day) DO UPDATE SET version = version + 1;"
+    )
+
+DAY_CHANGES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS day_changes (
+        table_name TEXT NOT NULL,
+        day DATE NOT NULL,
+        version INTEGER NOT NULL,
+        PRIMARY KEY (table_name, day)
+    ) WITHOUT ROWID
+    """,
+    *(statement for table, column in DAY_TRACKED_TABLES.items() for statement in [
+        f"CREATE TRIGGER IF NOT EXISTS {table}_days_ai AFTER INSERT ON {table} "
+        f"BEGIN {_bump_day(table, f'NEW.{column}')} END",
+        f"CREATE TRIGGER IF NOT EXISTS {table}_days_ad AFTER DELETE ON {table} "
+        f"BEGIN {_bump_day(table, f'OLD.{column}')} END",
+        # Both days change when a row moves to another day
+        f"CREATE TRIGGER IF NOT EXISTS {table}_days_au AFTER UPDATE"
+        f"{f' OF {DAY_UPDATE_COLUMNS[table]}' if table in DAY_UPDATE_COLUMNS else ''} ON {table} "
+        f"BEGIN {_bump_day(table, f'OLD.{column}')} {_bump_day(table, f'NEW.{column}')} END",
+    ]),
+]
+
+def get_day_version(db, tables, start_date, end_date) -> int:
+    """Sum of the day versions of tables over a date range; grows with every write in the range"""
+    placeholders = ", ".join(f":table_{i}" for i in range(len(tables)))
+    return db.execute(
+        text(
+            f"SELECT coalesce(sum(version), 0) FROM day_changes "
+            f"WHERE table_name IN ({placeholders}) AND day BETWEEN :start AND :end"
+        ),
+        {**{f"table_{i}": table for i, table in enumerate(tables)},
+         "start": start_date.isoformat(), "end": end_date.isoformat()}
+    ).scalar()
+
+def get_change_seqs(db) -> dict:
+    """Read {table_name: (seq, delete_seq)} for every tracked table"""
+    rows = db.execute(text("SELECT table_name, seq, delete_seq FROM table_changes")).all()
+    return {table: (seq, delete_seq) for table, seq, delete_seq in rows}
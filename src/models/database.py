@@ -1,16 +1,68 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from src.utils import config
 import os
 
 # Create the database directory if it doesn't exist
-os.makedirs('db', exist_ok=True)
+os.makedirs(os.path.dirname(config.DATABASE_PATH) or '.', exist_ok=True)
 
 # Use SQLite database
-SQLALCHEMY_DATABASE_URL = "sqlite:///db/gym.db"
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{config.DATABASE_PATH}"
+
+def apply_pragmas(dbapi_connection, readonly=False):
+    """Apply the configured SQLite tuning profile to a new connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {config.SQLITE_BUSY_TIMEOUT}")
+        if not readonly:
+            # journal_mode is stored in the database file, so the writer sets it
+            cursor.execute(f"PRAGMA journal_mode = {config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {config.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size = {config.SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size = {config.SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA temp_store = {config.SQLITE_TEMP_STORE}")
+        if readonly:
+            cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+def create_sqlite_engine(url=SQLALCHEMY_DATABASE_URL, readonly=False, pool_size=1):
+    """Create an engine with the tuning profile applied on every connection.
+
+    The writer engine starts its transactions with BEGIN IMMEDIATE so that a
+    writer waits for the lock (up to busy_timeout) when it begins, instead of
+    failing with "database is locked" when a read transaction tries to
+    upgrade. Reader engines are query_only and never take the write lock.
+    """
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": config.SQLITE_BUSY_TIMEOUT / 1000},
+        pool_size=pool_size,
+        max_overflow=0,
+        pool_timeout=max(config.SQLITE_BUSY_TIMEOUT / 1000, 1)
+    )
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        if not readonly:
+            # Let SQLAlchemy emit BEGIN itself (see on_begin)
+            dbapi_connection.isolation_level = None
+        apply_pragmas(dbapi_connection, readonly)
+
+    if not readonly:
+        @event.listens_for(engine, "begin")
+        def on_begin(conn):
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
+
+# Writer engine for the front-desk write path; reader engine for views and reports
+engine = create_sqlite_engine(pool_size=config.SQLITE_WRITER_POOL_SIZE)
+reader_engine = create_sqlite_engine(readonly=True, pool_size=config.SQLITE_READER_POOL_SIZE)
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=reader_engine)
 
 Base = declarative_base()
 
@@ -20,3 +72,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
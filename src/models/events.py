@@ -0,0 +1,66 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# (model, callback, snapshot) registered through on_commit
+_listeners = []
+
+def on_commit(model, callback, snapshot=lambda obj: obj.id):
+    """Call callback(changed, deleted) after a commit that wrote instances of model.
+
+    Instances are expired once the commit finishes, so snapshot(obj) is taken
+    at flush time and the callback receives lists of snapshots rather than
+    ORM objects. Bulk query.update()/delete() calls bypass the session and are
+    not reported.
+    """
+    _listeners.append((model, callback, snapshot))
+
+def _innermost_transaction(session):
+    return session.get_nested_transaction() or session.get_transaction()
+
+def _within(transaction, ancestor) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    if not _listeners:
+        return
+    # Tagged with the transaction (or savepoint) they were written in, so a
+    # rolled back savepoint takes only its own changes with it
+    transaction = _innermost_transaction(session)
+    pending = session.info.setdefault("pending_commit_changes", [])
+    for model, callback, snapshot in _listeners:
+        changed = [snapshot(obj) for obj in session.new | session.dirty if isinstance(obj, model)]
+        deleted = [snapshot(obj) for obj in session.deleted if isinstance(obj, model)]
+        if changed or deleted:
+            pending.append((transaction, callback, changed, deleted))
+
+@event.listens_for(Session, "after_commit")
+def _dispatch_changes(session):
+    # Releasing a savepoint fires after_commit too, but nothing is visible
+    # to other connections until the outermost transaction commits
+    if session.in_nested_transaction():
+        return
+    pending = session.info.pop("pending_commit_changes", None)
+    if not pending:
+        return
+    merged = {}
+    for _, callback, changed, deleted in pending:
+        entry = merged.setdefault(id(callback), (callback, [], []))
+        entry[1].extend(changed)
+        entry[2].extend(deleted)
+    for callback, changed, deleted in merged.values():
+        callback(changed, deleted)
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    pending = session.info.get("pending_commit_changes")
+    if not pending:
+        return
+    if not previous_transaction.nested:
+        del session.info["pending_commit_changes"]
+        return
+    pending[:] = [entry for entry in pending if not _within(entry[0], previous_transaction)]
@@ -1,7 +1,9 @@
-from datetime import datetime
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Enum
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import (Column, Integer, Float, Date, DateTime, ForeignKey, String, Enum, Index,
+                        event, select, insert, func, case, literal, tuple_, inspect)
 from sqlalchemy.orm import relationship
 from .database import Base
+from .subscription import Subscription
 import enum
 
 class TransactionType(enum.Enum):
@@ -17,6 +19,12 @@ class TransactionCategory(enum.Enum):
 
 class Transaction(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # Covers the range sums in get_balance_sheet
+        Index("ix_transactions_date_type", "date", "type", "amount"),
+        # Looks up the posting of a subscription
+        Index("ix_transactions_reference_id", "reference_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     type = Column(Enum(TransactionType), nullable=False)
@@ -33,18 +41,212 @@ class Transaction(Base):
 
     @classmethod
     def get_balance_sheet(cls, db, start_date: datetime, end_date: datetime):
-        """Generate a balance sheet for a given period"""
-        transactions = db.query(cls).filter(
-            cls.date >= start_date,
-            cls.date <= end_date
-        ).all()
-
-        total_income = sum(t.amount for t in transactions if t.type == TransactionType.INCOME)
-        total_expense = sum(t.amount for t in transactions if t.type == TransactionType.EXPENSE)
-        
+        """Generate a balance sheet for a given period (whole days)"""
+        totals = get_balance(db, start_date, end_date)
         return {
-            'total_income': total_income,
-            'total_expense': total_expense,
-            'net_profit': total_income - total_expense,
-            'transactions': transactions
+            'total_income': totals['income'],
+            'total_expense': totals['expense'],
+            'net_profit': totals['income'] - totals['expense'],
+            'transactions': cls.iter_transactions(db, start_date, end_date)
         }
+
+    @classmethod
+    def iter_transactions(cls, db, start_date: datetime, end_date: datetime, page_size: int = 500):
+        """Yield the transactions of a period page by page, oldest first"""
+        start_date, end_date = _day_range(start_date, end_date)
+        statement = select(
+            cls.id, cls.date, cls.type, cls.category, cls.amount, cls.description, cls.reference_id
+        ).where(
+            cls.date >= start_date,
+            cls.date < end_date
+        ).order_by(cls.date, cls.id).limit(page_size)
+
+        cursor = None
+        while True:
+            page = statement
+            if cursor is not None:
+                page = page.where(tuple_(cls.date, cls.id) > tuple_(
+                    literal(cursor[0], type_=cls.date.type), literal(cursor[1], type_=cls.id.type)
+                ))
+            rows = db.execute(page).all()
+            yield from rows
+            if len(rows) < page_size:
+                return
+            cursor = (rows[-1].date, rows[-1].id)
+
+class BalanceSnapshot(Base):
+    """Income and expense totals of a closed day or month"""
+    __tablename__ = "balance_snapshots"
+
+    period_type = Column(String(5), primary_key=True)  # day, month
+    period_start = Column(Date, primary_key=True)
+    income = Column(Float, nullable=False, default=0)
+    expense = Column(Float, nullable=False, default=0)
+
+# Closed days get a snapshot row each (zero if nothing happened), closed
+# months one more. A transaction written into an already closed day, e.g. a
+# backdated expense, adjusts that day's and month's snapshot through these
+# triggers, so snapshots never have to be reopened.
+def _adjust_snapshots(row: str, sign: str) -> str:
+    income = f"(CASE WHEN {row}.type = 'INCOME' THEN {sign}{row}.amount ELSE 0 END)"
+    expense = f"(CASE WHEN {row}.type = 'EXPENSE' THEN {sign}{row}.amount ELSE 0 END)"
+    return (
+        f"INSERT INTO balance_snapshots (period_type, period_start, income, expense) "
+        f"SELECT 'day', date({row}.date), {income}, {expense} "
+        f"WHERE date({row}.date) <= (SELECT max(period_start) FROM balance_snapshots WHERE period_type = 'day') "
+        f"ON CONFLICT(period_type, period_start) DO UPDATE SET "
+        f"income = income + excluded.income, expense = expense + excluded.expense; "
+        f"UPDATE balance_snapshots SET income = income + {income}, expense = expense + {expense} "
+        f"WHERE period_type = 'month' AND period_start = strftime('%Y-%m-01', {row}.date);"
+    )
+
+LEDGER_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS transactions_snapshots_ai AFTER INSERT ON transactions "
+    f"BEGIN {_adjust_snapshots('NEW', '')} END",
+    f"CREATE TRIGGER IF NOT EXISTS transactions_snapshots_ad AFTER DELETE ON transactions "
+    f"BEGIN {_adjust_snapshots('OLD', '-')} END",
+    f"CREATE TRIGGER IF NOT EXISTS transactions_snapshots_au AFTER UPDATE OF date, type, amount ON transactions "
+    f"BEGIN {_adjust_snapshots('OLD', '-')} {_adjust_snapshots('NEW', '')} END",
+]
+
+def _day_range(start_date, end_date):
+    """Whole-day datetime bounds [start, end) for an inclusive date range"""
+    start_day = start_date.date() if isinstance(start_date, datetime) else start_date
+    end_day = end_date.date() if isinstance(end_date, datetime) else end_date
+    return datetime.combine(start_day, time.min), datetime.combine(end_day + timedelta(days=1), time.min)
+
+def _type_sums():
+    return (
+        func.coalesce(func.sum(case((Transaction.type == TransactionType.INCOME, Transaction.amount), else_=0)), 0),
+        func.coalesce(func.sum(case((Transaction.type == TransactionType.EXPENSE, Transaction.amount), else_=0)), 0),
+    )
+
+def _next_month(month: date) -> date:
+    return (month.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def closed_through(db):
+    """Last day that has been frozen into a snapshot, or None"""
+    return db.query(func.max(BalanceSnapshot.period_start)).filter(BalanceSnapshot.period_type == "day").scalar()
+
+def close_periods(db, today: date = None) -> int:
+    """Freeze every finished day and month into snapshots; returns the number of days closed"""
+    last = (today or datetime.utcnow().date()) - timedelta(days=1)
+    closed = closed_through(db)
+    if closed is not None:
+        first = closed + timedelta(days=1)
+    else:
+        oldest = db.query(func.min(Transaction.date)).scalar()
+        if oldest is None:
+            return 0
+        first = oldest.date()
+    if first > last:
+        return 0
+
+    start, end = _day_range(first, last)
+    day = func.date(Transaction.date)
+    sums = {
+        row[0]: row[1:] for row in
+        db.query(day, *_type_sums()).filter(Transaction.date >= start, Transaction.date < end).group_by(day)
+    }
+    days = [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+    db.execute(insert(BalanceSnapshot), [{
+        "period_type": "day",
+        "period_start": current,
+        "income": sums.get(current.isoformat(), (0, 0))[0],
+        "expense": sums.get(current.isoformat(), (0, 0))[1]
+    } for current in days])
+
+    # Months whose last day is now closed
+    month = first.replace(day=1)
+    while _next_month(month) - timedelta(days=1) <= last:
+        income, expense = db.query(
+            func.coalesce(func.sum(BalanceSnapshot.income), 0), func.coalesce(func.sum(BalanceSnapshot.expense), 0)
+        ).filter(
+            BalanceSnapshot.period_type == "day",
+            BalanceSnapshot.period_start >= month,
+            BalanceSnapshot.period_start < _next_month(month)
+        ).one()
+        db.execute(insert(BalanceSnapshot).prefix_with("OR IGNORE").values(
+            period_type="month", period_start=month, income=income, expense=expense
+        ))
+        month = _next_month(month)
+    return len(days)
+
+def get_balance(db, start_date, end_date) -> dict:
+    """Income and expense totals over whole days: snapshots for closed periods, SUM over the rest"""
+    start_day = start_date.date() if isinstance(start_date, datetime) else start_date
+    end_day = end_date.date() if isinstance(end_date, datetime) else end_date
+    income = expense = 0.0
+
+    closed = closed_through(db)
+    tail_start = start_day
+    if closed is not None and start_day <= closed:
+        bound = min(end_day, closed)
+
+        # Whole months inside the closed part of the range
+        months = []
+        month = start_day if start_day.day == 1 else _next_month(start_day)
+        while _next_month(month) - timedelta(days=1) <= bound:
+            months.append(month)
+            month = _next_month(month)
+        covered = [
+            row.period_start for row in db.query(BalanceSnapshot.period_start).filter(
+                BalanceSnapshot.period_type == "month", BalanceSnapshot.period_start.in_(months)
+            )
+        ] if months else []
+
+        snapshot_sums = db.query(
+            func.coalesce(func.sum(BalanceSnapshot.income), 0), func.coalesce(func.sum(BalanceSnapshot.expense), 0)
+        ).filter(
+            ((BalanceSnapshot.period_type == "month") & BalanceSnapshot.period_start.in_(covered)) |
+            ((BalanceSnapshot.period_type == "day") & BalanceSnapshot.period_start.between(start_day, bound) &
+             func.strftime("%Y-%m-01", BalanceSnapshot.period_start).notin_([m.isoformat() for m in covered]))
+        ).one()
+        income, expense = snapshot_sums
+        tail_start = bound + timedelta(days=1)
+
+    if tail_start <= end_day:
+        start, end = _day_range(tail_start, end_day)
+        tail_income, tail_expense = db.query(*_type_sums()).filter(
+            Transaction.date >= start, Transaction.date < end
+        ).one()
+        income += tail_income
+        expense += tail_expense
+
+    return {'income': income, 'expense': expense}
+
+def post_subscription(connection, subscription, refund=False):
+    """Write the ledger transaction for a paid (or refunded) subscription"""
+    reference = f"subscription:{subscription.id}" + (":refund" if refund else "")
+    exists = connection.execute(
+        select(Transaction.id).where(Transaction.reference_id == reference)
+    ).first()
+    if exists:
+        return
+    connection.execute(insert(Transaction).values(
+        type=TransactionType.EXPENSE if refund else TransactionType.INCOME,
+        category=TransactionCategory.SUBSCRIPTION,
+        amount=subscription.amount,
+        description=f"استرداد اشتراك رقم {subscription.id}" if refund else f"اشتراك رقم {subscription.id}",
+        date=datetime.utcnow(),
+        created_by=subscription.created_by,
+        reference_id=reference,
+        created_at=datetime.utcnow()
+    ))
+
+# Subscriptions post their income in the same flush that writes them
+@event.listens_for(Subscription, "after_insert")
+def _post_new_subscription(mapper, connection, subscription):
+    if subscription.payment_status == "paid":
+        post_subscription(connection, subscription)
+
+@event.listens_for(Subscription, "after_update")
+def _post_subscription_status(mapper, connection, subscription):
+    history = inspect(subscription).attrs.payment_status.history
+    if not history.has_changes():
+        return
+    previous = history.deleted[0] if history.deleted else None
+    if subscription.payment_status == "paid":
+        post_subscription(connection, subscription)
+    elif previous == "paid" and subscription.payment_status == "cancelled":
+        post_subscription(connection, subscription, refund=True)
@@ -1,6 +1,6 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, Enum, Text, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, Boolean, Index
+from sqlalchemy.orm import relationship, deferred
 from .database import Base
 import enum
 
@@ -14,30 +14,39 @@ class MembershipType(enum.Enum):
 
 class Member(Base):
     __tablename__ = "members"
+    __table_args__ = (
+        Index("ix_members_active_end_date", "is_active", "end_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(100), nullable=False)
     phone = Column(String(20), nullable=False)
     email = Column(String(100))
-    fingerprint_data = Column(LargeBinary)
     membership_type = Column(Enum(MembershipType), nullable=False)
     start_date = Column(DateTime, nullable=False)
     end_date = Column(DateTime, nullable=False)
-    emergency_contact = Column(String(100))
-    medical_conditions = Column(Text)
+    # Only shown in member details, so list queries don't load them
+    emergency_contact = deferred(Column(String(100)), group="details")
+    medical_conditions = deferred(Column(Text), group="details")
     created_at = Column(DateTime, default=datetime.utcnow)
     created_by = Column(Integer, ForeignKey('users.id'))
     is_active = Column(Boolean, default=True)
+    # Membership is paused (no entry) until this date
+    frozen_until = Column(DateTime)
+    # Bumped to revoke the member's printed QR cards; only cards of this version are accepted
+    card_version = Column(Integer, nullable=False, default=1, server_default="1")
 
     # Relationships
     attendance_records = relationship("AttendanceRecord", back_populates="member")
     subscriptions = relationship("Subscription", back_populates="member")
+    biometrics = relationship("MemberBiometric", back_populates="member", cascade="all, delete-orphan")
     creator = relationship("User")
 
     def is_membership_valid(self) -> bool:
         """Check if the member's membership is currently valid"""
         now = datetime.utcnow()
-        return self.is_active and self.start_date <= now <= self.end_date
+        frozen = self.frozen_until is not None and now < self.frozen_until
+        return self.is_active and not frozen and self.start_date <= now <= self.end_date
 
     def days_until_expiry(self) -> int:
         """Calculate days remaining until membership expires"""
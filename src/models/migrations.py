@@ -0,0 +1,214 @@
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import select, func
+from .database import engine, Base
+from .user import User
+from .member import Member
+from .biometric import MemberBiometric
+from .attendance import AttendanceRecord
+from .subscription import Subscription
+from .financial import Transaction, BalanceSnapshot, LEDGER_DDL
+from .search import MEMBER_SEARCH_DDL, rebuild_member_search
+from .changes import CHANGE_TRACKING_DDL, DAY_CHANGES_DDL
+from .rollups import ROLLUP_TABLES, ROLLUP_DDL, rebuild_rollups
+
+# Versioned schema migrations. The schema version is kept in SQLite's
+# PRAGMA user_version and each migration runs in one transaction together
+# with its version bump, so a failed migration leaves the previous version.
+#
+# Migration 1 runs create_all, so a brand new database already has the
+# latest tables and indexes after it. Later migrations must therefore be
+# idempotent (IF NOT EXISTS, checkfirst=True, has_column checks).
+MIGRATIONS = []
+
+def migration(version: int, description: str):
+    """Register a migration function for a schema version"""
+    def register(function):
+        MIGRATIONS.append((version, description, function))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return function
+    return register
+
+def has_column(conn, table: str, column: str) -> bool:
+    """Check if a table already has a column"""
+    rows = conn.exec_driver_sql(f"PRAGMA table_info({table})").fetchall()
+    return any(row[1] == column for row in rows)
+
+def get_schema_version(conn) -> int:
+    return conn.exec_driver_sql("PRAGMA user_version").scalar()
+
+@migration(1, "Create base schema")
+def create_schema(conn):
+    Base.metadata.create_all(bind=conn)
+
+def create_indexes(conn, model, names):
+    """Create the named indexes of a model; later migrations add columns that earlier ones can't index"""
+    for index in model.__table__.indexes:
+        if index.name in names:
+            index.create(bind=conn, checkfirst=True)
+
+@migration(2, "Add indexes for the hot query paths")
+def add_hot_path_indexes(conn):
+    create_indexes(conn, AttendanceRecord, {"ix_attendance_records_member_check_in", "ix_attendance_records_check_in"})
+    create_indexes(conn, Member, {"ix_members_active_end_date"})
+    create_indexes(conn, Subscription, {
+        "ix_subscriptions_end_date_status", "ix_subscriptions_start_date", "ix_subscriptions_member_id"
+    })
+    create_indexes(conn, Transaction, {"ix_transactions_date_type"})
+
+@migration(3, "Add member full-text search")
+def add_member_search(conn):
+    for statement in MEMBER_SEARCH_DDL:
+        conn.exec_driver_sql(statement)
+    rebuild_member_search(conn)
+
+@migration(4, "Move fingerprint templates to member_biometrics")
+def move_fingerprints(conn):
+    MemberBiometric.__table__.create(bind=conn, checkfirst=True)
+    for index in MemberBiometric.__table__.indexes:
+        index.create(bind=conn, checkfirst=True)
+    if not has_column(conn, "members", "fingerprint_data"):
+        return
+
+    rows = conn.exec_driver_sql(
+        "SELECT id, fingerprint_data FROM members WHERE fingerprint_data IS NOT NULL"
+    ).fetchall()
+    now = datetime.utcnow()
+    if rows:
+        conn.execute(MemberBiometric.__table__.insert(), [{
+            "member_id": member_id,
+            "finger": 0,
+            "template": MemberBiometric.encode(template),
+            "template_format": "r30x",
+            "version": MemberBiometric.CURRENT_VERSION,
+            "created_at": now,
+            "updated_at": now
+        } for member_id, template in rows])
+
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        conn.exec_driver_sql("ALTER TABLE members DROP COLUMN fingerprint_data")
+    else:
+        conn.exec_driver_sql("UPDATE members SET fingerprint_data = NULL")
+
+@migration(5, "Add membership freeze date")
+def add_frozen_until(conn):
+    if not has_column(conn, "members", "frozen_until"):
+        conn.exec_driver_sql("ALTER TABLE members ADD COLUMN frozen_until DATETIME")
+
+@migration(6, "Add change tracking for incremental refresh")
+def add_change_tracking(conn):
+    if not has_column(conn, "attendance_records", "change_seq"):
+        conn.exec_driver_sql("ALTER TABLE attendance_records ADD COLUMN change_seq INTEGER")
+    create_indexes(conn, AttendanceRecord, {"ix_attendance_records_change_seq"})
+    for statement in CHANGE_TRACKING_DDL:
+        conn.exec_driver_sql(statement)
+
+@migration(7, "Add attendance rollup tables")
+def add_attendance_rollups(conn):
+    for table in ROLLUP_TABLES:
+        table.create(bind=conn, checkfirst=True)
+    for statement in ROLLUP_DDL:
+        conn.exec_driver_sql(statement)
+    rebuild_rollups(conn)
+
+@migration(8, "Add ledger snapshots and post subscription income")
+def add_ledger(conn):
+    BalanceSnapshot.__table__.create(bind=conn, checkfirst=True)
+    create_indexes(conn, Transaction, {"ix_transactions_reference_id"})
+    for statement in LEDGER_DDL:
+        conn.exec_driver_sql(statement)
+
+    # Paid subscriptions written before the ledger existed
+    conn.exec_driver_sql("""
+        INSERT INTO transactions (type, category, amount, description, date, created_by, reference_id, created_at)
+        SELECT 'INCOME', 'SUBSCRIPTION', amount, 'اشتراك رقم ' || id, coalesce(created_at, start_date),
+               created_by, 'subscription:' || id, coalesce(created_at, start_date)
+        FROM subscriptions
+        WHERE payment_status = 'paid' AND NOT EXISTS (
+            SELECT 1 FROM transactions WHERE transactions.reference_id = 'subscription:' || subscriptions.id
+        )
+    """)
+
+@migration(9, "Add per-day change tracking for the report cache")
+def add_day_changes(conn):
+    for statement in DAY_CHANGES_DDL:
+        conn.exec_driver_sql(statement)
+
+@migration(10, "Add member card version")
+def add_card_version(conn):
+    if not has_column(conn, "members", "card_version"):
+        conn.exec_driver_sql("ALTER TABLE members ADD COLUMN card_version INTEGER NOT NULL DEFAULT 1")
+
+def migrate(bind=engine):
+    """Apply all pending migrations; returns the resulting schema version"""
+    with bind.connect() as conn:
+        version = get_schema_version(conn)
+
+    for target, description, function in MIGRATIONS:
+        if target <= version:
+            continue
+        with bind.begin() as conn:
+            function(conn)
+            conn.exec_driver_sql(f"PRAGMA user_version = {target}")
+        version = target
+    return version
+
+def hot_queries():
+    """The statements the views and models run most, with the index each must use"""
+    now = datetime.utcnow()
+    week_ago = now - timedelta(days=7)
+    return [
+        ("member attendance range", "ix_attendance_records_member_check_in",
+         select(AttendanceRecord).where(
+             AttendanceRecord.member_id == 1,
+             AttendanceRecord.check_in >= week_ago,
+             AttendanceRecord.check_in <= now
+         )),
+        ("attendance since", "ix_attendance_records_check_in",
+         select(AttendanceRecord.id).where(AttendanceRecord.check_in >= week_ago)
+         .order_by(AttendanceRecord.check_in.desc())),
+        ("active members", "ix_members_active_end_date",
+         select(func.count()).select_from(Member).where(Member.is_active == True, Member.end_date >= now)),
+        ("expiring members", "ix_members_active_end_date",
+         select(func.count()).select_from(Member).where(
+             Member.is_active == True, Member.end_date.between(now, now + timedelta(days=7))
+         )),
+        ("current subscriptions", "ix_subscriptions_end_date_status",
+         select(Subscription.id).where(Subscription.end_date >= now)),
+        ("subscriptions started in range", "ix_subscriptions_start_date",
+         select(Subscription.id).where(Subscription.start_date >= week_ago, Subscription.start_date <= now)),
+        ("balance sheet", "ix_transactions_date_type",
+         select(Transaction.type, func.sum(Transaction.amount)).where(
+             Transaction.date >= week_ago, Transaction.date <= now
+         ).group_by(Transaction.type)),
+    ]
+
+def explain(conn, statement):
+    """Return the EXPLAIN QUERY PLAN detail lines for a statement"""
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}").fetchall()
+    return [row[-1] for row in rows]
+
+def check_query_plans(bind=engine):
+    """Check that every hot query uses its index; returns a list of failures"""
+    failures = []
+    with bind.connect() as conn:
+        for name, index, statement in hot_queries():
+            plan = explain(conn, statement)
+            if not any(index in line for line in plan):
+                failures.append((name, index, plan))
+    return failures
+
+if __name__ == "__main__":
+    print(f"نسخة قاعدة البيانات: {migrate()}")
+    if "--rebuild-rollups" in sys.argv:
+        with engine.begin() as conn:
+            rebuild_rollups(conn)
+        print("تمت إعادة بناء جداول ملخص الحضور")
+    failures = check_query_plans()
+    for name, index, plan in failures:
+        print(f"{name}: لا يستخدم {index}")
+        for line in plan:
+            print(f"    {line}")
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,99 @@
+from datetime import date
+from sqlalchemy import Column, Integer, Date, String, ForeignKey, func
+from .database import Base
+
+# Attendance counts pre-aggregated per day, per hour and per member per
+# month. Triggers on attendance_records keep them up to date in the same
+# transaction as the check-in, so reports and dashboard cards read a few
+# hundred rollup rows instead of scanning every visit. Days are UTC, like
+# the stored check-in times.
+
+class AttendanceDaily(Base):
+    __tablename__ = "attendance_daily"
+
+    day = Column(Date, primary_key=True)
+    visits = Column(Integer, nullable=False, default=0)
+
+class AttendanceHourly(Base):
+    __tablename__ = "attendance_hourly"
+
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    visits = Column(Integer, nullable=False, default=0)
+
+class MemberMonthlyAttendance(Base):
+    __tablename__ = "attendance_member_monthly"
+
+    member_id = Column(Integer, ForeignKey('members.id'), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    visits = Column(Integer, nullable=False, default=0)
+
+ROLLUP_TABLES = (AttendanceDaily.__table__, AttendanceHourly.__table__, MemberMonthlyAttendance.__table__)
+
+# (table, key columns, SQL expressions computing the keys from a visit row)
+_ROLLUPS = [
+    ("attendance_daily", ("day",), ("date({row}.check_in)",)),
+    ("attendance_hourly", ("day", "hour"), ("date({row}.check_in)", "CAST(strftime('%H', {row}.check_in) AS INTEGER)")),
+    ("attendance_member_monthly", ("member_id", "month"), ("{row}.member_id", "strftime('%Y-%m', {row}.check_in)")),
+]
+
+def _count(row: str, delta: int) -> str:
+    """Statements adding delta visits for a visit row (NEW or OLD)"""
+    statements = []
+    for table, keys, expressions in _ROLLUPS:
+        columns = ", ".join(keys)
+        values = ", ".join(expression.format(row=row) for expression in expressions)
+        if delta > 0:
+            statements.append(
+                f"INSERT INTO {table} ({columns}, visits) VALUES ({values}, 1) "
+                f"ON CONFLICT({columns}) DO UPDATE SET visits = visits + 1;"
+            )
+        else:
+            where = " AND ".join(
+                f"{key} = {expression.format(row=row)}" for key, expression in zip(keys, expressions)
+            )
+            statements.append(f"UPDATE {table} SET visits = visits - 1 WHERE {where};")
+    return " ".join(statements)
+
+ROLLUP_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS attendance_rollups_ai AFTER INSERT ON attendance_records BEGIN {_count('NEW', 1)} END",
+    f"CREATE TRIGGER IF NOT EXISTS attendance_rollups_ad AFTER DELETE ON attendance_records BEGIN {_count('OLD', -1)} END",
+    "CREATE TRIGGER IF NOT EXISTS attendance_rollups_au AFTER UPDATE OF check_in, member_id ON attendance_records "
+    f"BEGIN {_count('OLD', -1)} {_count('NEW', 1)} END",
+]
+
+def rebuild_rollups(conn):
+    """Recompute every rollup table from attendance_records"""
+    for table, keys, expressions in _ROLLUPS:
+        columns = ", ".join(keys)
+        values = ", ".join(expression.format(row="attendance_records") for expression in expressions)
+        positions = ", ".join(str(position) for position in range(1, len(keys) + 1))
+        conn.exec_driver_sql(f"DELETE FROM {table}")
+        conn.exec_driver_sql(
+            f"INSERT INTO {table} ({columns}, visits) "
+            f"SELECT {values}, count(*) FROM attendance_records GROUP BY {positions}"
+        )
+
+def visits_on(db, day: date) -> int:
+    """Number of check-ins on a day"""
+    return db.query(AttendanceDaily.visits).filter(AttendanceDaily.day == day).scalar() or 0
+
+def daily_visits(db, start_date: date, end_date: date):
+    """(day, visits) for each day with visits in the range"""
+    return db.query(AttendanceDaily.day, AttendanceDaily.visits).filter(
+        AttendanceDaily.day.between(start_date, end_date),
+        AttendanceDaily.visits > 0
+    ).order_by(AttendanceDaily.day).all()
+
+def hourly_visits(db, start_date: date, end_date: date):
+    """(hour, visits) summed over the range, e.g. to find peak hours"""
+    return db.query(AttendanceHourly.hour, func.sum(AttendanceHourly.visits)).filter(
+        AttendanceHourly.day.between(start_date, end_date)
+    ).group_by(AttendanceHourly.hour).order_by(AttendanceHourly.hour).all()
+
+def member_monthly_visits(db, member_id: int, start_month: str, end_month: str):
+    """(month, visits) of one member, months given as YYYY-MM"""
+    return db.query(MemberMonthlyAttendance.month, MemberMonthlyAttendance.visits).filter(
+        MemberMonthlyAttendance.member_id == member_id,
+        MemberMonthlyAttendance.month.between(start_month, end_month)
+    ).order_by(MemberMonthlyAttendance.month).all()
@@ -0,0 +1,103 @@
+from sqlalchemy import text
+
+# Characters folded before indexing and before querying, so that spelling
+# variants of the same Arabic name (hamza forms, taa marbuta, diacritics,
+# Arabic-Indic digits) match each other.
+ARABIC_FOLDING = {
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و', 'ئ': 'ي', 'ى': 'ي', 'ة': 'ه',
+    'ـ': '',  # Tatweel
+    **{chr(code): '' for code in range(0x064B, 0x0653)},  # Harakat
+    'ٰ': '',  # Superscript alef
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},  # Arabic-Indic digits
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},  # Eastern Arabic-Indic digits
+}
+
+_FOLDING_TABLE = str.maketrans(ARABIC_FOLDING)
+
+# Trigram tokens need at least three characters; shorter terms use LIKE
+MIN_MATCH_LENGTH = 3
+
+# SQLite's parser overflows on deeply nested calls, so fold_sql applies the
+# replacements in chunks, each one wrapped in its own scalar subquery
+_FOLD_CHUNK_SIZE = 10
+
+def normalize_search_text(value: str) -> str:
+    """Fold Arabic spelling variants the same way the index does"""
+    return (value or "").translate(_FOLDING_TABLE)
+
+def fold_sql(expression: str) -> str:
+    """Build the SQL equivalent of normalize_search_text for use in triggers"""
+    expression = f"coalesce({expression}, '')"
+    replacements = list(ARABIC_FOLDING.items())
+    for start in range(0, len(replacements), _FOLD_CHUNK_SIZE):
+        folded = "v"
+        for source, target in replacements[start:start + _FOLD_CHUNK_SIZE]:
+            folded = f"replace({folded}, '{source}', '{target}')"
+        expression = f"(SELECT {folded} FROM (SELECT {expression} AS v))"
+    return expression
+
+def _indexed_values(prefix: str) -> str:
+    return ", ".join(fold_sql(f"{prefix}.{column}") for column in ("full_name", "phone", "email"))
+
+MEMBER_SEARCH_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS members_fts
+       USING fts5(full_name, phone, email, tokenize='trigram')""",
+    f"""CREATE TRIGGER IF NOT EXISTS members_fts_insert AFTER INSERT ON members BEGIN
+        INSERT INTO members_fts(rowid, full_name, phone, email) VALUES (new.id, {_indexed_values('new')});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS members_fts_update AFTER UPDATE OF full_name, phone, email ON members BEGIN
+        DELETE FROM members_fts WHERE rowid = old.id;
+        INSERT INTO members_fts(rowid, full_name, phone, email) VALUES (new.id, {_indexed_values('new')});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS members_fts_delete AFTER DELETE ON members BEGIN
+        DELETE FROM members_fts WHERE rowid = old.id;
+    END""",
+]
+
+def rebuild_member_search(conn):
+    """Re-index every member"""
+    conn.exec_driver_sql("DELETE FROM members_fts")
+    conn.exec_driver_sql(
+        f"INSERT INTO members_fts(rowid, full_name, phone, email) "
+        f"SELECT m.id, {_indexed_values('m')} FROM members m"
+    )
+
+def has_member_search(db) -> bool:
+    """Check if the search index exists in this database"""
+    return db.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'members_fts'"
+    )).first() is not None
+
+def search_members(db, query: str, limit: int = 200):
+    """Return member ids matching query, best match first.
+
+    Terms of three characters or more go through the trigram index and are
+    ranked with bm25; shorter terms are matched with LIKE on the indexed
+    columns. Returns None when the index is not installed so callers can fall
+    back to a plain filter.
+    """
+    if not has_member_search(db):
+        return None
+
+    terms = normalize_search_text(query).split()
+    if not terms:
+        return []
+
+    match_terms = ['"' + term.replace('"', '""') + '"' for term in terms if len(term) >= MIN_MATCH_LENGTH]
+    like_terms = [term for term in terms if len(term) < MIN_MATCH_LENGTH]
+
+    conditions = []
+    params = {"limit": limit}
+    if match_terms:
+        conditions.append("members_fts MATCH :match")
+        params["match"] = " ".join(match_terms)
+    for i, term in enumerate(like_terms):
+        conditions.append(f"(full_name LIKE :like{i} OR phone LIKE :like{i} OR email LIKE :like{i})")
+        params[f"like{i}"] = f"%{term}%"
+
+    order = "rank" if match_terms else "rowid"
+    rows = db.execute(text(
+        f"SELECT rowid FROM members_fts WHERE {' AND '.join(conditions)} ORDER BY {order} LIMIT :limit"
+    ), params)
+    return [row[0] for row in rows]
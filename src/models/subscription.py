@@ -1,11 +1,16 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Enum
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Enum, Index
 from sqlalchemy.orm import relationship
 from .database import Base
 from .member import MembershipType
 
 class Subscription(Base):
     __tablename__ = "subscriptions"
+    __table_args__ = (
+        Index("ix_subscriptions_end_date_status", "end_date", "payment_status"),
+        Index("ix_subscriptions_start_date", "start_date"),
+        Index("ix_subscriptions_member_id", "member_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     member_id = Column(Integer, ForeignKey('members.id'), nullable=False)
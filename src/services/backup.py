@@ -0,0 +1,319 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from src.utils.config import (DATABASE_PATH, BACKUP_DIR, BACKUP_RETENTION_DAYS, BACKUP_PAGES_PER_STEP,
+                              BACKUP_STEP_SLEEP, BACKUP_INTERVAL_HOURS, SQLITE_BUSY_TIMEOUT)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+BACKUP_PREFIX = "gym-"
+TIMESTAMP_FORMAT = "%Y%m%d-%H%M%S-%f"
+EXTENSIONS = {"zstd": ".db.zst", "gzip": ".db.gz"}
+CHUNK_SIZE = 1024 * 1024
+
+class BackupError(Exception):
+    pass
+
+def _open_compressed(path, mode, compression):
+    """Binary file object that (de)compresses while streaming"""
+    if compression == "gzip":
+        return gzip.open(path, mode)
+    if zstandard is None:
+        raise BackupError("النسخة مضغوطة بـ zstd والحزمة zstandard غير مثبتة")
+    if mode == "wb":
+        return zstandard.ZstdCompressor(level=10).stream_writer(open(path, "wb"), closefd=True)
+    return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+
+def _copy(source, destination) -> str:
+    """Copy one file object into another and return the sha256 of the bytes copied"""
+    digest = hashlib.sha256()
+    while True:
+        chunk = source.read(CHUNK_SIZE)
+        if not chunk:
+            return digest.hexdigest()
+        digest.update(chunk)
+        destination.write(chunk)
+
+def file_checksum(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def archive_path(backup_dir, created, compression) -> str:
+    return os.path.join(backup_dir, f"{BACKUP_PREFIX}{created.strftime(TIMESTAMP_FORMAT)}{EXTENSIONS[compression]}")
+
+def manifest_path(archive) -> str:
+    return f"{archive}.json"
+
+def read_manifest(archive) -> dict:
+    try:
+        with open(manifest_path(archive), encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        raise BackupError(f"ملف وصف النسخة مفقود أو تالف: {manifest_path(archive)}")
+
+def snapshot(db_path, target, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP) -> int:
+    """Copy a live database into target with the SQLite online backup API.
+
+    Copies pages pages per step and sleeps between steps, so writers only
+    wait for the lock for the duration of one step. In WAL mode the copy is
+    taken from a read transaction held open on the source: readers never
+    block writers there, and the backup sees one consistent snapshot
+    instead of restarting whenever the front desk writes. Returns the
+    number of times the copy had to restart.
+    """
+    source = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT / 1000, isolation_level=None)
+    destination = sqlite3.connect(target, isolation_level=None)
+    restarts = 0
+    remaining = [None]
+
+    def on_progress(status, left, total):
+        nonlocal restarts
+        # remaining only grows when the source changed and the copy started over
+        if remaining[0] is not None and left > remaining[0]:
+            restarts += 1
+        remaining[0] = left
+
+    try:
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        if wal:
+            source.execute("BEGIN")
+            source.execute("SELECT count(*) FROM sqlite_master").fetchone()
+        source.backup(destination, pages=pages, progress=on_progress, sleep=sleep)
+        if wal:
+            source.execute("COMMIT")
+        # A standalone file: keep the snapshot out of WAL mode so it is one self-contained file
+        destination.execute("PRAGMA journal_mode = DELETE")
+        check = destination.execute("PRAGMA quick_check").fetchone()[0]
+        if check != "ok":
+            raise BackupError(f"فشل فحص سلامة النسخة: {check}")
+    finally:
+        destination.close()
+        source.close()
+    return restarts
+
+def create_backup(db_path=DATABASE_PATH, backup_dir=BACKUP_DIR, compression=None,
+                  pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP) -> str:
+    """Write a compressed, checksummed snapshot of the database and return its path"""
+    if compression is None:
+        compression = "zstd" if zstandard is not None else "gzip"
+    os.makedirs(backup_dir, exist_ok=True)
+    created = datetime.now()
+    # Never replace an existing archive, e.g. the one restore_backup is restoring
+    while os.path.exists(archive_path(backup_dir, created, compression)):
+        created += timedelta(microseconds=1)
+    archive = archive_path(backup_dir, created, compression)
+
+    started = time.monotonic()
+    handle, raw = tempfile.mkstemp(suffix=".db", dir=backup_dir)
+    os.close(handle)
+    partial = f"{archive}.tmp"
+    try:
+        restarts = snapshot(db_path, raw, pages, sleep)
+        connection = sqlite3.connect(raw)
+        try:
+            user_version = connection.execute("PRAGMA user_version").fetchone()[0]
+        finally:
+            connection.close()
+
+        with open(raw, "rb") as source, _open_compressed(partial, "wb", compression) as destination:
+            database_sha256 = _copy(source, destination)
+        manifest = {
+            "created": created.isoformat(timespec="seconds"),
+            "compression": compression,
+            "database_size": os.path.getsize(raw),
+            "database_sha256": database_sha256,
+            "archive_sha256": file_checksum(partial),
+            "user_version": user_version,
+            "restarts": restarts,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        with open(manifest_path(archive), "w", encoding="utf-8") as file:
+            json.dump(manifest, file, indent=2)
+        # The archive appears under its final name only once it and its manifest are complete
+        os.replace(partial, archive)
+    except BaseException:
+        for path in (partial, manifest_path(archive)):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        os.remove(raw)
+    return archive
+
+def list_backups(backup_dir=BACKUP_DIR) -> list:
+    """Return (created, archive path) of every backup, oldest first"""
+    backups = []
+    if not os.path.isdir(backup_dir):
+        return backups
+    for name in os.listdir(backup_dir):
+        extension = next((ext for ext in EXTENSIONS.values() if name.endswith(ext)), None)
+        if not name.startswith(BACKUP_PREFIX) or extension is None:
+            continue
+        try:
+            created = datetime.strptime(name[len(BACKUP_PREFIX):-len(extension)], TIMESTAMP_FORMAT)
+        except ValueError:
+            continue
+        backups.append((created, os.path.join(backup_dir, name)))
+    return sorted(backups)
+
+def prune_backups(backup_dir=BACKUP_DIR, retention_days=BACKUP_RETENTION_DAYS, now=None) -> list:
+    """Delete backups older than retention_days, always keeping the newest one; returns the deleted paths"""
+    cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+    deleted = []
+    for created, archive in list_backups(backup_dir)[:-1]:
+        if created >= cutoff:
+            break
+        for path in (archive, manifest_path(archive)):
+            if os.path.exists(path):
+                os.remove(path)
+        deleted.append(archive)
+    return deleted
+
+def _extract(archive, target) -> dict:
+    """Decompress a verified archive into target and return its manifest"""
+    manifest = read_manifest(archive)
+    if file_checksum(archive) != manifest["archive_sha256"]:
+        raise BackupError(f"المجموع الاختباري للنسخة غير مطابق: {archive}")
+    with _open_compressed(archive, "rb", manifest["compression"]) as source, open(target, "wb") as destination:
+        database_sha256 = _copy(source, destination)
+    if database_sha256 != manifest["database_sha256"]:
+        raise BackupError(f"المجموع الاختباري لقاعدة البيانات غير مطابق: {archive}")
+
+    connection = sqlite3.connect(target)
+    try:
+        check = connection.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        connection.close()
+    if check != "ok":
+        raise BackupError(f"فشل فحص سلامة قاعدة البيانات: {check}")
+    return manifest
+
+def verify_backup(archive) -> dict:
+    """Check both checksums and the integrity of the database in an archive; returns its manifest"""
+    handle, target = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    try:
+        return _extract(archive, target)
+    finally:
+        os.remove(target)
+
+def restore_backup(archive, db_path=DATABASE_PATH, backup_dir=BACKUP_DIR) -> str:
+    """Replace the database with a verified archive, backing up the current database first.
+
+    The pages are written with the backup API through a regular connection,
+    so the restore takes the database lock and keeps the WAL consistent
+    instead of overwriting the file underneath other connections. Returns
+    the path of the safety backup, if one was made.
+    """
+    handle, target = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    try:
+        _extract(archive, target)
+        safety = create_backup(db_path, backup_dir) if os.path.exists(db_path) else None
+        source = sqlite3.connect(target)
+        destination = sqlite3.connect(db_path, timeout=SQLITE_BUSY_TIMEOUT / 1000)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+            source.close()
+    finally:
+        os.remove(target)
+    return safety
+
+class BackupScheduler:
+    """Takes a backup every interval_hours on a daemon thread and prunes old ones"""
+
+    def __init__(self, interval_hours=BACKUP_INTERVAL_HOURS, backup_dir=BACKUP_DIR):
+        self.interval = interval_hours * 3600
+        self.backup_dir = backup_dir
+        self.last_error = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name="backup-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def next_delay(self) -> float:
+        """Seconds until the next backup is due, counted from the newest existing one"""
+        backups = list_backups(self.backup_dir)
+        if not backups:
+            return 0
+        age = (datetime.now() - backups[-1][0]).total_seconds()
+        return max(self.interval - age, 0)
+
+    def _run(self):
+        # Leave start-up to the application before the first backup
+        if self._stopped.wait(60):
+            return
+        while not self._stopped.wait(self.next_delay()):
+            try:
+                create_backup(backup_dir=self.backup_dir)
+                prune_backups(self.backup_dir)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                # Retry in an hour rather than spinning on a persistent failure
+                if self._stopped.wait(3600):
+                    return
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.services.backup", description="النسخ الاحتياطي لقاعدة البيانات")
+    commands = parser.add_subparsers(dest="command", required=True)
+    create = commands.add_parser("create", help="إنشاء نسخة احتياطية")
+    create.add_argument("--compression", choices=sorted(EXTENSIONS))
+    commands.add_parser("list", help="عرض النسخ الاحتياطية")
+    commands.add_parser("prune", help="حذف النسخ الأقدم من مدة الاحتفاظ")
+    verify = commands.add_parser("verify", help="التحقق من نسخة احتياطية")
+    verify.add_argument("archive")
+    restore = commands.add_parser("restore", help="استعادة نسخة احتياطية")
+    restore.add_argument("archive")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "create":
+            archive = create_backup(compression=args.compression)
+            print(f"تم إنشاء النسخة: {archive}")
+            for path in prune_backups():
+                print(f"تم حذف: {path}")
+        elif args.command == "list":
+            for created, archive in list_backups():
+                print(f"{created:%Y-%m-%d %H:%M:%S}  {os.path.getsize(archive):>12}  {archive}")
+        elif args.command == "prune":
+            for path in prune_backups():
+                print(f"تم حذف: {path}")
+        elif args.command == "verify":
+            manifest = verify_backup(args.archive)
+            print(f"النسخة سليمة ({manifest['created']}, نسخة المخطط {manifest['user_version']})")
+        elif args.command == "restore":
+            safety = restore_backup(args.archive)
+            if safety:
+                print(f"نسخة من قاعدة البيانات الحالية: {safety}")
+            print(f"تمت الاستعادة من: {args.archive}")
+    except BackupError as e:
+        print(e, file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import argparse
+import hashlib
+import io
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from src.models.database import ReadSessionLocal
+from src.services.cards import issue_cards
+from src.services.export import ExportCancelled, register_pdf_font, shape_text
+from src.utils.config import APP_NAME, CARD_PHOTO_DIR, CARD_QR_CACHE_DIR, CARD_PRINT_WORKERS
+
+# ID-1 (credit card) size cards, COLUMNS x ROWS to an A4 sheet
+MM = 72 / 25.4
+CARD_WIDTH = 85.6 * MM
+CARD_HEIGHT = 53.98 * MM
+COLUMNS, ROWS = 2, 5
+GUTTER = 3 * MM
+CARDS_PER_PAGE = COLUMNS * ROWS
+
+# Cards sent to a render worker at a time; large enough to amortize the IPC
+CHUNK_SIZE = 25
+
+# Card layout, in points from the card's bottom left corner
+BAND_HEIGHT = 9 * MM
+QR_SIZE = 38 * MM
+PHOTO_WIDTH, PHOTO_HEIGHT = 20 * MM, 26.7 * MM
+PHOTO_X = CARD_WIDTH - 3 * MM - PHOTO_WIDTH
+PHOTO_Y = CARD_HEIGHT - BAND_HEIGHT - 3 * MM - PHOTO_HEIGHT
+PHOTO_PIXELS = (240, 320)
+PHOTO_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+def qr_cache_path(token: str, cache_dir=CARD_QR_CACHE_DIR) -> str:
+    """Cached PNG of a token's QR code; a reissued card has a new token and so a new entry"""
+    return os.path.join(cache_dir, hashlib.sha256(token.encode("ascii")).hexdigest()[:32] + ".png")
+
+def render_qr(token: str, cache_dir=CARD_QR_CACHE_DIR) -> bytes:
+    """PNG bytes of the token's QR code, rendered once and then read from the cache"""
+    path = qr_cache_path(token, cache_dir) if cache_dir else None
+    if path and os.path.exists(path):
+        with open(path, "rb") as file:
+            return file.read()
+
+    import qrcode
+
+    # One pixel per module: the PDF scales it up without smoothing, so the
+    # print stays sharp and the page only has a few hundred bytes to embed
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=1, border=2)
+    code.add_data(token)
+    code.make(fit=True)
+    buffer = io.BytesIO()
+    code.make_image().convert("L").save(buffer, format="PNG")
+    data = buffer.getvalue()
+
+    if path:
+        # Written under a temporary name so a concurrent worker never reads half a file
+        os.makedirs(cache_dir, exist_ok=True)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(data)
+        os.replace(temporary, path)
+    return data
+
+def render_photo(member_id: int, photo_dir=CARD_PHOTO_DIR):
+    """JPEG bytes of the member's photo cropped to the card's frame, or None if there is none"""
+    if not photo_dir:
+        return None
+    for extension in PHOTO_EXTENSIONS:
+        path = os.path.join(photo_dir, f"{member_id}{extension}")
+        if os.path.exists(path):
+            break
+    else:
+        return None
+
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as image:
+        photo = ImageOps.fit(ImageOps.exif_transpose(image).convert("RGB"), PHOTO_PIXELS)
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+def render_chunk(cards, cache_dir=CARD_QR_CACHE_DIR, photo_dir=CARD_PHOTO_DIR) -> list:
+    """Worker: (card, QR PNG, photo JPEG or None) for each card"""
+    return [(card, render_qr(card.token, cache_dir), render_photo(card.member_id, photo_dir)) for card in cards]
+
+class CardSheetWriter:
+    """Draws rendered cards onto A4 sheets, a page at a time, as they arrive"""
+
+    def __init__(self, path):
+        from reportlab import rl_config
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen.canvas import Canvas
+
+        # Binary streams: ASCII85 encoding every image in pure Python costs more than the rendering
+        rl_config.useA85 = 0
+
+        self.page_width, self.page_height = A4
+        self.canvas = Canvas(path, pagesize=A4, pageCompression=1)
+        self.canvas.setTitle("بطاقات العضوية")
+        self.font = register_pdf_font()
+        self.left = (self.page_width - COLUMNS * CARD_WIDTH - (COLUMNS - 1) * GUTTER) / 2
+        self.top = self.page_height - (self.page_height - ROWS * CARD_HEIGHT - (ROWS - 1) * GUTTER) / 2
+        self.on_page = 0
+        self.pages = 0
+        self._draw_template()
+
+    def _draw_template(self):
+        """The parts every card shares, stored once in the PDF and placed per card"""
+        canvas = self.canvas
+        canvas.beginForm("card", 0, 0, CARD_WIDTH, CARD_HEIGHT)
+        # Outline doubles as the cutting guide
+        canvas.setStrokeColorRGB(0.75, 0.75, 0.75)
+        canvas.setLineWidth(0.5)
+        canvas.roundRect(0, 0, CARD_WIDTH, CARD_HEIGHT, 3 * MM)
+        # Header band
+        canvas.setFillColorRGB(0.10, 0.14, 0.49)
+        canvas.rect(0, CARD_HEIGHT - BAND_HEIGHT, CARD_WIDTH, BAND_HEIGHT, stroke=0, fill=1)
+        canvas.setFillColorRGB(1, 1, 1)
+        canvas.setFont(self.font, 10)
+        canvas.drawCentredString(CARD_WIDTH / 2, CARD_HEIGHT - BAND_HEIGHT + 3 * MM, shape_text(APP_NAME))
+        canvas.endForm()
+
+    def add(self, card, qr_png, photo_jpeg):
+        from reportlab.lib.utils import ImageReader
+
+        column, row = self.on_page % COLUMNS, self.on_page // COLUMNS
+        x = self.left + column * (CARD_WIDTH + GUTTER)
+        y = self.top - (row + 1) * CARD_HEIGHT - row * GUTTER
+        canvas = self.canvas
+        canvas.saveState()
+        canvas.translate(x, y)
+        canvas.doForm("card")
+
+        # QR code on the left, photo on the right, text between them (right to left)
+        canvas.drawImage(ImageReader(io.BytesIO(qr_png)), 3 * MM, 3 * MM, QR_SIZE, QR_SIZE)
+        if photo_jpeg:
+            canvas.drawImage(ImageReader(io.BytesIO(photo_jpeg)), PHOTO_X, PHOTO_Y, PHOTO_WIDTH, PHOTO_HEIGHT)
+        else:
+            canvas.setFillColorRGB(0.92, 0.92, 0.92)
+            canvas.rect(PHOTO_X, PHOTO_Y, PHOTO_WIDTH, PHOTO_HEIGHT, stroke=0, fill=1)
+            canvas.setFillColorRGB(0, 0, 0)
+
+        text_x = CARD_WIDTH - 3 * MM
+        canvas.setFont(self.font, 9)
+        canvas.drawRightString(text_x, 9 * MM, shape_text(card.full_name))
+        canvas.setFont(self.font, 7)
+        canvas.drawRightString(text_x, 5.5 * MM, shape_text(f"رقم العضو: {card.member_id}"))
+        canvas.drawRightString(PHOTO_X - 2 * MM, PHOTO_Y + 2 * MM, shape_text(f"صالحة حتى: {card.expires.isoformat()}"))
+        canvas.restoreState()
+
+        self.on_page += 1
+        if self.on_page == CARDS_PER_PAGE:
+            self.end_page()
+
+    def end_page(self):
+        if self.on_page:
+            self.canvas.showPage()
+            self.pages += 1
+            self.on_page = 0
+
+    def close(self):
+        self.end_page()
+        self.canvas.save()
+
+def print_cards(member_ids, path, progress=None, cancel=None, workers=CARD_PRINT_WORKERS) -> int:
+    """Render the members' cards into one PDF at path; returns the number of cards.
+
+    Signed tokens are issued here; QR codes and photos are rendered by a
+    process pool, chunk by chunk, and the chunks are laid out in order as
+    they come back, so pages go into the PDF while later chunks are still
+    rendering. Reports (cards written, total) on progress and stops with
+    ExportCancelled once cancel is set, like run_export, whose job runner
+    starts it.
+    """
+    db = ReadSessionLocal()
+    try:
+        cards = list(issue_cards(db, member_ids))
+    finally:
+        db.close()
+    total = len(cards)
+    if not total:
+        raise ValueError("لا يوجد أعضاء نشطون بين المحددين")
+    if progress is not None:
+        progress.put((0, total))
+
+    chunks = [cards[start:start + CHUNK_SIZE] for start in range(0, total, CHUNK_SIZE)]
+    writer = CardSheetWriter(path)
+    context = multiprocessing.get_context("spawn")
+    pool = ProcessPoolExecutor(workers or None, mp_context=context)
+    written = 0
+    try:
+        for rendered in pool.map(render_chunk, chunks):
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            for card, qr_png, photo_jpeg in rendered:
+                writer.add(card, qr_png, photo_jpeg)
+            written += len(rendered)
+            if progress is not None:
+                progress.put((written, total))
+        writer.close()
+        writer = None
+        return written
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        pool.shutdown(wait=writer is None, cancel_futures=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.services.card_print", description="طباعة بطاقات العضوية")
+    parser.add_argument("path", help="ملف PDF الناتج")
+    parser.add_argument("members", nargs="*", type=int, help="أرقام الأعضاء (كل الأعضاء النشطين إن لم تحدد)")
+    parser.add_argument("--workers", type=int, default=CARD_PRINT_WORKERS, help="عدد عمليات الرسم (0 = عدد المعالجات)")
+    args = parser.parse_args(argv)
+
+    started = time.monotonic()
+    try:
+        count = print_cards(args.members or None, args.path, workers=args.workers)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"تمت طباعة {count} بطاقة في {time.monotonic() - started:.1f} ثانية: {args.path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+import argparse
+import base64
+import binascii
+import csv
+import hashlib
+import hmac
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from src.models.database import SessionLocal, ReadSessionLocal
+from src.models.member import Member
+from src.models.migrations import migrate
+from src.services import checkin_pipeline
+from src.utils.config import SECRET_KEY, CARD_VALID_DAYS
+
+# A card is "GYM1:" followed by the base32 of a packed payload and a
+# truncated HMAC-SHA256 tag over it. Base32 keeps the text in the QR
+# alphanumeric set, so the code stays small enough to scan from a phone.
+CARD_PREFIX = "GYM1:"
+FORMAT_VERSION = 1
+_PAYLOAD = struct.Struct(">BIHI")  # format version, member id, card version, expiry day
+TAG_BYTES = 16
+EPOCH = date(1970, 1, 1)
+KEY_INFO = b"gym member card v1"
+
+# Card check statuses; the rest are checkin_pipeline's
+VALID = "valid"
+INVALID = "invalid"
+REVOKED = "revoked"
+CARD_EXPIRED = "card_expired"
+
+CardPayload = namedtuple("CardPayload", ["member_id", "card_version", "expires"])
+CardCheck = namedtuple("CardCheck", ["status", "member_id", "member_name"])
+IssuedCard = namedtuple("IssuedCard", ["member_id", "full_name", "card_version", "expires", "token"])
+
+class CardError(ValueError):
+    pass
+
+def derive_card_key(secret: str = SECRET_KEY) -> bytes:
+    """The card signing key, derived from SECRET_KEY so it is never used for anything else"""
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=KEY_INFO).derive(secret.encode("utf-8"))
+
+class CardSigner:
+    """Signs and decodes member card tokens"""
+
+    def __init__(self, key: bytes = None):
+        self.key = key or derive_card_key()
+        # Copying a keyed HMAC skips hashing the key again on every scan
+        self._mac = hmac.new(self.key, digestmod=hashlib.sha256)
+
+    def _tag(self, body: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(body)
+        return mac.digest()[:TAG_BYTES]
+
+    def sign(self, member_id: int, card_version: int, expires: date) -> str:
+        body = _PAYLOAD.pack(FORMAT_VERSION, member_id, card_version, (expires - EPOCH).days)
+        return CARD_PREFIX + base64.b32encode(body + self._tag(body)).decode("ascii").rstrip("=")
+
+    def decode(self, token: str) -> CardPayload:
+        """Return the payload of a genuine token; raises CardError otherwise"""
+        if not token.startswith(CARD_PREFIX):
+            raise CardError("ليست بطاقة عضوية")
+        text = token[len(CARD_PREFIX):].strip().upper()
+        try:
+            data = base64.b32decode(text + "=" * (-len(text) % 8))
+        except (binascii.Error, ValueError):
+            raise CardError("بطاقة تالفة")
+        if len(data) != _PAYLOAD.size + TAG_BYTES:
+            raise CardError("بطاقة تالفة")
+        body, tag = data[:_PAYLOAD.size], data[_PAYLOAD.size:]
+        if not hmac.compare_digest(tag, self._tag(body)):
+            raise CardError("توقيع البطاقة غير صحيح")
+        format_version, member_id, card_version, expiry_day = _PAYLOAD.unpack(body)
+        if format_version != FORMAT_VERSION:
+            raise CardError("إصدار البطاقة غير مدعوم")
+        return CardPayload(member_id, card_version, EPOCH + timedelta(days=expiry_day))
+
+class CardVerifier:
+    """Checks a scanned card without touching the database.
+
+    The signature proves the card was issued by us; the card's version is
+    compared with the member's current card_version in the validity cache,
+    so bumping it (see revoke_cards) revokes every card printed before; and
+    the membership itself must be valid, by the same rule as a fingerprint
+    scan. Members missing from the cache are reported as unknown rather
+    than read through.
+    """
+
+    def __init__(self, validity, signer: CardSigner = None):
+        self.validity = validity
+        self.signer = signer or CardSigner()
+
+    def verify(self, token: str, now: datetime = None) -> CardCheck:
+        now = now or datetime.utcnow()
+        try:
+            card = self.signer.decode(token)
+        except CardError:
+            return CardCheck(INVALID, None, None)
+        if card.expires < now.date():
+            return CardCheck(CARD_EXPIRED, card.member_id, None)
+
+        entry = self.validity.peek(card.member_id)
+        if entry is None:
+            return CardCheck(checkin_pipeline.UNKNOWN, card.member_id, None)
+        if entry.card_version != card.card_version:
+            return CardCheck(REVOKED, card.member_id, entry.full_name)
+        if not entry.is_valid(now):
+            return CardCheck(checkin_pipeline.EXPIRED, card.member_id, entry.full_name)
+        return CardCheck(VALID, card.member_id, entry.full_name)
+
+def issue_cards(db, member_ids=None, valid_days=CARD_VALID_DAYS, today: date = None, signer: CardSigner = None):
+    """Yield an IssuedCard for each active member (or each of member_ids), streaming the rows"""
+    signer = signer or CardSigner()
+    expires = (today or date.today()) + timedelta(days=valid_days)
+    query = db.query(Member.id, Member.full_name, Member.card_version).filter(Member.is_active == True)
+    if member_ids is not None:
+        query = query.filter(Member.id.in_(member_ids))
+    for member_id, full_name, card_version in query.order_by(Member.id).yield_per(2000):
+        yield IssuedCard(member_id, full_name, card_version, expires, signer.sign(member_id, card_version, expires))
+
+def revoke_cards(db, member_ids=None) -> int:
+    """Invalidate the printed cards of member_ids (all members if None); returns the number of members.
+
+    A bulk update, so the validity caches of running processes pick it up
+    on their next reconcile (the kiosk server polls for member changes).
+    """
+    query = db.query(Member)
+    if member_ids is not None:
+        query = query.filter(Member.id.in_(member_ids))
+    return query.update({Member.card_version: Member.card_version + 1}, synchronize_session=False)
+
+def render_qr_png(token: str, path: str, box_size: int = 8):
+    """Write the card's QR code as a PNG"""
+    import qrcode
+
+    code = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=box_size, border=2)
+    code.add_data(token)
+    code.make(fit=True)
+    code.make_image().save(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.services.cards", description="بطاقات العضوية")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    issue = commands.add_parser("issue", help="إصدار بطاقات لكل الأعضاء النشطين أو لأعضاء محددين")
+    issue.add_argument("members", nargs="*", type=int)
+    issue.add_argument("--out", default="cards.csv", help="ملف CSV بالرموز")
+    issue.add_argument("--qr-dir", help="حفظ صورة QR لكل بطاقة في هذا المجلد")
+    issue.add_argument("--days", type=int, default=CARD_VALID_DAYS, help="مدة صلاحية البطاقة")
+    issue.add_argument("--reissue", action="store_true", help="إلغاء البطاقات السابقة أولاً")
+
+    revoke = commands.add_parser("revoke", help="إلغاء بطاقات أعضاء (مثلاً عند الضياع)")
+    revoke.add_argument("members", nargs="+", type=int)
+
+    verify = commands.add_parser("verify", help="التحقق من رمز بطاقة")
+    verify.add_argument("token")
+    verify.add_argument("--repeat", type=int, default=10000, help="عدد مرات القياس")
+    args = parser.parse_args(argv)
+
+    if args.command in ("issue", "revoke") and SECRET_KEY == "your-secret-key-here":
+        print("تحذير: SECRET_KEY هو القيمة الافتراضية، ويمكن لأي شخص تزوير البطاقات", file=sys.stderr)
+
+    migrate()
+    if args.command == "revoke" or (args.command == "issue" and args.reissue):
+        db = SessionLocal()
+        try:
+            count = revoke_cards(db, args.members or None)
+            db.commit()
+        finally:
+            db.close()
+        print(f"تم إلغاء بطاقات {count} عضو")
+        if args.command == "revoke":
+            return 0
+
+    if args.command == "issue":
+        if args.qr_dir:
+            os.makedirs(args.qr_dir, exist_ok=True)
+        started = time.monotonic()
+        count = 0
+        db = ReadSessionLocal()
+        try:
+            with open(args.out, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(IssuedCard._fields)
+                for card in issue_cards(db, args.members or None, args.days):
+                    writer.writerow(card)
+                    if args.qr_dir:
+                        render_qr_png(card.token, os.path.join(args.qr_dir, f"{card.member_id}.png"))
+                    count += 1
+        finally:
+            db.close()
+        print(f"تم إصدار {count} بطاقة في {time.monotonic() - started:.1f} ثانية: {args.out}")
+        return 0
+
+    from src.services.validity_cache import get_validity_cache
+
+    verifier = CardVerifier(get_validity_cache())
+    check = verifier.verify(args.token)
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        verifier.verify(args.token)
+    elapsed_us = (time.perf_counter() - started) / max(args.repeat, 1) * 1e6
+    print(f"{check.status} member={check.member_id} {check.member_name or ''}")
+    print(f"زمن التحقق: {elapsed_us:.1f} ميكروثانية")
+    return 0 if check.status == VALID else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
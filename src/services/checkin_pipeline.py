@@ -0,0 +1,173 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from src.services.validity_cache import get_validity_cache
+from src.services.writer import get_write_service
+from src.utils.config import CHECKIN_QUEUE_SIZE, CHECKIN_DEBOUNCE_SECONDS, WRITER_RESULT_TIMEOUT
+
+ScanEvent = namedtuple("ScanEvent", ["template", "scanned_at"])
+ScanResult = namedtuple("ScanResult", ["status", "member_id", "member_name", "score", "latency_ms"])
+
+# Scan result statuses
+CHECKED_IN = "checked_in"
+CHECKED_OUT = "checked_out"
+UNKNOWN = "unknown"
+EXPIRED = "expired"
+DUPLICATE = "duplicate"
+ERROR = "error"
+
+class StageStats:
+    """Latency counters for one pipeline stage"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+
+    def record(self, elapsed_ms: float):
+        with self._lock:
+            self.count += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.last_ms = elapsed_ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"count": self.count, "mean_ms": self.mean_ms, "max_ms": self.max_ms, "last_ms": self.last_ms}
+
+class CheckInPipeline:
+    """Reader thread -> bounded queue -> identify/validate/record consumer.
+
+    The reader thread only polls the device and enqueues scans. When the
+    queue is full it stops polling until the consumer catches up, so a burst
+    at the door can never grow memory without bound. The consumer
+    identifies the member, checks the membership, writes the attendance
+    record through the write service and hands a ScanResult to on_result
+    (from the consumer thread).
+    """
+
+    STAGES = ("queue", "identify", "validate", "write", "total")
+
+    def __init__(self, reader, matcher=None, validity=None, on_result=None, queue_size=CHECKIN_QUEUE_SIZE,
+                 debounce_seconds=CHECKIN_DEBOUNCE_SECONDS, writer=None):
+        self.reader = reader
+        self.matcher = matcher
+        self.validity = validity
+        self.on_result = on_result
+        self.debounce_seconds = debounce_seconds
+        self.writer = writer
+        self.scans = queue.Queue(maxsize=queue_size)
+        self.stats = {stage: StageStats() for stage in self.STAGES}
+        self.last_accepted = {}  # member_id -> monotonic time of last recorded scan
+        self.running = threading.Event()
+        self.threads = []
+
+    def start(self):
+        if self.running.is_set():
+            return
+        self.running.set()
+        self.threads = [
+            threading.Thread(target=self._read_loop, name="fingerprint-reader", daemon=True),
+            threading.Thread(target=self._consume_loop, name="check-in-consumer", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self, timeout=2.0):
+        self.running.clear()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+        self.reader.close()
+
+    def stats_snapshot(self) -> dict:
+        return {stage: stats.snapshot() for stage, stats in self.stats.items()}
+
+    def _read_loop(self):
+        while self.running.is_set():
+            try:
+                template = self.reader.read_template(timeout=0.5)
+            except Exception:
+                time.sleep(1)
+                continue
+            if template is None:
+                continue
+
+            event = ScanEvent(template, time.monotonic())
+            while self.running.is_set():
+                try:
+                    self.scans.put(event, timeout=0.5)
+                    break
+                except queue.Full:
+                    continue
+
+    def _consume_loop(self):
+        # Loading the gallery and the cache can take a moment, so do it off the caller's thread
+        if self.matcher is None:
+            # numpy comes with the matcher; importing it here keeps it off the start-up path
+            from src.services.matcher import get_matcher
+            self.matcher = get_matcher()
+        if self.validity is None:
+            self.validity = get_validity_cache()
+        if self.writer is None:
+            self.writer = get_write_service()
+        while self.running.is_set():
+            try:
+                event = self.scans.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            result = self.process(event)
+            if self.on_result:
+                self.on_result(result)
+
+    def _timed(self, stage, started):
+        now = time.monotonic()
+        self.stats[stage].record((now - started) * 1000)
+        return now
+
+    def _result(self, event, status, member_id=None, member_name=None, score=None):
+        latency_ms = (time.monotonic() - event.scanned_at) * 1000
+        self.stats["total"].record(latency_ms)
+        return ScanResult(status, member_id, member_name, score, latency_ms)
+
+    def process(self, event: ScanEvent) -> ScanResult:
+        """Run one scan through identify, validate and write"""
+        started = self._timed("queue", event.scanned_at)
+
+        # Raw sensor templates can't be compared as vectors, so a real sensor confirms the candidates
+        verify = self.reader.compare if self.reader.compares_templates else None
+        match = self.matcher.identify(event.template, verify)
+        started = self._timed("identify", started)
+        if match is None:
+            return self._result(event, UNKNOWN)
+
+        last = self.last_accepted.get(match.member_id)
+        if last is not None and started - last < self.debounce_seconds:
+            return self._result(event, DUPLICATE, match.member_id, score=match.score)
+
+        entry = self.validity.get(match.member_id)
+        member_name = entry.full_name if entry else None
+        valid = entry is not None and entry.is_valid()
+        started = self._timed("validate", started)
+
+        # A membership that ran out during a visit still lets the member check out
+        try:
+            write = self.writer.record_scan(
+                match.member_id, fingerprint_verified=True, may_check_in=valid
+            ).result(WRITER_RESULT_TIMEOUT)
+            self._timed("write", started)
+        except Exception:
+            return self._result(event, ERROR, match.member_id, score=match.score)
+        if write.record_id is None:
+            return self._result(event, EXPIRED, match.member_id, member_name, match.score)
+
+        self.last_accepted[match.member_id] = time.monotonic()
+        return self._result(event, CHECKED_IN if write.checked_in else CHECKED_OUT, match.member_id, member_name,
+                            match.score)
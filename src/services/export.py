@@ -0,0 +1,204 @@
+import csv
+import enum
+import os
+from datetime import date, datetime
+from sqlalchemy import select, func
+from src.models.database import ReadSessionLocal
+from src.models.member import Member
+from src.models.attendance import AttendanceRecord
+from src.models.subscription import Subscription
+from src.services.report_engine import REPORTS
+from src.utils.config import EXPORT_CHUNK_SIZE, PDF_FONT_PATH
+
+FORMATS = {"csv": "CSV (*.csv)", "xlsx": "Excel (*.xlsx)", "pdf": "PDF (*.pdf)"}
+
+class ExportCancelled(Exception):
+    pass
+
+def build_export(name, start_date: date, end_date: date, bucket="day"):
+    """Return (title, headers, statement) for an exportable report"""
+    end = datetime.combine(end_date, datetime.max.time())
+    if name == "attendance":
+        return "سجل الحضور", ["الدخول", "العضو", "الخروج", "ملاحظات"], select(
+            AttendanceRecord.check_in, Member.full_name, AttendanceRecord.check_out, AttendanceRecord.notes
+        ).join(Member).where(
+            AttendanceRecord.check_in >= start_date, AttendanceRecord.check_in <= end
+        ).order_by(AttendanceRecord.check_in, AttendanceRecord.id)
+    if name == "subscriptions":
+        return "الاشتراكات", ["تاريخ البدء", "العضو", "النوع", "المبلغ", "حالة الدفع", "ملاحظات"], select(
+            Subscription.start_date, Member.full_name, Subscription.type, Subscription.amount,
+            Subscription.payment_status, Subscription.notes
+        ).join(Member).where(
+            Subscription.start_date >= start_date, Subscription.start_date <= end
+        ).order_by(Subscription.start_date, Subscription.id)
+    if name == "attendance_summary":
+        return "ملخص الحضور", ["الفترة", "عدد الزيارات", "الإجمالي التراكمي"], \
+            REPORTS["attendance"].statement(start_date, end_date, bucket)
+    if name == "revenue":
+        return "الإيرادات", ["الفترة", "عدد الاشتراكات", "الإيرادات", "الإجمالي التراكمي"], \
+            REPORTS["revenue"].statement(start_date, end_date, bucket)
+    raise ValueError(f"تقرير غير معروف: {name}")
+
+def format_cell(value) -> str:
+    """Text for a cell in CSV and PDF output"""
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M")
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float):
+        return f"{value:.2f}"
+    return str(value)
+
+class CsvExportWriter:
+    def __init__(self, path, title, headers):
+        # utf-8-sig so Excel detects the encoding of Arabic text
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(headers)
+
+    def write_rows(self, rows):
+        self.writer.writerows([format_cell(value) for value in row] for row in rows)
+
+    def close(self):
+        self.file.close()
+
+class XlsxExportWriter:
+    def __init__(self, path, title, headers):
+        from openpyxl import Workbook
+
+        self.path = path
+        # write_only workbooks stream rows to a temporary file instead of keeping cells in memory
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title[:31])
+        self.sheet.sheet_view.rightToLeft = True
+        self.sheet.append(headers)
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append([value.value if isinstance(value, enum.Enum) else value for value in row])
+
+    def close(self):
+        self.workbook.save(self.path)
+
+class PdfExportWriter:
+    """Lays rows out page by page as they arrive instead of building every flowable first"""
+
+    ROWS_PER_TABLE = 30
+
+    def __init__(self, path, title, headers):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, Paragraph, Table, TableStyle
+
+        self.font = register_pdf_font()
+        self.Table = Table
+        self.headers = [shape_text(header) for header in headers]
+        self.style = TableStyle([
+            ("FONTNAME", (0, 0), (-1, -1), self.font),
+            ("FONTSIZE", (0, 0), (-1, -1), 9),
+            ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#1a237e")),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("ALIGN", (0, 0), (-1, -1), "RIGHT"),
+        ])
+        title_style = getSampleStyleSheet()["Title"]
+        title_style.fontName = self.font
+
+        self.document = BaseDocTemplate(path, pagesize=landscape(A4), title=title)
+        frame = Frame(
+            self.document.leftMargin, self.document.bottomMargin, self.document.width, self.document.height
+        )
+        self.document.addPageTemplates([PageTemplate(frames=[frame], onPage=self.draw_page_number)])
+        self.document._startBuild()
+        self.document.canv._doctemplate = self.document
+        self.handle([Paragraph(shape_text(title), title_style)])
+
+    def draw_page_number(self, canvas, document):
+        canvas.setFont(self.font, 8)
+        canvas.drawCentredString(document.pagesize[0] / 2, document.bottomMargin / 2, str(document.page))
+
+    def handle(self, flowables):
+        # The loop BaseDocTemplate.build() runs, fed one chunk at a time
+        while flowables:
+            self.document.clean_hanging()
+            self.document.handle_flowable(flowables)
+
+    def write_rows(self, rows):
+        cells = [[shape_text(format_cell(value)) for value in row] for row in rows]
+        for start in range(0, len(cells), self.ROWS_PER_TABLE):
+            table = self.Table([self.headers] + cells[start:start + self.ROWS_PER_TABLE], repeatRows=1)
+            table.setStyle(self.style)
+            self.handle([table])
+
+    def close(self):
+        self.document._endBuild()
+
+WRITERS = {"csv": CsvExportWriter, "xlsx": XlsxExportWriter, "pdf": PdfExportWriter}
+
+def register_pdf_font() -> str:
+    """Register the configured TTF font (needed for Arabic glyphs); falls back to Helvetica"""
+    if not PDF_FONT_PATH:
+        return "Helvetica"
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+
+    if "ExportFont" not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont("ExportFont", PDF_FONT_PATH))
+    return "ExportFont"
+
+def shape_text(text: str) -> str:
+    """Join Arabic letters and order the text for display when arabic_reshaper and python-bidi are installed"""
+    try:
+        import arabic_reshaper
+        from bidi.algorithm import get_display
+    except ImportError:
+        return text
+    return get_display(arabic_reshaper.reshape(text))
+
+def run_export(name, start_date, end_date, bucket, path, progress=None, cancel=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write a report to path chunk by chunk; returns the number of rows written.
+
+    Runs in a worker process. (rows written, total rows) tuples are put on
+    progress after every chunk, and the export stops with ExportCancelled
+    (removing the partial file) once cancel is set.
+    """
+    title, headers, statement = build_export(name, start_date, end_date, bucket)
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension not in WRITERS:
+        raise ValueError(f"صيغة التصدير غير مدعومة: {extension}")
+
+    db = ReadSessionLocal()
+    writer = None
+    try:
+        total = db.execute(select(func.count()).select_from(statement.subquery())).scalar()
+        result = db.execute(statement.execution_options(yield_per=chunk_size))
+        writer = WRITERS[extension](path, title, headers)
+        written = 0
+        if progress is not None:
+            progress.put((written, total))
+        for rows in result.partitions():
+            if cancel is not None and cancel.is_set():
+                raise ExportCancelled()
+            writer.write_rows(rows)
+            written += len(rows)
+            if progress is not None:
+                progress.put((written, total))
+        writer.close()
+        writer = None
+        return written
+    except BaseException:
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        db.close()
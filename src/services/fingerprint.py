@@ -0,0 +1,105 @@
+import random
+import threading
+import time
+from collections import deque
+from src.utils.config import FINGERPRINT_PORT, FINGERPRINT_BAUDRATE, FINGERPRINT_SIMULATED, FINGERPRINT_SENSOR_MIN_SCORE
+
+# Size of a characteristics buffer downloaded from R30x-family sensors
+TEMPLATE_SIZE = 512
+
+class FingerprintReader:
+    """Interface for fingerprint devices"""
+
+    def read_template(self, timeout=None):
+        """Wait for a finger and return its template bytes, or None on timeout"""
+        raise NotImplementedError
+
+    # Whether compare() is available, i.e. the device can match two templates itself
+    compares_templates = False
+
+    def compare(self, probe, candidate):
+        """Whether the device judges two templates to be the same finger"""
+        raise NotImplementedError
+
+    def close(self):
+        """Release the device"""
+
+class PyFingerprintReader(FingerprintReader):
+    """Serial fingerprint sensor driven through pyfingerprint"""
+
+    compares_templates = True
+
+    def __init__(self, port=FINGERPRINT_PORT, baudrate=FINGERPRINT_BAUDRATE, poll_interval=0.05,
+                 min_score=FINGERPRINT_SENSOR_MIN_SCORE):
+        from pyfingerprint.pyfingerprint import PyFingerprint
+
+        self.sensor = PyFingerprint(port, baudrate, 0xFFFFFFFF, 0x00000000)
+        if not self.sensor.verifyPassword():
+            raise ValueError("كلمة مرور جهاز البصمة غير صحيحة")
+        self.poll_interval = poll_interval
+        self.min_score = min_score
+        # The reader thread and the matcher's verification share one serial port and its buffers
+        self._lock = threading.Lock()
+
+    def read_template(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                if self.sensor.readImage():
+                    self.sensor.convertImage(0x01)
+                    return bytes(self.sensor.downloadCharacteristics(0x01))
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            time.sleep(self.poll_interval)
+
+    def compare(self, probe, candidate):
+        """Match two characteristics files on the sensor, which knows their minutiae format"""
+        with self._lock:
+            self.sensor.uploadCharacteristics(0x01, list(probe))
+            self.sensor.uploadCharacteristics(0x02, list(candidate))
+            return self.sensor.compareCharacteristics() >= self.min_score
+
+class SimulatedFingerprintReader(FingerprintReader):
+    """In-memory reader for development and tests without hardware.
+
+    Enrolled fingers are registered with add_finger(); present() queues a
+    scan of one of them, which read_template() returns with sensor noise.
+    """
+
+    def __init__(self, noise=6, seed=None):
+        self.noise = noise
+        self.random = random.Random(seed)
+        self.fingers = {}
+        self.scans = deque()
+        self.scan_ready = threading.Condition()
+
+    @staticmethod
+    def random_template(rng=random):
+        """Generate a random template, e.g. for enrolling a simulated member"""
+        return bytes(rng.randrange(256) for _ in range(TEMPLATE_SIZE))
+
+    def add_finger(self, key, template):
+        self.fingers[key] = template
+
+    def present(self, key):
+        """Simulate a member placing an enrolled finger on the sensor"""
+        with self.scan_ready:
+            self.scans.append(self.fingers[key])
+            self.scan_ready.notify()
+
+    def read_template(self, timeout=None):
+        with self.scan_ready:
+            if not self.scans and not self.scan_ready.wait_for(lambda: self.scans, timeout):
+                return None
+            template = self.scans.popleft()
+
+        return bytes(
+            min(255, max(0, value + self.random.randint(-self.noise, self.noise)))
+            for value in template
+        )
+
+def open_reader() -> FingerprintReader:
+    """Open the configured fingerprint device"""
+    if FINGERPRINT_SIMULATED:
+        return SimulatedFingerprintReader()
+    return PyFingerprintReader()
@@ -0,0 +1,379 @@
+import argparse
+import asyncio
+import hmac
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+from src.models.database import ReadSessionLocal
+from src.models.member import Member
+from src.models.changes import get_change_seqs
+from src.models.migrations import migrate
+from src.models.search import search_members
+from src.services import checkin_pipeline
+from src.services.cards import CardVerifier, VALID
+from src.services.validity_cache import get_validity_cache
+from src.services.writer import get_write_service, stop_write_service
+from src.utils.config import (KIOSK_HOST, KIOSK_PORT, KIOSK_API_TOKEN, KIOSK_IDLE_TIMEOUT,
+                              KIOSK_CHANGE_POLL_SECONDS, CHECKIN_DEBOUNCE_SECONDS, SQLITE_READER_POOL_SIZE,
+                              WRITER_RESULT_TIMEOUT)
+
+# Headless on purpose: nothing here may import PyQt6, so the server runs on
+# a turnstile controller or next to the desktop app as a separate process.
+
+logger = logging.getLogger("gym.kiosk")
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_HEADERS = 64
+SEARCH_LIMIT = 20
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, error: str):
+        super().__init__(error)
+        self.status = status
+        self.error = error
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def _member_id(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "invalid_member_id")
+
+def _fetch_members(db, member_ids) -> list:
+    """Member rows for the ids, in the order given"""
+    rows = {row.id: row for row in db.query(
+        Member.id, Member.full_name, Member.phone, Member.membership_type,
+        Member.start_date, Member.end_date, Member.is_active, Member.frozen_until
+    ).filter(Member.id.in_(member_ids))}
+    return [rows[member_id] for member_id in member_ids if member_id in rows]
+
+def _search(db, text) -> list:
+    member_ids = search_members(db, text, limit=SEARCH_LIMIT)
+    if member_ids is None:
+        member_ids = [row.id for row in db.query(Member.id).filter(
+            Member.full_name.ilike(f"%{text}%")).limit(SEARCH_LIMIT)]
+    return _fetch_members(db, member_ids)
+
+def _member_json(row, valid) -> dict:
+    return {
+        "id": row.id,
+        "full_name": row.full_name,
+        "phone": row.phone,
+        "membership_type": row.membership_type.value,
+        "start_date": row.start_date,
+        "end_date": row.end_date,
+        "frozen_until": row.frozen_until,
+        "valid": valid,
+    }
+
+class KioskServer:
+    """HTTP/JSON API for check-in terminals on asyncio.start_server.
+
+    Validity checks are answered from the in-memory validity cache on the
+    event loop. Lookups run on a thread pool the size of the reader engine's
+    pool, and check-ins go to the write service, whose futures the loop
+    awaits, so the loop itself never waits for SQLite. Connections are kept
+    alive between requests. Writes made by other processes (the desktop app)
+    are picked up by polling the change counters every poll_seconds.
+
+    Endpoints:
+        GET  /health
+        GET  /validity/<member_id>
+        GET  /members/<member_id>
+        GET  /members?q=<text>
+        POST /checkin   {"member_id": <id>} or {"card": <QR card text>}
+    """
+
+    def __init__(self, host=KIOSK_HOST, port=KIOSK_PORT, token=KIOSK_API_TOKEN,
+                 poll_seconds=KIOSK_CHANGE_POLL_SECONDS, debounce_seconds=CHECKIN_DEBOUNCE_SECONDS):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.poll_seconds = poll_seconds
+        self.debounce_seconds = debounce_seconds
+        self.executor = ThreadPoolExecutor(SQLITE_READER_POOL_SIZE, thread_name_prefix="kiosk-db")
+        self.last_accepted = {}  # member_id -> monotonic time of the last accepted scan
+        self.validity = None
+        self.cards = None
+        self.writer = None
+        self.server = None
+        self._poller = None
+        self._seqs = None
+
+    async def start(self):
+        # Loading the cache reads the whole members table, so keep it off the loop
+        loop = asyncio.get_running_loop()
+        self.validity = await loop.run_in_executor(self.executor, get_validity_cache)
+        self.writer = get_write_service()
+        self.cards = CardVerifier(self.validity)
+        self._seqs = await self.run_db(get_change_seqs)
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        if self.poll_seconds > 0:
+            self._poller = asyncio.create_task(self._poll_changes())
+        logger.info("kiosk server listening on %s:%s", self.host, self.port)
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        stop_write_service()
+        self.executor.shutdown(wait=False)
+
+    async def run_db(self, query):
+        """Run query(db) with a reader session on the thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self._read, query)
+
+    @staticmethod
+    def _read(query):
+        db = ReadSessionLocal()
+        try:
+            return query(db)
+        finally:
+            db.close()
+
+    async def _poll_changes(self):
+        while True:
+            await asyncio.sleep(self.poll_seconds)
+            try:
+                seqs = await self.run_db(get_change_seqs)
+                changed = any(seqs.get(table) != self._seqs.get(table) for table in ("members", "subscriptions"))
+                self._seqs = seqs
+                if changed:
+                    await self.run_db(self.validity.reconcile)
+            except Exception:
+                logger.exception("validity refresh failed")
+
+    # HTTP
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), KIOSK_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                started = time.perf_counter()
+                keep_alive, body = True, None
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    headers = await self._read_headers(reader)
+                    keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                    body = await self._read_body(reader, headers)
+                    self._authorize(headers)
+                    status, payload = await self.dispatch(method, target, body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.error}
+                    # The rest of the request is still unread
+                    keep_alive = keep_alive and body is not None
+                except ValueError:
+                    status, payload, keep_alive = HTTPStatus.BAD_REQUEST, {"error": "bad_request"}, False
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception:
+                    logger.exception("request failed: %r", request_line)
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal_error"}
+
+                self._write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                logger.debug("%s %d %.1f ms", request_line.strip(), status, (time.perf_counter() - started) * 1000)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_headers(reader) -> dict:
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            if len(headers) >= MAX_HEADERS:
+                raise HttpError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "too_many_headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    @staticmethod
+    async def _read_body(reader, headers) -> bytes:
+        length = int(headers.get("content-length", "0"))
+        if length > MAX_BODY_BYTES:
+            raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "body_too_large")
+        return await reader.readexactly(length) if length else b""
+
+    def _authorize(self, headers):
+        if not self.token:
+            return
+        scheme, _, credentials = headers.get("authorization", "").partition(" ")
+        if scheme.lower() != "bearer" or not hmac.compare_digest(credentials.encode(), self.token.encode()):
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "unauthorized")
+
+    @staticmethod
+    def _write_response(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+        )
+
+    async def dispatch(self, method, target, body):
+        """Route a request; returns (status, payload)"""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+
+        if parts == ["health"] and method == "GET":
+            return HTTPStatus.OK, {"status": "ok", "members": len(self.validity)}
+        if len(parts) == 2 and parts[0] == "validity" and method == "GET":
+            return await self.validity_check(_member_id(parts[1]))
+        if parts == ["members"] and method == "GET":
+            text = parse_qs(url.query).get("q", [""])[0].strip()
+            if not text:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "missing_query")
+            return await self.search(text)
+        if len(parts) == 2 and parts[0] == "members" and method == "GET":
+            return await self.member(_member_id(parts[1]))
+        if parts == ["checkin"] and method == "POST":
+            try:
+                request = json.loads(body or b"{}")
+            except ValueError:
+                raise HttpError(HTTPStatus.BAD_REQUEST, "invalid_json")
+            if not isinstance(request, dict):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "invalid_json")
+            if isinstance(request.get("card"), str):
+                return await self.check_in_card(request["card"])
+            return await self.check_in(_member_id(request.get("member_id")))
+        if parts and parts[0] in ("health", "validity", "members", "checkin"):
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "method_not_allowed")
+        raise HttpError(HTTPStatus.NOT_FOUND, "not_found")
+
+    async def _validity(self, member_id):
+        entry = self.validity.peek(member_id)
+        if entry is None:
+            # Unknown to the cache: read through on the pool rather than the loop
+            entry = await asyncio.get_running_loop().run_in_executor(self.executor, self.validity.get, member_id)
+        return entry
+
+    # Endpoints
+
+    async def validity_check(self, member_id):
+        entry = await self._validity(member_id)
+        if entry is None:
+            raise HttpError(HTTPStatus.NOT_FOUND, "member_not_found")
+        return HTTPStatus.OK, {
+            "member_id": member_id,
+            "full_name": entry.full_name,
+            "valid": entry.is_valid(),
+            "end_date": entry.end_date,
+            "frozen_until": entry.frozen_until,
+        }
+
+    async def member(self, member_id):
+        rows = await self.run_db(lambda db: _fetch_members(db, [member_id]))
+        if not rows:
+            raise HttpError(HTTPStatus.NOT_FOUND, "member_not_found")
+        entry = await self._validity(member_id)
+        return HTTPStatus.OK, _member_json(rows[0], entry is not None and entry.is_valid())
+
+    async def search(self, text):
+        rows = await self.run_db(lambda db: _search(db, text))
+        members = []
+        for row in rows:
+            entry = self.validity.peek(row.id)
+            members.append(_member_json(row, entry is not None and entry.is_valid()))
+        return HTTPStatus.OK, {"members": members}
+
+    async def check_in(self, member_id):
+        """Same rules as CheckInPipeline.process after identification"""
+        entry = await self._validity(member_id)
+        if entry is None:
+            return HTTPStatus.OK, {"status": checkin_pipeline.UNKNOWN, "member_id": member_id}
+        result = {"member_id": member_id, "member_name": entry.full_name}
+
+        last = self.last_accepted.get(member_id)
+        if last is not None and time.monotonic() - last < self.debounce_seconds:
+            return HTTPStatus.OK, {"status": checkin_pipeline.DUPLICATE, **result}
+        return await self._record(member_id, result, may_check_in=entry.is_valid())
+
+    async def check_in_card(self, token):
+        """Verify a scanned QR card offline, then record it like a member id"""
+        check = self.cards.verify(token)
+        result = {"member_id": check.member_id, "member_name": check.member_name}
+        # A genuine card of an expired membership can still close an open visit
+        if check.status not in (VALID, checkin_pipeline.EXPIRED):
+            return HTTPStatus.OK, {"status": check.status, **result}
+
+        last = self.last_accepted.get(check.member_id)
+        if last is not None and time.monotonic() - last < self.debounce_seconds:
+            return HTTPStatus.OK, {"status": checkin_pipeline.DUPLICATE, **result}
+        return await self._record(check.member_id, result, may_check_in=check.status == VALID)
+
+    async def _record(self, member_id, result, may_check_in=True):
+        """Write the scan; an invalid membership may only close an open visit"""
+        # Accepted before the first await, so a second scan of the same card
+        # arriving while this write is queued is debounced rather than
+        # checking the member straight back out
+        previous = self.last_accepted.get(member_id)
+        accepted = self.last_accepted[member_id] = time.monotonic()
+        try:
+            future = self.writer.record_scan(member_id, may_check_in=may_check_in)
+            write = await asyncio.wait_for(asyncio.wrap_future(future), WRITER_RESULT_TIMEOUT)
+        except Exception:
+            logger.exception("check-in write failed for member %s", member_id)
+            self._release(member_id, accepted, previous)
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"status": checkin_pipeline.ERROR, **result}
+        if write.record_id is None:
+            self._release(member_id, accepted, previous)
+            return HTTPStatus.OK, {"status": checkin_pipeline.EXPIRED, **result}
+        status = checkin_pipeline.CHECKED_IN if write.checked_in else checkin_pipeline.CHECKED_OUT
+        return HTTPStatus.OK, {"status": status, "record_id": write.record_id, **result}
+
+    def _release(self, member_id, accepted, previous):
+        """Undo _record's acceptance of a scan that wrote nothing"""
+        if self.last_accepted.get(member_id) == accepted:
+            if previous is None:
+                del self.last_accepted[member_id]
+            else:
+                self.last_accepted[member_id] = previous
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.services.kiosk_server", description="خادم أجهزة الدخول")
+    parser.add_argument("--host", default=KIOSK_HOST)
+    parser.add_argument("--port", type=int, default=KIOSK_PORT)
+    parser.add_argument("--debounce", type=float, default=CHECKIN_DEBOUNCE_SECONDS, help="ثوانٍ بين مسحتين لنفس العضو")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    migrate()
+    server = KioskServer(args.host, args.port, debounce_seconds=args.debounce)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
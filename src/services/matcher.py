@@ -0,0 +1,221 @@
+import threading
+from collections import namedtuple
+import numpy as np
+from src.models.database import ReadSessionLocal
+from src.models.events import on_commit
+from src.models.member import Member
+from src.models.biometric import MemberBiometric
+from src.services.fingerprint import TEMPLATE_SIZE
+from src.utils.config import FINGERPRINT_MATCH_THRESHOLD, FINGERPRINT_EARLY_EXIT_THRESHOLD, FINGERPRINT_VERIFY_CANDIDATES
+
+MatchResult = namedtuple("MatchResult", ["member_id", "score"])
+
+class FingerprintMatcher:
+    """1:N identification against every enrolled template held in memory.
+
+    Templates are kept as rows of one contiguous float32 matrix, mean-centred
+    and L2-normalised, so scoring a probe against the gallery is a matrix-vector
+    product. Scoring runs in batches and stops as soon as a batch contains a
+    score above early_exit_threshold.
+
+    The vector score only means something for templates whose bytes vary
+    smoothly with the finger, such as SimulatedFingerprintReader's. Real
+    R30x characteristics files are minutiae records, so with a sensor the
+    score is just a pre-filter: identify() is given the reader's compare()
+    and returns the first of the verify_candidates best rows that the
+    sensor itself accepts.
+    """
+
+    def __init__(self, template_size=TEMPLATE_SIZE, match_threshold=FINGERPRINT_MATCH_THRESHOLD,
+                 early_exit_threshold=FINGERPRINT_EARLY_EXIT_THRESHOLD, batch_size=4096,
+                 verify_candidates=FINGERPRINT_VERIFY_CANDIDATES):
+        self.template_size = template_size
+        self.match_threshold = match_threshold
+        self.early_exit_threshold = early_exit_threshold
+        self.batch_size = batch_size
+        self.verify_candidates = verify_candidates
+        self._lock = threading.Lock()
+        self._gallery = np.empty((0, template_size), dtype=np.float32)
+        self._member_ids = np.empty(0, dtype=np.int64)
+        self._templates = {}  # member_id -> raw template, for the sensor to verify
+        self._rows = {}  # member_id -> row in the gallery
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def to_vector(self, template: bytes) -> np.ndarray:
+        """Convert raw template bytes into a normalised feature vector"""
+        if len(template) != self.template_size:
+            raise ValueError(f"حجم قالب البصمة غير صحيح: {len(template)}")
+        vector = np.frombuffer(template, dtype=np.uint8).astype(np.float32)
+        vector -= vector.mean()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def load(self, db):
+        """Replace the gallery with every active member's enrolled template"""
+        self.load_templates(self.fetch_templates(db))
+
+    @staticmethod
+    def fetch_templates(db, member_ids=None):
+        """Query (member_id, raw template) pairs for active members"""
+        query = db.query(MemberBiometric.member_id, MemberBiometric.template, MemberBiometric.version).join(
+            Member
+        ).filter(Member.is_active == True)
+        if member_ids is not None:
+            query = query.filter(MemberBiometric.member_id.in_(member_ids))
+
+        # One template per member; the first enrolled finger wins
+        templates = {}
+        for member_id, stored, version in query.order_by(MemberBiometric.finger):
+            if member_id not in templates:
+                try:
+                    templates[member_id] = MemberBiometric.decode(stored, version)
+                except ValueError:
+                    continue
+        return list(templates.items())
+
+    def load_templates(self, templates):
+        """Replace the gallery with (member_id, template) pairs"""
+        member_ids, vectors, raw = [], [], {}
+        for member_id, template in templates:
+            try:
+                vectors.append(self.to_vector(template))
+            except ValueError:
+                continue
+            member_ids.append(member_id)
+            raw[member_id] = template
+
+        gallery = np.vstack(vectors) if vectors else np.empty((0, self.template_size), dtype=np.float32)
+        with self._lock:
+            self._gallery = np.ascontiguousarray(gallery, dtype=np.float32)
+            self._member_ids = np.array(member_ids, dtype=np.int64)
+            self._rows = {member_id: row for row, member_id in enumerate(member_ids)}
+            self._templates = raw
+            self._count = len(member_ids)
+
+    def enroll(self, member_id: int, template: bytes):
+        """Add or replace a member's template"""
+        vector = self.to_vector(template)
+        with self._lock:
+            row = self._rows.get(member_id)
+            if row is None:
+                if self._count == len(self._gallery):
+                    self._grow()
+                row = self._count
+                self._count += 1
+                self._rows[member_id] = row
+                self._member_ids[row] = member_id
+            self._gallery[row] = vector
+            self._templates[member_id] = template
+
+    def remove(self, member_id: int):
+        """Drop a member's template, e.g. when the member is deactivated"""
+        with self._lock:
+            row = self._rows.pop(member_id, None)
+            if row is None:
+                return
+            del self._templates[member_id]
+            # Move the last row into the gap to keep the gallery dense
+            last = self._count - 1
+            if row != last:
+                moved_id = int(self._member_ids[last])
+                self._gallery[row] = self._gallery[last]
+                self._member_ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._count = last
+
+    def identify(self, template: bytes, verify=None):
+        """Return the best MatchResult for a probe template, or None.
+
+        With verify(probe, candidate), a reader's compare(), the sensor
+        decides among the best candidates instead of match_threshold.
+        """
+        if verify is not None:
+            for member_id, score, candidate in self.candidates(template):
+                if verify(template, candidate):
+                    return MatchResult(member_id, score)
+            return None
+
+        probe = self.to_vector(template)
+        best_score, best_row = -1.0, -1
+
+        with self._lock:
+            for start in range(0, self._count, self.batch_size):
+                end = min(start + self.batch_size, self._count)
+                scores = self._gallery[start:end] @ probe
+                row = int(np.argmax(scores))
+                if scores[row] > best_score:
+                    best_score, best_row = float(scores[row]), start + row
+                if best_score >= self.early_exit_threshold:
+                    break
+
+            if best_row < 0 or best_score < self.match_threshold:
+                return None
+            return MatchResult(int(self._member_ids[best_row]), best_score)
+
+    def candidates(self, template: bytes):
+        """(member_id, score, raw template) of the verify_candidates best rows, best first"""
+        probe = self.to_vector(template)
+        with self._lock:
+            scores = self._gallery[:self._count] @ probe
+            count = min(self.verify_candidates, self._count)
+            rows = np.argpartition(-scores, count - 1)[:count] if count else []
+            rows = sorted(rows, key=lambda row: -scores[row])
+            return [
+                (int(self._member_ids[row]), float(scores[row]), self._templates[int(self._member_ids[row])])
+                for row in rows
+            ]
+
+    def _grow(self):
+        capacity = max(64, len(self._gallery) * 2)
+        gallery = np.empty((capacity, self.template_size), dtype=np.float32)
+        gallery[:self._count] = self._gallery[:self._count]
+        member_ids = np.empty(capacity, dtype=np.int64)
+        member_ids[:self._count] = self._member_ids[:self._count]
+        self._gallery, self._member_ids = gallery, member_ids
+
+    def refresh_members(self, member_ids):
+        """Reload the templates of specific members after they were written"""
+        member_ids = set(member_ids)
+        if not member_ids:
+            return
+        db = ReadSessionLocal()
+        try:
+            templates = dict(self.fetch_templates(db, member_ids))
+        finally:
+            db.close()
+
+        for member_id in member_ids:
+            template = templates.get(member_id)
+            try:
+                if template is None:
+                    raise ValueError
+                self.enroll(member_id, template)
+            except ValueError:
+                self.remove(member_id)
+
+    def apply_changes(self, changed, deleted):
+        """Commit hook: changed and deleted hold the affected member ids"""
+        self.refresh_members(changed + deleted)
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+def get_matcher() -> FingerprintMatcher:
+    """Return the shared matcher, loading the gallery on first use"""
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            matcher = FingerprintMatcher()
+            # Subscribe before loading so no commit falls between the two
+            on_commit(Member, matcher.apply_changes)
+            on_commit(MemberBiometric, matcher.apply_changes, lambda biometric: biometric.member_id)
+            db = ReadSessionLocal()
+            try:
+                matcher.load(db)
+            finally:
+                db.close()
+            _matcher = matcher
+        return _matcher
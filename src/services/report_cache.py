@@ -0,0 +1,146 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from src.models.changes import get_day_version
+from src.services.report_engine import REPORTS, run_report
+from src.utils.config import REPORT_CACHE_MAX_BYTES, REPORT_CACHE_DIR, REPORT_CACHE_DISK_MAX_BYTES
+
+class ReportCache:
+    """LRU cache of report results bounded by their pickled size.
+
+    Keys include the day version of the range a report covers (see
+    get_day_version), so a write invalidates exactly the cached results whose
+    range contains the written day; the stale entries are never hit again
+    and age out. Entries evicted from memory are kept in disk_dir, when set,
+    until the disk tier grows past disk_max_bytes.
+    """
+
+    def __init__(self, max_bytes=REPORT_CACHE_MAX_BYTES, disk_dir=REPORT_CACHE_DIR,
+                 disk_max_bytes=REPORT_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (pickled size, value)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    def get(self, key):
+        """Return the cached value for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        data = self._read_disk(key)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        value = pickle.loads(data)
+        self._store(key, value, len(data))
+        return value
+
+    def put(self, key, value):
+        self._store(key, value, len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _store(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        evicted = []
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[0]
+            self._entries[key] = (size, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                old_key, (old_size, old_value) = self._entries.popitem(last=False)
+                self.size -= old_size
+                evicted.append((old_key, old_value))
+
+        # Disk writes happen outside the lock
+        for old_key, old_value in evicted:
+            self._write_disk(old_key, pickle.dumps(old_value, protocol=pickle.HIGHEST_PROTOCOL))
+
+    def _path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.pickle")
+
+    def _read_disk(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            # Refresh the mtime so the disk tier also evicts least recently used first
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def _write_disk(self, key, data):
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        temporary = f"{path}.tmp"
+        try:
+            with open(temporary, "wb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except OSError:
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        files = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".pickle"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_report_cache() -> ReportCache:
+    """Return the cache shared by report views"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ReportCache()
+        return _cache
+
+def cached_report(db, name, start_date, end_date, bucket="day"):
+    """run_report() through the shared cache"""
+    # Read the version first, so a write that races the report only makes the entry newer than its key
+    version = get_day_version(db, REPORTS[name].tables, start_date, end_date)
+    key = (name, start_date, end_date, bucket, version)
+
+    cache = get_report_cache()
+    result = cache.get(key)
+    if result is None:
+        result = run_report(db, name, start_date, end_date, bucket)
+        cache.put(key, result)
+    return result
@@ -0,0 +1,89 @@
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import select, func, DateTime
+from src.models.subscription import Subscription
+from src.models.rollups import AttendanceDaily
+
+BUCKETS = ("day", "week", "month")
+
+def bucket_expression(column, bucket: str):
+    """SQL expression for the first day of the bucket a date falls in, as YYYY-MM-DD"""
+    if bucket == "day":
+        return func.date(column)
+    if bucket == "week":
+        # Monday on or before the date
+        return func.date(column, "-6 days", "weekday 1")
+    if bucket == "month":
+        return func.strftime("%Y-%m-01", column)
+    raise ValueError(f"فترة التجميع غير معروفة: {bucket}")
+
+class ReportDefinition:
+    """A report declared as one SQL GROUP BY over a date column.
+
+    measures maps result column names to aggregate expressions. Every name
+    in running_totals also gets a <name>_total column with a cumulative sum
+    over the periods, computed by a window function. tables lists the
+    day-tracked tables whose writes change the result.
+    """
+
+    def __init__(self, title, date_column, measures, filters=(), running_totals=(), tables=()):
+        self.title = title
+        self.tables = tables
+        self.date_column = date_column
+        self.measures = measures
+        self.filters = list(filters)
+        self.running_totals = running_totals
+
+    def date_range(self, start_date: date, end_date: date):
+        """Criteria selecting start_date through end_date, both inclusive"""
+        if isinstance(self.date_column.type, DateTime):
+            return [
+                self.date_column >= datetime.combine(start_date, time.min),
+                self.date_column < datetime.combine(end_date + timedelta(days=1), time.min)
+            ]
+        return [self.date_column.between(start_date, end_date)]
+
+    def statement(self, start_date: date, end_date: date, bucket: str = "day"):
+        period = bucket_expression(self.date_column, bucket).label("period")
+        grouped = select(
+            period, *(expression.label(name) for name, expression in self.measures.items())
+        ).where(
+            *self.date_range(start_date, end_date), *self.filters
+        ).group_by(period).subquery()
+
+        totals = [
+            func.sum(grouped.c[name]).over(order_by=grouped.c.period).label(f"{name}_total")
+            for name in self.running_totals
+        ]
+        return select(grouped, *totals).order_by(grouped.c.period)
+
+REPORTS = {
+    # Reads the daily rollup, so a year is at most 366 rows
+    "attendance": ReportDefinition(
+        "ملخص الحضور",
+        AttendanceDaily.day,
+        {"visits": func.sum(AttendanceDaily.visits)},
+        running_totals=("visits",),
+        tables=("attendance_records",)
+    ),
+    "revenue": ReportDefinition(
+        "الإيرادات",
+        Subscription.start_date,
+        {"subscriptions": func.count(Subscription.id), "amount": func.sum(Subscription.amount)},
+        running_totals=("amount",),
+        tables=("subscriptions",)
+    ),
+}
+
+def run_report(db, name: str, start_date: date, end_date: date, bucket: str = "day") -> dict:
+    """Run a report and return its result columns as {column name: list of values}"""
+    result = db.execute(REPORTS[name].statement(start_date, end_date, bucket))
+    keys = list(result.keys())
+    rows = result.all()
+    columns = zip(*rows) if rows else [()] * len(keys)
+    return {key: list(values) for key, values in zip(keys, columns)}
+
+def report_frame(db, name: str, start_date: date, end_date: date, bucket: str = "day"):
+    """Run a report into a pandas DataFrame, one column per result column"""
+    import pandas as pd
+
+    return pd.DataFrame(run_report(db, name, start_date, end_date, bucket))
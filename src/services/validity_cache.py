@@ -0,0 +1,155 @@
+import threading
+from collections import namedtuple
+from datetime import datetime
+from src.models.database import ReadSessionLocal
+from src.models.events import on_commit
+from src.models.member import Member
+from src.models.subscription import Subscription
+from src.utils.config import VALIDITY_CACHE_RECONCILE_SECONDS
+
+class MemberValidity(namedtuple("MemberValidity", ["full_name", "is_active", "start_date", "end_date", "frozen_until",
+                                                   "card_version"])):
+    """The columns that decide whether a member (or one of their cards) may enter"""
+    __slots__ = ()
+
+    def is_valid(self, now: datetime = None) -> bool:
+        """Same rule as Member.is_membership_valid"""
+        now = now or datetime.utcnow()
+        frozen = self.frozen_until is not None and now < self.frozen_until
+        return self.is_active and not frozen and self.start_date <= now <= self.end_date
+
+class ValidityCache:
+    """In-process copy of every member's validity columns, keyed by member id.
+
+    The whole table is loaded once; after that, commits that write a Member
+    or a Subscription reload just the affected members. Bulk updates that
+    bypass the session are caught by reconcile(), which a background thread
+    runs every reconcile_seconds.
+    """
+
+    def __init__(self, reconcile_seconds=VALIDITY_CACHE_RECONCILE_SECONDS):
+        self.reconcile_seconds = reconcile_seconds
+        self._lock = threading.Lock()
+        self._entries = {}  # member_id -> MemberValidity
+        self._refreshed = set()  # ids reloaded while a reconcile was reading
+        self._stopped = threading.Event()
+        self._reconciler = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def fetch(db, member_ids=None) -> dict:
+        """Query MemberValidity entries, for all members or specific ids"""
+        query = db.query(
+            Member.id, Member.full_name, Member.is_active,
+            Member.start_date, Member.end_date, Member.frozen_until, Member.card_version
+        )
+        if member_ids is not None:
+            query = query.filter(Member.id.in_(member_ids))
+        return {row[0]: MemberValidity(*row[1:]) for row in query}
+
+    def load(self, db):
+        """Replace every entry with the current database state"""
+        entries = self.fetch(db)
+        with self._lock:
+            self._entries = entries
+
+    def get(self, member_id: int):
+        """Return the member's MemberValidity, reading through on a miss"""
+        entry = self._entries.get(member_id)
+        if entry is None:
+            self.refresh_members([member_id])
+            entry = self._entries.get(member_id)
+        return entry
+
+    def peek(self, member_id: int):
+        """Return the cached MemberValidity without reading through; None on a miss"""
+        return self._entries.get(member_id)
+
+    def is_valid(self, member_id: int, now: datetime = None) -> bool:
+        """Check if a member may enter; unknown members may not"""
+        entry = self.get(member_id)
+        return entry is not None and entry.is_valid(now)
+
+    def refresh_members(self, member_ids):
+        """Reload specific members after they were written"""
+        member_ids = set(member_ids)
+        if not member_ids:
+            return
+        db = ReadSessionLocal()
+        try:
+            entries = self.fetch(db, member_ids)
+        finally:
+            db.close()
+
+        with self._lock:
+            self._refreshed |= member_ids
+            for member_id in member_ids:
+                if member_id in entries:
+                    self._entries[member_id] = entries[member_id]
+                else:
+                    self._entries.pop(member_id, None)
+
+    def apply_changes(self, changed, deleted):
+        """Commit hook: changed and deleted hold the affected member ids"""
+        self.refresh_members(changed + deleted)
+
+    def reconcile(self, db) -> int:
+        """Compare the cache with the database, fix any drift and return the number of fixed entries"""
+        with self._lock:
+            self._refreshed = set()
+        entries = self.fetch(db)
+        with self._lock:
+            # A commit hook that ran meanwhile has newer data than our read
+            for member_id in self._refreshed:
+                entries.pop(member_id, None)
+                if member_id in self._entries:
+                    entries[member_id] = self._entries[member_id]
+            stale = {
+                member_id for member_id in entries.keys() | self._entries.keys()
+                if entries.get(member_id) != self._entries.get(member_id)
+            }
+            self._entries = entries
+        return len(stale)
+
+    def start_reconciler(self):
+        """Run reconcile() every reconcile_seconds on a daemon thread"""
+        if self._reconciler is not None or self.reconcile_seconds <= 0:
+            return
+        self._reconciler = threading.Thread(target=self._reconcile_loop, name="validity-reconciler", daemon=True)
+        self._reconciler.start()
+
+    def stop_reconciler(self):
+        self._stopped.set()
+
+    def _reconcile_loop(self):
+        while not self._stopped.wait(self.reconcile_seconds):
+            db = ReadSessionLocal()
+            try:
+                self.reconcile(db)
+            except Exception:
+                continue
+            finally:
+                db.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_validity_cache() -> ValidityCache:
+    """Return the shared cache, warming it on first use"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            cache = ValidityCache()
+            # Subscribe before loading so no commit falls between the two
+            on_commit(Member, cache.apply_changes)
+            on_commit(Subscription, cache.apply_changes, lambda subscription: subscription.member_id)
+            db = ReadSessionLocal()
+            try:
+                cache.load(db)
+            finally:
+                db.close()
+            cache.start_reconciler()
+            _cache = cache
+        return _cache
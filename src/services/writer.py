@@ -0,0 +1,262 @@
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, insert, bindparam
+from src.models.database import SessionLocal
+from src.models.attendance import AttendanceRecord
+from src.models.member import Member, MembershipType
+from src.models.subscription import Subscription
+from src.utils.sql_monitor import sql_action
+from src.utils import tracing
+from src.utils.config import WRITER_GROUP_COMMIT_MS, WRITER_MAX_BATCH
+
+ScanWrite = namedtuple("ScanWrite", ["record_id", "checked_in"])
+
+_Command = namedtuple("_Command", ["name", "handler", "args", "orm", "future", "span"])
+
+# Attendance commands are the bulk of the traffic, so they are written as
+# Core statements compiled once, the same rules as AttendanceRecord's
+# classmethods; the ORM unit of work would cost several times the SQLite time
+_open_visit = select(AttendanceRecord.id).where(
+    AttendanceRecord.member_id == bindparam("member_id"),
+    AttendanceRecord.check_in >= bindparam("since"),
+    AttendanceRecord.check_out == None
+).order_by(AttendanceRecord.check_in.desc()).limit(1)
+_close_visit = update(AttendanceRecord).where(AttendanceRecord.id == bindparam("record_id")).values(
+    check_out=bindparam("now")
+)
+_open_visit_insert = insert(AttendanceRecord).values(
+    member_id=bindparam("member_id"),
+    check_in=bindparam("now"),
+    fingerprint_verified=bindparam("fingerprint_verified"),
+    recorded_by=bindparam("recorded_by")
+)
+
+def _find_open_visit(connection, member_id, now):
+    since = now - timedelta(hours=AttendanceRecord.OPEN_VISIT_HOURS)
+    return connection.execute(_open_visit, {"member_id": member_id, "since": since}).scalar()
+
+def _insert_visit(connection, member_id, fingerprint_verified, recorded_by, now):
+    result = connection.execute(_open_visit_insert, {
+        "member_id": member_id, "now": now,
+        "fingerprint_verified": fingerprint_verified, "recorded_by": recorded_by,
+    })
+    return result.inserted_primary_key[0]
+
+# Command handlers: run inside the batch's transaction, each under its own
+# savepoint, and return plain values because the session is closed afterwards
+
+def _record_scan(connection, member_id, fingerprint_verified, recorded_by, now, may_check_in):
+    record_id = _find_open_visit(connection, member_id, now)
+    if record_id is not None:
+        connection.execute(_close_visit, {"record_id": record_id, "now": now})
+        return ScanWrite(record_id, False)
+    if not may_check_in:
+        return ScanWrite(None, False)
+    return ScanWrite(_insert_visit(connection, member_id, fingerprint_verified, recorded_by, now), True)
+
+def _check_in(connection, member_id, fingerprint_verified, recorded_by, now):
+    if _find_open_visit(connection, member_id, now) is not None:
+        raise ValueError("العضو مسجل دخوله بالفعل")
+    return _insert_visit(connection, member_id, fingerprint_verified, recorded_by, now)
+
+def _check_out(connection, member_id, now):
+    record_id = _find_open_visit(connection, member_id, now)
+    if record_id is not None:
+        connection.execute(_close_visit, {"record_id": record_id, "now": now})
+    return record_id
+
+# Subscriptions go through the ORM: their ledger posting and the validity
+# cache hang off its flush events
+def _add_subscription(db, member_id, type, start_date, end_date, amount, payment_status, notes, created_by):
+    subscription = Subscription(
+        member_id=member_id,
+        type=MembershipType(type),
+        start_date=start_date,
+        end_date=end_date,
+        amount=amount,
+        payment_status=payment_status,
+        notes=notes,
+        created_by=created_by
+    )
+    db.add(subscription)
+
+    # Update member dates
+    member = db.get(Member, member_id)
+    if member:
+        member.start_date = subscription.start_date
+        member.end_date = subscription.end_date
+    db.flush()
+    return subscription.id
+
+class WriteService:
+    """Owns the write connection and group-commits attendance and subscription writes.
+
+    Callers on any thread submit commands and get a Future back. The writer
+    thread takes the first waiting command, keeps collecting for up to
+    window_ms (or max_batch commands) and runs the whole batch in one
+    transaction, each command under its own savepoint so a failing command
+    only rolls back itself. Futures are resolved after the commit, so a
+    result means the row is in the database; with SQLITE_SYNCHRONOUS=NORMAL
+    in WAL mode that survives a crash of the app but not a power loss.
+    """
+
+    def __init__(self, window_ms=WRITER_GROUP_COMMIT_MS, max_batch=WRITER_MAX_BATCH, session_factory=SessionLocal):
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self.session_factory = session_factory
+        self.commands = queue.Queue()
+        self.batches = 0
+        self.committed = 0
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="write-service", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Commit the commands already submitted and stop the writer thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.commands.put(None)
+            thread.join(timeout)
+
+    def submit(self, name, handler, *args, orm=False) -> Future:
+        """Queue handler(connection, *args), or handler(session, *args) if orm, for the next batch"""
+        if self._thread is None:
+            raise RuntimeError("write service is not running")
+        future = Future()
+        self.commands.put(_Command(name, handler, args, orm, future, tracing.current_span()))
+        return future
+
+    def record_scan(self, member_id, fingerprint_verified=False, recorded_by=None, now=None,
+                    may_check_in=True) -> Future:
+        """Check the member out if a visit is open, otherwise in; resolves to a ScanWrite.
+
+        Without may_check_in only an open visit is closed; if there is none
+        the ScanWrite has no record_id.
+        """
+        return self.submit("record_scan", _record_scan, member_id, fingerprint_verified, recorded_by,
+                           now or datetime.utcnow(), may_check_in)
+
+    def check_in(self, member_id, fingerprint_verified=False, recorded_by=None, now=None) -> Future:
+        """Open a visit; resolves to the record id, or fails with ValueError if one is open"""
+        return self.submit("check_in", _check_in, member_id, fingerprint_verified, recorded_by,
+                           now or datetime.utcnow())
+
+    def check_out(self, member_id, now=None) -> Future:
+        """Close the open visit; resolves to the record id, or None if there is none"""
+        return self.submit("check_out", _check_out, member_id, now or datetime.utcnow())
+
+    def add_subscription(self, member_id, type, start_date, end_date, amount, payment_status="paid",
+                         notes=None, created_by=None) -> Future:
+        """Add a subscription and move the member's dates to it; resolves to its id"""
+        return self.submit("add_subscription", _add_subscription, member_id, type, start_date, end_date,
+                           amount, payment_status, notes, created_by, orm=True)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            command = self.commands.get()
+            if command is None:
+                break
+            batch = [command]
+            deadline = time.monotonic() + self.window_ms / 1000
+            while len(batch) < self.max_batch:
+                try:
+                    command = self.commands.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if command is None:
+                    stopping = True
+                    break
+                batch.append(command)
+            self._commit(batch)
+
+        # Commands that raced with stop() would otherwise never complete
+        while True:
+            try:
+                command = self.commands.get_nowait()
+            except queue.Empty:
+                break
+            if command is not None and command.future.set_running_or_notify_cancel():
+                command.future.set_exception(RuntimeError("write service is not running"))
+
+    def _commit(self, batch):
+        done = []
+        db = self.session_factory()
+        try:
+            with sql_action("write-batch"):
+                connection = db.connection()
+                for command in batch:
+                    if not command.future.set_running_or_notify_cancel():
+                        continue
+                    try:
+                        with tracing.attach(command.span):
+                            result = self._execute(db, connection, command)
+                    except Exception as e:
+                        command.future.set_exception(e)
+                    else:
+                        done.append((command.future, result))
+                db.commit()
+        except Exception as e:
+            # Starting the transaction (a lock timeout) or committing failed:
+            # nothing in the batch was written, so every caller gets the error
+            db.rollback()
+            for command in batch:
+                if not command.future.done():
+                    if command.future.running() or command.future.set_running_or_notify_cancel():
+                        command.future.set_exception(e)
+            return
+        finally:
+            db.close()
+
+        self.batches += 1
+        self.committed += len(done)
+        for future, result in done:
+            future.set_result(result)
+
+    @staticmethod
+    def _execute(db, connection, command):
+        """Run one command under a savepoint of the batch's transaction"""
+        if command.orm:
+            with db.begin_nested():
+                return command.handler(db, *command.args)
+        # A plain SAVEPOINT is much cheaper than begin_nested, and Core commands leave no session state behind
+        connection.exec_driver_sql("SAVEPOINT command")
+        try:
+            result = command.handler(connection, *command.args)
+        except BaseException:
+            connection.exec_driver_sql("ROLLBACK TO command")
+            raise
+        finally:
+            connection.exec_driver_sql("RELEASE command")
+        return result
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_write_service() -> WriteService:
+    """Return the shared write service, starting it on first use"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = WriteService()
+            _service.start()
+        return _service
+
+def stop_write_service():
+    """Flush and stop the shared write service if it was started"""
+    global _service
+    with _service_lock:
+        service, _service = _service, None
+    if service is not None:
+        service.stop()
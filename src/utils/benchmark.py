@@ -0,0 +1,309 @@
+import argparse
+import gc
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+
+# Benchmarks run headless against a scratch database. Nothing from src is
+# imported at module level, because the configuration (DATABASE_PATH) is
+# read on first import and main() has to point it at the scratch database
+# first.
+
+Result = namedtuple("Result", ["name", "time_ms", "min_ms", "peak_kib", "statements"])
+
+BENCHMARKS = []
+
+def benchmark(name):
+    """Register a benchmark.
+
+    The function receives the QApplication, does its setup and returns the
+    callable that is measured. Benchmarks that drive views must leave the
+    executor idle (see settle) so the time includes loading the data.
+    """
+    def register(function):
+        BENCHMARKS.append((name, function))
+        return function
+    return register
+
+def settle(app):
+    """Process events until every submitted query has been delivered"""
+    from src.utils.query_executor import get_executor
+
+    executor = get_executor()
+    while True:
+        executor.wait_for_done()
+        app.processEvents()
+        if executor.is_idle():
+            return
+
+def dispose(app, widget):
+    widget.deleteLater()
+    settle(app)
+
+@benchmark("members.load")
+def bench_members_load(app):
+    from src.views.members import MembersWidget
+
+    def run():
+        widget = MembersWidget()
+        settle(app)
+        dispose(app, widget)
+    return run
+
+@benchmark("members.search")
+def bench_members_search(app):
+    from src.views.members import MembersWidget
+
+    widget = MembersWidget()
+    settle(app)
+
+    def run():
+        widget.search_input.setText("محمد الجبوري")
+        widget.filter_members()
+        settle(app)
+    return run
+
+@benchmark("attendance.load")
+def bench_attendance_load(app):
+    from src.views.attendance import AttendanceWidget
+
+    def run():
+        widget = AttendanceWidget()
+        settle(app)
+        dispose(app, widget)
+    return run
+
+@benchmark("attendance.refresh_unchanged")
+def bench_attendance_refresh(app):
+    from src.views.attendance import AttendanceWidget
+
+    widget = AttendanceWidget()
+    settle(app)
+
+    def run():
+        widget.update_attendance()
+        settle(app)
+    return run
+
+@benchmark("subscriptions.load")
+def bench_subscriptions_load(app):
+    from src.views.subscriptions import SubscriptionsWidget
+
+    def run():
+        widget = SubscriptionsWidget()
+        settle(app)
+        dispose(app, widget)
+    return run
+
+@benchmark("dashboard.update_stats")
+def bench_dashboard(app):
+    from src.views.dashboard import DashboardWidget
+
+    def run():
+        widget = DashboardWidget()
+        settle(app)
+        dispose(app, widget)
+    return run
+
+@benchmark("dashboard.update_stats_unchanged")
+def bench_dashboard_unchanged(app):
+    from src.views.dashboard import DashboardWidget
+
+    widget = DashboardWidget()
+    settle(app)
+
+    def run():
+        widget.update_stats()
+        settle(app)
+    return run
+
+def report_benchmark(report_type, months):
+    def setup(app):
+        from PyQt6.QtCore import QDate
+        from src.services.report_cache import get_report_cache
+        from src.views.reports import ReportsWidget
+
+        widget = ReportsWidget()
+        settle(app)
+        widget.start_date.setDate(QDate.currentDate().addMonths(-months))
+
+        def run():
+            get_report_cache().clear()
+            widget.report_type.setCurrentText(report_type)
+            widget.load_report()
+            settle(app)
+        return run
+    return setup
+
+for _name, _type in (("attendance", "الحضور"), ("attendance_summary", "ملخص الحضور"),
+                     ("subscriptions", "الاشتراكات"), ("revenue", "الإيرادات")):
+    benchmark(f"reports.{_name}")(report_benchmark(_type, 12))
+
+@benchmark("ledger.balance_year")
+def bench_balance(app):
+    from src.models.database import ReadSessionLocal
+    from src.models.financial import get_balance
+
+    def run():
+        db = ReadSessionLocal()
+        try:
+            get_balance(db, date.today() - timedelta(days=365), date.today())
+        finally:
+            db.close()
+    return run
+
+@benchmark("validity_cache.load")
+def bench_validity_cache(app):
+    from src.models.database import ReadSessionLocal
+    from src.services.validity_cache import ValidityCache
+
+    def run():
+        db = ReadSessionLocal()
+        try:
+            ValidityCache().load(db)
+        finally:
+            db.close()
+    return run
+
+@benchmark("export.attendance_csv_month")
+def bench_export(app):
+    from src.services.export import run_export
+
+    def run():
+        handle, path = tempfile.mkstemp(suffix=".csv")
+        os.close(handle)
+        try:
+            run_export("attendance", date.today() - timedelta(days=30), date.today(), "day", path)
+        finally:
+            os.remove(path)
+    return run
+
+class StatementCounter:
+    """Counts the statements every engine runs, on any thread"""
+
+    def __init__(self, *engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        self._lock = threading.Lock()
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self.on_execute)
+
+    def on_execute(self, *args):
+        with self._lock:
+            self.count += 1
+
+def measure(app, name, setup, counter, repeat) -> Result:
+    run = setup(app)
+    run()  # Warm up caches and imports
+
+    times = []
+    statements = None
+    for _ in range(repeat):
+        gc.collect()
+        before = counter.count
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) * 1000)
+        if statements is None:
+            statements = counter.count - before
+
+    # A separate run, because tracing allocations slows the code down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return Result(name, statistics.median(times), min(times), peak / 1024, statements)
+
+def compare(results, baseline, threshold, min_delta_ms=2.0) -> list:
+    """Return a description of every result that regressed against its baseline"""
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.time_ms > base["time_ms"] * (1 + threshold) and result.time_ms - base["time_ms"] > min_delta_ms:
+            regressions.append(f"{result.name}: {result.time_ms:.1f} ms (baseline {base['time_ms']:.1f} ms)")
+        if result.peak_kib > base["peak_kib"] * (1 + threshold) and result.peak_kib - base["peak_kib"] > 64:
+            regressions.append(f"{result.name}: {result.peak_kib:.0f} KiB (baseline {base['peak_kib']:.0f} KiB)")
+        # Statement counts are deterministic, so any increase is a regression
+        if result.statements > base["statements"]:
+            regressions.append(f"{result.name}: {result.statements} statements (baseline {base['statements']})")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.utils.benchmark", description="قياس أداء الواجهات")
+    parser.add_argument("--db", help="قاعدة بيانات تجريبية (تُولَّد إن لم تكن موجودة)")
+    parser.add_argument("--scale", default="small", help="حجم البيانات المولّدة ومفتاح خط الأساس")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="تشغيل المقاييس التي تبدأ بهذا الاسم فقط")
+    parser.add_argument("--baseline", help="ملف خط الأساس")
+    parser.add_argument("--threshold", type=float)
+    parser.add_argument("--save-baseline", action="store_true", help="حفظ النتائج كخط أساس")
+    args = parser.parse_args(argv)
+
+    db_path = os.path.abspath(args.db or os.path.join(tempfile.gettempdir(), f"gym-bench-{args.scale}-{args.seed}.db"))
+    os.environ["DATABASE_PATH"] = db_path
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from src.utils import datagen
+    from src.utils.config import BENCHMARK_BASELINE_PATH, BENCHMARK_THRESHOLD
+
+    if not os.path.exists(db_path):
+        if args.scale not in datagen.SCALES:
+            parser.error(f"--scale must be one of {', '.join(datagen.SCALES)} to generate {db_path}")
+        print(f"توليد {db_path} ({args.scale})")
+        datagen.generate(db_path, seed=args.seed, **datagen.SCALES[args.scale])
+
+    from PyQt6.QtWidgets import QApplication
+    from src.models.database import engine, reader_engine
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    counter = StatementCounter(engine, reader_engine)
+
+    results = []
+    print(f"{'benchmark':36} {'median ms':>10} {'min ms':>9} {'peak KiB':>9} {'statements':>10}")
+    for name, setup in BENCHMARKS:
+        if args.only and not name.startswith(args.only):
+            continue
+        result = measure(app, name, setup, counter, args.repeat)
+        results.append(result)
+        print(f"{name:36} {result.time_ms:>10.1f} {result.min_ms:>9.1f} {result.peak_kib:>9.0f} {result.statements:>10}")
+
+    baseline_path = args.baseline or BENCHMARK_BASELINE_PATH
+    baselines = {}
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as file:
+            baselines = json.load(file)
+
+    if args.save_baseline:
+        baselines.setdefault(args.scale, {}).update({
+            result.name: {"time_ms": round(result.time_ms, 3), "peak_kib": round(result.peak_kib, 1),
+                          "statements": result.statements}
+            for result in results
+        })
+        os.makedirs(os.path.dirname(baseline_path) or ".", exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as file:
+            json.dump(baselines, file, indent=2, sort_keys=True)
+        print(f"تم حفظ خط الأساس في {baseline_path} ({datetime.now():%Y-%m-%d %H:%M})")
+        return 0
+
+    threshold = BENCHMARK_THRESHOLD if args.threshold is None else args.threshold
+    regressions = compare(results, baselines.get(args.scale, {}), threshold)
+    for regression in regressions:
+        print(f"تراجع في الأداء: {regression}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,17 @@ DB_NAME = os.getenv('DB_NAME', 'gym_db')
 DB_USER = os.getenv('DB_USER', 'root')
 DB_PASSWORD = os.getenv('DB_PASSWORD', '')
 
+# SQLite Engine Configuration
+DATABASE_PATH = os.getenv('DATABASE_PATH', 'db/gym.db')
+SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))  # bytes
+SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))  # negative means KiB
+SQLITE_TEMP_STORE = os.getenv('SQLITE_TEMP_STORE', 'MEMORY')
+SQLITE_BUSY_TIMEOUT = int(os.getenv('SQLITE_BUSY_TIMEOUT', '5000'))  # milliseconds
+SQLITE_WRITER_POOL_SIZE = int(os.getenv('SQLITE_WRITER_POOL_SIZE', '1'))
+SQLITE_READER_POOL_SIZE = int(os.getenv('SQLITE_READER_POOL_SIZE', '4'))
+
 # Security Configuration
 SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
 BCRYPT_ROUNDS = 12
@@ -17,10 +28,73 @@ BCRYPT_ROUNDS = 12
 # Fingerprint Device Configuration
 FINGERPRINT_PORT = os.getenv('FINGERPRINT_PORT', '/dev/ttyUSB0')
 FINGERPRINT_BAUDRATE = int(os.getenv('FINGERPRINT_BAUDRATE', '57600'))
+FINGERPRINT_SIMULATED = os.getenv('FINGERPRINT_SIMULATED', 'False').lower() == 'true'
+FINGERPRINT_MATCH_THRESHOLD = float(os.getenv('FINGERPRINT_MATCH_THRESHOLD', '0.90'))
+FINGERPRINT_EARLY_EXIT_THRESHOLD = float(os.getenv('FINGERPRINT_EARLY_EXIT_THRESHOLD', '0.97'))
+FINGERPRINT_VERIFY_CANDIDATES = int(os.getenv('FINGERPRINT_VERIFY_CANDIDATES', '5'))
+FINGERPRINT_SENSOR_MIN_SCORE = int(os.getenv('FINGERPRINT_SENSOR_MIN_SCORE', '50'))
+
+# Check-in Pipeline Configuration
+CHECKIN_QUEUE_SIZE = int(os.getenv('CHECKIN_QUEUE_SIZE', '32'))
+CHECKIN_DEBOUNCE_SECONDS = float(os.getenv('CHECKIN_DEBOUNCE_SECONDS', '10'))
+VALIDITY_CACHE_RECONCILE_SECONDS = float(os.getenv('VALIDITY_CACHE_RECONCILE_SECONDS', '300'))
+
+# Write Service (group commit of attendance and subscription writes)
+WRITER_GROUP_COMMIT_MS = float(os.getenv('WRITER_GROUP_COMMIT_MS', '10'))  # how long a batch collects commands
+WRITER_MAX_BATCH = int(os.getenv('WRITER_MAX_BATCH', '256'))
+WRITER_RESULT_TIMEOUT = float(os.getenv('WRITER_RESULT_TIMEOUT', '30'))  # seconds a caller waits for its write
+
+# Member Cards (signed QR codes)
+CARD_VALID_DAYS = int(os.getenv('CARD_VALID_DAYS', '365'))
+CARD_PHOTO_DIR = os.getenv('CARD_PHOTO_DIR', 'photos')  # <member id>.jpg or .png
+CARD_QR_CACHE_DIR = os.getenv('CARD_QR_CACHE_DIR', 'cache/qr')  # Empty disables the cache
+CARD_PRINT_WORKERS = int(os.getenv('CARD_PRINT_WORKERS', '0'))  # 0 uses every CPU
+
+# Kiosk Server (HTTP/JSON API for turnstiles and tablets)
+KIOSK_HOST = os.getenv('KIOSK_HOST', '127.0.0.1')
+KIOSK_PORT = int(os.getenv('KIOSK_PORT', '8765'))
+KIOSK_API_TOKEN = os.getenv('KIOSK_API_TOKEN', '')  # Empty allows requests without a token
+KIOSK_IDLE_TIMEOUT = float(os.getenv('KIOSK_IDLE_TIMEOUT', '30'))  # seconds a keep-alive connection may sit idle
+KIOSK_CHANGE_POLL_SECONDS = float(os.getenv('KIOSK_CHANGE_POLL_SECONDS', '2'))
+
+# Report Cache Configuration
+REPORT_CACHE_MAX_BYTES = int(os.getenv('REPORT_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+REPORT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', '')  # Empty disables the disk tier
+REPORT_CACHE_DISK_MAX_BYTES = int(os.getenv('REPORT_CACHE_DISK_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Export Configuration
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '2000'))
+PDF_FONT_PATH = os.getenv('PDF_FONT_PATH', '')  # TTF with Arabic glyphs, e.g. Amiri or Noto Naskh Arabic
 
 # Backup Configuration
 BACKUP_DIR = os.getenv('BACKUP_DIR', 'backups')
 BACKUP_RETENTION_DAYS = int(os.getenv('BACKUP_RETENTION_DAYS', '30'))
+BACKUP_INTERVAL_HOURS = float(os.getenv('BACKUP_INTERVAL_HOURS', '24'))  # 0 disables automatic backups
+BACKUP_PAGES_PER_STEP = int(os.getenv('BACKUP_PAGES_PER_STEP', '256'))
+BACKUP_STEP_SLEEP = float(os.getenv('BACKUP_STEP_SLEEP', '0.02'))  # seconds between backup steps
+
+# Start-up Budget (milliseconds)
+STARTUP_LOGIN_BUDGET_MS = int(os.getenv('STARTUP_LOGIN_BUDGET_MS', '1500'))
+STARTUP_DASHBOARD_BUDGET_MS = int(os.getenv('STARTUP_DASHBOARD_BUDGET_MS', '1000'))
+
+# SQL Instrumentation (installed when DEBUG is on)
+SQL_SLOW_QUERY_MS = float(os.getenv('SQL_SLOW_QUERY_MS', '100'))
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '10'))  # identical statements per action
+SQL_LOG_PATH = os.getenv('SQL_LOG_PATH', 'logs/sql.log')
+SQL_LOG_MAX_BYTES = int(os.getenv('SQL_LOG_MAX_BYTES', str(5 * 1024 * 1024)))
+SQL_LOG_BACKUP_COUNT = int(os.getenv('SQL_LOG_BACKUP_COUNT', '3'))
+
+# Tracing and Event-loop Watchdog
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'False').lower() == 'true'
+TRACE_PATH = os.getenv('TRACE_PATH', 'logs/trace.jsonl')
+TRACE_MAX_BYTES = int(os.getenv('TRACE_MAX_BYTES', str(10 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.getenv('TRACE_BACKUP_COUNT', '3'))
+WATCHDOG_STALL_MS = int(os.getenv('WATCHDOG_STALL_MS', '250'))  # 0 disables the watchdog
+WATCHDOG_LOG_PATH = os.getenv('WATCHDOG_LOG_PATH', 'logs/stalls.log')
+
+# Benchmarks
+BENCHMARK_BASELINE_PATH = os.getenv('BENCHMARK_BASELINE_PATH', 'benchmarks/baseline.json')
+BENCHMARK_THRESHOLD = float(os.getenv('BENCHMARK_THRESHOLD', '0.25'))  # allowed slowdown over the baseline
 
 # Application Configuration
 DEBUG = os.getenv('DEBUG', 'False').lower() == 'true'
@@ -0,0 +1,218 @@
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Session
+from src.models.database import create_sqlite_engine
+from src.models.migrations import migrate, create_schema
+from src.models.member import MembershipType
+from src.models.user import User, UserRole
+from src.models.financial import close_periods
+
+# Rows per table for each named scale
+SCALES = {
+    "tiny": {"members": 200, "subscriptions": 600, "attendance": 20_000, "transactions": 2_000},
+    "small": {"members": 2_000, "subscriptions": 6_000, "attendance": 200_000, "transactions": 20_000},
+    "medium": {"members": 20_000, "subscriptions": 60_000, "attendance": 2_000_000, "transactions": 200_000},
+    "large": {"members": 100_000, "subscriptions": 300_000, "attendance": 10_000_000, "transactions": 1_000_000},
+}
+
+FIRST_NAMES = ["محمد", "أحمد", "علي", "حسن", "حسين", "عمر", "خالد", "يوسف", "إبراهيم", "مصطفى",
+               "فاطمة", "زينب", "مريم", "نور", "سارة", "هدى", "ليلى", "رقية", "آية", "دعاء"]
+LAST_NAMES = ["الجبوري", "العبيدي", "الدليمي", "التميمي", "الخفاجي", "الربيعي", "الزبيدي", "الساعدي",
+              "الشمري", "الطائي", "العزاوي", "الكعبي", "الموسوي", "الحسيني", "البياتي", "العاني"]
+
+# Length in days and price of each membership type
+PLANS = {
+    MembershipType.DAILY: (1, 5.0),
+    MembershipType.WEEKLY: (7, 25.0),
+    MembershipType.MONTHLY: (30, 60.0),
+    MembershipType.QUARTERLY: (90, 160.0),
+    MembershipType.SEMI_ANNUAL: (180, 300.0),
+    MembershipType.ANNUAL: (365, 550.0),
+}
+PLAN_WEIGHTS = [2, 5, 50, 20, 13, 10]
+EXPENSES = [("MAINTENANCE", 20, 400), ("SALARY", 300, 900), ("UTILITIES", 50, 250), ("OTHER", 5, 150)]
+
+# Visits by hour of day: morning and evening peaks, closed at night
+HOUR_WEIGHTS = [0, 0, 0, 0, 0, 1, 4, 6, 5, 3, 2, 2, 2, 2, 2, 3, 5, 8, 9, 8, 6, 4, 2, 0]
+
+BATCH_SIZE = 50_000
+
+def sql_datetime(value: datetime) -> str:
+    """The text SQLAlchemy stores for a DateTime column on SQLite"""
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+def _insert(connection, statement, rows):
+    """executemany in batches so the rows never sit in memory all at once"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            connection.executemany(statement, batch)
+            batch.clear()
+    if batch:
+        connection.executemany(statement, batch)
+
+def _daily_counts(rng, total, days):
+    """Spread total rows over days with some day-to-day variation"""
+    weights = [rng.uniform(0.6, 1.4) for _ in range(days)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for day in rng.sample(range(days), total - sum(counts)):
+        counts[day] += 1
+    return counts
+
+def generate(db_path, members, subscriptions, attendance, transactions, history_days=730, seed=1, today=None,
+             progress=print):
+    """Create a scratch database at db_path filled with deterministic synthetic data.
+
+    The same seed, sizes and today give the same rows. Rows are bulk
+    loaded into the version 1 schema, and the remaining migrations then
+    build the indexes, search index, rollups and ledger postings over them,
+    which is much faster than keeping all of them up to date row by row.
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(db_path)
+    rng = random.Random(seed)
+    today = today or date.today()
+    first_day = today - timedelta(days=history_days - 1)
+    now = datetime.combine(today, datetime.min.time()) + timedelta(hours=20)
+    engine = create_sqlite_engine(f"sqlite:///{db_path}")
+
+    # Schema version 1 only: the tables without the triggers of later migrations
+    with engine.begin() as conn:
+        create_schema(conn)
+        conn.exec_driver_sql("PRAGMA user_version = 1")
+
+    started = time.monotonic()
+    raw = engine.raw_connection()
+    try:
+        connection = raw.driver_connection
+        connection.execute("BEGIN")
+        admin = User(username="admin", email="admin@gym.local", full_name="مدير النظام", role=UserRole.ADMIN)
+        admin.set_password("admin123")
+        connection.execute(
+            "INSERT INTO users (username, email, hashed_password, full_name, role, is_active, created_at) "
+            "VALUES (?, ?, ?, ?, ?, 1, ?)",
+            (admin.username, admin.email, admin.hashed_password, admin.full_name, "ADMIN", sql_datetime(now))
+        )
+
+        # Subscriptions first, so every member can take the dates of their latest one
+        plans = list(PLANS)
+        latest = [None] * members
+        subscription_rows = []
+        for index in range(subscriptions):
+            member_id = index + 1 if index < members else rng.randrange(members) + 1
+            plan = rng.choices(plans, PLAN_WEIGHTS)[0]
+            length, price = PLANS[plan]
+            start = datetime.combine(first_day + timedelta(days=rng.randrange(history_days)), datetime.min.time()) \
+                + timedelta(hours=rng.randrange(8, 22), minutes=rng.randrange(60))
+            end = start + timedelta(days=length)
+            status = "paid" if rng.random() < 0.95 else rng.choice(["pending", "cancelled"])
+            subscription_rows.append((member_id, plan.name, start, end, price, status))
+            if latest[member_id - 1] is None or start > latest[member_id - 1][1]:
+                latest[member_id - 1] = (plan.name, start, end)
+        subscription_rows.sort(key=lambda row: row[2])
+        # Fewer subscriptions than members: the rest get plan dates with no subscription row behind them
+        for member_id in range(subscriptions + 1, members + 1):
+            plan = rng.choices(plans, PLAN_WEIGHTS)[0]
+            start = datetime.combine(first_day + timedelta(days=rng.randrange(history_days)), datetime.min.time())
+            latest[member_id - 1] = (plan.name, start, start + timedelta(days=PLANS[plan][0]))
+
+        _insert(connection, (
+            "INSERT INTO members (full_name, phone, email, membership_type, start_date, end_date, "
+            "created_at, created_by, is_active) VALUES (?, ?, ?, ?, ?, ?, ?, 1, ?)"
+        ), (
+            (f"{rng.choice(FIRST_NAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+             f"07{rng.randrange(10**9):09d}",
+             f"member{member_id}@example.com" if rng.random() < 0.4 else None,
+             plan, sql_datetime(start), sql_datetime(end), sql_datetime(start),
+             1 if rng.random() < 0.97 else 0)
+            for member_id, (plan, start, end) in enumerate(latest, 1)
+        ))
+        progress(f"members: {members}")
+
+        _insert(connection, (
+            "INSERT INTO subscriptions (member_id, type, start_date, end_date, amount, payment_status, "
+            "created_at, created_by) VALUES (?, ?, ?, ?, ?, ?, ?, 1)"
+        ), (
+            (member_id, plan, sql_datetime(start), sql_datetime(end), amount, status, sql_datetime(start))
+            for member_id, plan, start, end, amount, status in subscription_rows
+        ))
+        del subscription_rows
+        progress(f"subscriptions: {subscriptions}")
+
+        def visits():
+            hours = range(24)
+            # Today's visits stop at now
+            today_weights = [weight if hour < now.hour else 0 for hour, weight in enumerate(HOUR_WEIGHTS)]
+            for offset, count in enumerate(_daily_counts(rng, attendance, history_days)):
+                day = datetime.combine(first_day + timedelta(days=offset), datetime.min.time())
+                weights = today_weights if offset == history_days - 1 else HOUR_WEIGHTS
+                times = sorted(
+                    day + timedelta(hours=hour, seconds=rng.randrange(3600))
+                    for hour in rng.choices(hours, weights, k=count)
+                )
+                for check_in in times:
+                    check_out = check_in + timedelta(minutes=rng.randrange(30, 150))
+                    yield (rng.randrange(members) + 1, sql_datetime(check_in),
+                           sql_datetime(check_out) if check_out < now else None, rng.random() < 0.8)
+
+        _insert(connection, (
+            "INSERT INTO attendance_records (member_id, check_in, check_out, fingerprint_verified, recorded_by) "
+            "VALUES (?, ?, ?, ?, 1)"
+        ), visits())
+        progress(f"attendance records: {attendance}")
+
+        def expenses():
+            for offset, count in enumerate(_daily_counts(rng, transactions, history_days)):
+                day = datetime.combine(first_day + timedelta(days=offset), datetime.min.time())
+                for _ in range(count):
+                    moment = sql_datetime(day + timedelta(seconds=rng.randrange(8 * 3600, 22 * 3600)))
+                    if rng.random() < 0.1:
+                        yield ("INCOME", "OTHER", round(rng.uniform(5, 100), 2), "مبيعات متجر", moment, moment)
+                        continue
+                    category, low, high = rng.choice(EXPENSES)
+                    yield ("EXPENSE", category, round(rng.uniform(low, high), 2), "مصروف", moment, moment)
+
+        _insert(connection, (
+            "INSERT INTO transactions (type, category, amount, description, date, created_at, created_by) "
+            "VALUES (?, ?, ?, ?, ?, ?, 1)"
+        ), expenses())
+        progress(f"transactions: {transactions}")
+        connection.execute("COMMIT")
+    finally:
+        raw.close()
+
+    # Indexes, search, change tracking, rollups and subscription income over the loaded rows
+    migrate(engine)
+    db = Session(bind=engine)
+    try:
+        close_periods(db, today)
+        db.commit()
+    finally:
+        db.close()
+    with engine.connect() as conn:
+        conn.exec_driver_sql("ANALYZE")
+    engine.dispose()
+    progress(f"done in {time.monotonic() - started:.1f} s")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.utils.datagen", description="توليد بيانات تجريبية")
+    parser.add_argument("path", help="مسار قاعدة البيانات الجديدة")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    for table in SCALES["small"]:
+        parser.add_argument(f"--{table}", type=int, help=f"عدد صفوف {table} (يتجاوز --scale)")
+    parser.add_argument("--days", type=int, default=730, help="عدد أيام السجل")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    sizes = {table: getattr(args, table) or count for table, count in SCALES[args.scale].items()}
+    generate(args.path, history_days=args.days, seed=args.seed, **sizes)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
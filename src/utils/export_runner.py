@@ -0,0 +1,90 @@
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from src.services.export import run_export, ExportCancelled
+
+class ExportJob(QObject):
+    """GUI-side handle of an export running in a worker process"""
+    progress = pyqtSignal(int, int)  # rows written, total rows
+    finished = pyqtSignal(int)  # rows written
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, future, progress_queue, cancel_event, parent=None):
+        super().__init__(parent)
+        self.future = future
+        self.progress_queue = progress_queue
+        self.cancel_event = cancel_event
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.timer.start(100)
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def poll(self):
+        """Forward queued progress and the final outcome as signals"""
+        latest = None
+        try:
+            while True:
+                latest = self.progress_queue.get_nowait()
+        except queue.Empty:
+            pass
+        if latest is not None:
+            self.progress.emit(*latest)
+
+        if not self.future.done():
+            return
+        self.timer.stop()
+        try:
+            written = self.future.result()
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.finished.emit(written)
+
+class ExportRunner:
+    """Runs exports in a process pool so writing large files never blocks the GUI"""
+
+    def __init__(self, max_workers=1):
+        self.max_workers = max_workers
+        self.pool = None
+        self.manager = None
+
+    def start(self, name, start_date, end_date, bucket, path) -> ExportJob:
+        return self.start_job(run_export, name, start_date, end_date, bucket, path)
+
+    def start_job(self, function, *args) -> ExportJob:
+        """Run function(*args, progress_queue, cancel_event) in the pool; it must be picklable"""
+        if self.pool is None:
+            # spawn: forking a process that runs Qt and database threads is unsafe
+            context = multiprocessing.get_context("spawn")
+            self.pool = ProcessPoolExecutor(self.max_workers, mp_context=context)
+            self.manager = context.Manager()
+
+        progress_queue = self.manager.Queue()
+        cancel_event = self.manager.Event()
+        future = self.pool.submit(function, *args, progress_queue, cancel_event)
+        return ExportJob(future, progress_queue, cancel_event)
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.manager.shutdown()
+            self.pool = self.manager = None
+
+_runner = None
+
+def get_export_runner() -> ExportRunner:
+    """Return the runner shared by all views"""
+    global _runner
+    if _runner is None:
+        _runner = ExportRunner()
+    return _runner
+
+def shutdown_export_runner():
+    if _runner is not None:
+        _runner.shutdown()
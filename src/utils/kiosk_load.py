@@ -0,0 +1,141 @@
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from src.utils.config import KIOSK_HOST, KIOSK_PORT, KIOSK_API_TOKEN
+from src.utils.tracing import percentile
+
+# Load test for the kiosk server: every simulated kiosk keeps one
+# connection open and sends requests back to back, like a busy turnstile.
+
+DEFAULT_MIX = "validity=70,checkin=20,member=8,search=2"
+SEARCH_TERMS = ["محمد", "أحمد", "الجبوري", "فاطمة", "07"]
+
+class KioskClient:
+    """A keep-alive HTTP/1.1 connection to the kiosk server"""
+
+    def __init__(self, host, port, token=""):
+        self.host = host
+        self.port = port
+        self.token = token
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None):
+        """Send one request; returns (status, decoded JSON body)"""
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        headers = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+        if body:
+            headers += "Content-Type: application/json\r\n"
+        if self.token:
+            headers += f"Authorization: Bearer {self.token}\r\n"
+        self.writer.write(headers.encode("utf-8") + b"\r\n" + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed by the server")
+        status = int(status_line.split()[1])
+        length, close = 0, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+            elif name.strip().lower() == "connection":
+                close = value.strip().lower() == "close"
+        data = json.loads(await self.reader.readexactly(length)) if length else None
+        if close:
+            await self.close()
+        return status, data
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader, self.writer = None, None
+
+def parse_mix(text) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    return mix
+
+async def run_kiosk(client, mix, member_count, deadline, seed, results, errors):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        operation = rng.choices(names, weights)[0]
+        member_id = rng.randint(1, member_count)
+        if operation == "validity":
+            method, path, payload = "GET", f"/validity/{member_id}", None
+        elif operation == "checkin":
+            method, path, payload = "POST", "/checkin", {"member_id": member_id}
+        elif operation == "member":
+            method, path, payload = "GET", f"/members/{member_id}", None
+        else:
+            method, path, payload = "GET", f"/members?q={rng.choice(SEARCH_TERMS)}", None
+
+        started = time.perf_counter()
+        try:
+            status, _ = await client.request(method, path, payload)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            errors[operation] += 1
+            await client.close()
+            continue
+        if status >= 500:
+            errors[operation] += 1
+        else:
+            results[operation].append((time.perf_counter() - started) * 1000)
+    await client.close()
+
+async def run_load(host, port, token, kiosks, duration, mix, seed):
+    status, health = await KioskClient(host, port, token).request("GET", "/health")
+    if status != 200:
+        raise RuntimeError(f"server health check failed: {status} {health}")
+    results, errors = defaultdict(list), defaultdict(int)
+    deadline = time.monotonic() + duration
+    started = time.monotonic()
+    await asyncio.gather(*(
+        run_kiosk(KioskClient(host, port, token), mix, health["members"], deadline, seed + index, results, errors)
+        for index in range(kiosks)
+    ))
+    return results, errors, time.monotonic() - started
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.utils.kiosk_load", description="اختبار حمل خادم أجهزة الدخول")
+    parser.add_argument("--host", default=KIOSK_HOST)
+    parser.add_argument("--port", type=int, default=KIOSK_PORT)
+    parser.add_argument("--token", default=KIOSK_API_TOKEN)
+    parser.add_argument("--kiosks", type=int, default=200, help="عدد الأجهزة المتزامنة")
+    parser.add_argument("--duration", type=float, default=10.0, help="بالثواني")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="أوزان الطلبات")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    results, errors, elapsed = asyncio.run(run_load(
+        args.host, args.port, args.token, args.kiosks, args.duration, parse_mix(args.mix), args.seed
+    ))
+
+    total = sum(len(latencies) for latencies in results.values())
+    print(f"{'request':10} {'count':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'errors':>7}")
+    for operation in sorted(results.keys() | errors.keys()):
+        latencies = sorted(results[operation])
+        if latencies:
+            print(f"{operation:10} {len(latencies):>8} {len(latencies) / elapsed:>8.0f} "
+                  f"{percentile(latencies, 0.50):>8.1f} {percentile(latencies, 0.99):>8.1f} "
+                  f"{latencies[-1]:>8.1f} {errors[operation]:>7}")
+        else:
+            print(f"{operation:10} {0:>8} {0:>8} {'-':>8} {'-':>8} {'-':>8} {errors[operation]:>7}")
+    print(f"{'total':10} {total:>8} {total / elapsed:>8.0f}")
+    return 1 if any(errors.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
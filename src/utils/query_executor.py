@@ -0,0 +1,201 @@
+from itertools import count
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtWidgets import QLabel
+from src.models.database import ReadSessionLocal
+from src.utils.config import SQLITE_READER_POOL_SIZE
+from src.utils.sql_monitor import sql_action
+from src.utils import tracing
+
+class _QuerySignals(QObject):
+    done = pyqtSignal(int, bool, object)  # ticket, succeeded, result or exception
+
+class _QueryTask(QRunnable):
+    """Runs a single query function with its own session on a pool thread"""
+
+    def __init__(self, ticket, key, query, span=None):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.ticket = ticket
+        self.key = key
+        self.query = query
+        self.span = span
+        self.cancelled = False
+        self.signals = _QuerySignals()
+
+    def run(self):
+        if self.cancelled:
+            self.signals.done.emit(self.ticket, False, None)
+            return
+
+        db = ReadSessionLocal()
+        try:
+            # The executor key names the UI action the statements belong to
+            with sql_action(self.key), tracing.attach(self.span):
+                result = self.query(db)
+        except Exception as e:
+            self.signals.done.emit(self.ticket, False, e)
+        else:
+            self.signals.done.emit(self.ticket, True, result)
+        finally:
+            db.close()
+
+class _FutureTask:
+    """A concurrent Future (a queued write) tracked like a query task"""
+
+    def __init__(self, ticket, future, span=None):
+        self.ticket = ticket
+        self.future = future
+        self.span = span
+        self.cancelled = False
+        self.signals = _QuerySignals()
+
+    def start(self):
+        self.future.add_done_callback(self.done)
+
+    def done(self, future):
+        # Runs on the thread that resolved the future; the signal is queued to the GUI thread
+        if future.cancelled():
+            self.signals.done.emit(self.ticket, False, None)
+        elif future.exception() is not None:
+            self.signals.done.emit(self.ticket, False, future.exception())
+        else:
+            self.signals.done.emit(self.ticket, True, future.result())
+
+class QueryExecutor(QObject):
+    """Run database queries on a worker pool and deliver the results on the GUI thread.
+
+    Every request is submitted under a key (usually the name of the view that
+    owns it). Submitting a new request under the same key supersedes the old
+    one: it is removed from the pool if it has not started yet, and its result
+    is dropped if it has. Query functions receive a fresh session and must
+    return plain data (tuples, dicts), never ORM objects bound to that session.
+    """
+    loading_changed = pyqtSignal(str, bool)
+    query_failed = pyqtSignal(str, str)
+
+    def __init__(self, max_threads=4, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_threads)
+        self._tickets = count(1)
+        self._latest = {}  # key -> ticket of the newest request
+        self._tasks = {}  # ticket -> (key, task, on_result, on_error)
+
+    def submit(self, key, query, on_result=None, on_error=None):
+        """Run query(db) off the GUI thread and pass its result to on_result"""
+        return self._track(key, lambda ticket, span: _QueryTask(ticket, key, query, span), on_result, on_error)
+
+    def watch(self, key, future, on_result=None, on_error=None):
+        """Pass the outcome of a Future (e.g. from the write service) to on_result or on_error on the GUI thread"""
+        return self._track(key, lambda ticket, span: _FutureTask(ticket, future, span), on_result, on_error)
+
+    def _track(self, key, make_task, on_result, on_error):
+        was_loading = self._discard(key)
+
+        ticket = next(self._tickets)
+        # The action that submitted the query stays open until its result is shown
+        span = tracing.current_span()
+        if span is not None:
+            span.hold()
+        task = make_task(ticket, span)
+        self._latest[key] = ticket
+        self._tasks[ticket] = (key, task, on_result, on_error)
+        task.signals.done.connect(self._on_done)
+
+        if not was_loading:
+            self.loading_changed.emit(key, True)
+        # Last: a Future that is already done delivers right here
+        if isinstance(task, _QueryTask):
+            self.pool.start(task)
+        else:
+            task.start()
+        return ticket
+
+    def cancel(self, key):
+        """Cancel the pending request for key, if any"""
+        if self._discard(key):
+            self.loading_changed.emit(key, False)
+
+    def is_loading(self, key) -> bool:
+        """Check if a request for key is still in flight"""
+        return key in self._latest
+
+    def is_idle(self) -> bool:
+        """Check if no request is in flight"""
+        return not self._latest
+
+    def wait_for_done(self, msecs=-1) -> bool:
+        """Block until the pool is idle (used by scripts and benchmarks)"""
+        return self.pool.waitForDone(msecs)
+
+    def _discard(self, key) -> bool:
+        """Forget the current request for key; returns True if one was pending"""
+        ticket = self._latest.pop(key, None)
+        if ticket is None:
+            return False
+
+        entry = self._tasks.get(ticket)
+        if entry:
+            task = entry[1]
+            task.cancelled = True
+            if isinstance(task, _QueryTask) and self.pool.tryTake(task):
+                del self._tasks[ticket]
+                if task.span is not None:
+                    task.span.release()
+        return True
+
+    def _on_done(self, ticket, succeeded, result):
+        entry = self._tasks.pop(ticket, None)
+        if entry is None:
+            return
+        key, task, on_result, on_error = entry
+        try:
+            with tracing.attach(task.span):
+                self._deliver(ticket, key, succeeded, result, on_result, on_error)
+        finally:
+            if task.span is not None:
+                task.span.release()
+
+    def _deliver(self, ticket, key, succeeded, result, on_result, on_error):
+        # Stale result from a superseded or cancelled request
+        if self._latest.get(key) != ticket:
+            return
+        del self._latest[key]
+        self.loading_changed.emit(key, False)
+
+        if succeeded:
+            if on_result:
+                on_result(result)
+        elif result is not None:
+            self.query_failed.emit(key, str(result))
+            if on_error:
+                on_error(result)
+
+class LoadingIndicator(QLabel):
+    """Label that is only visible while one of its keys is loading"""
+
+    def __init__(self, *keys, text="جاري التحميل..."):
+        super().__init__(text)
+        self.setObjectName("loading-label")
+        self.keys = set(keys)
+        self.active = set()
+        self.setVisible(False)
+        get_executor().loading_changed.connect(self.on_loading_changed)
+
+    def on_loading_changed(self, key, loading):
+        if key not in self.keys:
+            return
+        if loading:
+            self.active.add(key)
+        else:
+            self.active.discard(key)
+        self.setVisible(bool(self.active))
+
+_executor = None
+
+def get_executor() -> QueryExecutor:
+    """Return the executor shared by all views"""
+    global _executor
+    if _executor is None:
+        _executor = QueryExecutor(max_threads=SQLITE_READER_POOL_SIZE)
+    return _executor
@@ -1,11 +1,12 @@
-from src.models.database import engine, SessionLocal, Base
+from src.models.database import SessionLocal
 from src.models.user import User, UserRole
+from src.models.migrations import migrate
 from datetime import datetime
 
 def init_database():
     """Initialize database tables and create default admin user"""
-    # Create all tables
-    Base.metadata.create_all(bind=engine)
+    # Create or upgrade all tables
+    migrate()
     
     # Create session
     db = SessionLocal()
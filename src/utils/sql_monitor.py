@@ -0,0 +1,159 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import Counter, deque, namedtuple
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from src.utils.config import (SQL_SLOW_QUERY_MS, SQL_N_PLUS_ONE_THRESHOLD, SQL_LOG_PATH,
+                              SQL_LOG_MAX_BYTES, SQL_LOG_BACKUP_COUNT)
+
+logger = logging.getLogger("gym.sql")
+
+StatementStats = namedtuple("StatementStats", ["statement", "count", "total_ms", "max_ms"])
+ActionStats = namedtuple("ActionStats", ["name", "statements", "total_ms", "repeated", "finished_at"])
+SlowQuery = namedtuple("SlowQuery", ["statement", "elapsed_ms", "action", "plan", "recorded_at"])
+
+# The UI action the statements running in this context belong to
+_current_action = contextvars.ContextVar("sql_action", default=None)
+
+class _Action:
+    def __init__(self, name):
+        self.name = name
+        self.statements = Counter()
+        self.total_ms = 0.0
+
+class SqlMonitor:
+    """Times every statement an engine runs and attributes it to the current UI action.
+
+    Keeps per-statement totals, the most recent actions with their statement
+    counts, and the most recent slow queries with their query plans. An
+    action that runs the same statement n_plus_one_threshold times or more
+    is reported as a likely N+1 pattern.
+    """
+
+    MAX_STATEMENTS = 1000
+
+    def __init__(self, slow_ms=SQL_SLOW_QUERY_MS, n_plus_one_threshold=SQL_N_PLUS_ONE_THRESHOLD, history=200):
+        self.slow_ms = slow_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self._statements = {}  # statement -> [count, total ms, max ms]
+        self.actions = deque(maxlen=history)
+        self.slow_queries = deque(maxlen=history)
+
+    def install(self, engine):
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine, "handle_error", self._on_error)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("sql_monitor_started", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = (time.perf_counter() - conn.info["sql_monitor_started"].pop()) * 1000
+        action = _current_action.get()
+        with self._lock:
+            entry = self._statements.get(statement)
+            if entry is None and len(self._statements) < self.MAX_STATEMENTS:
+                entry = self._statements[statement] = [0, 0.0, 0.0]
+            if entry is not None:
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] = max(entry[2], elapsed)
+        if action is not None:
+            action.statements[statement] += 1
+            action.total_ms += elapsed
+
+        if elapsed >= self.slow_ms:
+            plan = [] if executemany else self.explain(cursor.connection, statement, parameters)
+            self.slow_queries.append(SlowQuery(
+                statement, elapsed, action.name if action else None, plan, time.time()
+            ))
+            logger.warning(
+                "slow query (%.1f ms, action %s): %s\n    %s",
+                elapsed, action.name if action else "-", statement, "\n    ".join(plan)
+            )
+
+    def _on_error(self, context):
+        # A failed statement never reaches after_cursor_execute
+        if context.cursor is not None and context.connection is not None:
+            started = context.connection.info.get("sql_monitor_started")
+            if started:
+                started.pop()
+
+    @staticmethod
+    def explain(dbapi_connection, statement, parameters) -> list:
+        """EXPLAIN QUERY PLAN lines for a statement, run on a separate cursor"""
+        try:
+            rows = dbapi_connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ()).fetchall()
+        except Exception as e:
+            return [f"(no plan: {e})"]
+        return [row[-1] for row in rows]
+
+    def finish_action(self, action):
+        if not action.statements:
+            return
+        repeated = {
+            statement: count for statement, count in action.statements.items()
+            if count >= self.n_plus_one_threshold
+        }
+        stats = ActionStats(
+            action.name, sum(action.statements.values()), action.total_ms, repeated, time.time()
+        )
+        self.actions.append(stats)
+        for statement, count in repeated.items():
+            logger.warning("possible N+1 in %s: %d executions of %s", action.name, count, statement)
+        logger.info("%s: %d statements in %.1f ms", action.name, stats.statements, action.total_ms)
+
+    def statement_stats(self) -> list:
+        """Per-statement totals, most total time first"""
+        with self._lock:
+            stats = [StatementStats(statement, *entry) for statement, entry in self._statements.items()]
+        return sorted(stats, key=lambda stats: stats.total_ms, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+        self.actions.clear()
+        self.slow_queries.clear()
+
+_monitor = None
+
+def get_sql_monitor():
+    """Return the installed monitor, or None when instrumentation is off"""
+    return _monitor
+
+def install_sql_monitor(*engines, log_path=SQL_LOG_PATH) -> SqlMonitor:
+    """Instrument engines and log slow queries and N+1 warnings to a rotating file"""
+    global _monitor
+    if _monitor is None:
+        _monitor = SqlMonitor()
+        if log_path:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(
+                log_path, maxBytes=SQL_LOG_MAX_BYTES, backupCount=SQL_LOG_BACKUP_COUNT, encoding="utf-8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+    for engine in engines:
+        _monitor.install(engine)
+    return _monitor
+
+@contextmanager
+def sql_action(name):
+    """Attribute the statements run inside the block, on this thread, to the action name"""
+    if _monitor is None or _current_action.get() is not None:
+        # Nested actions count towards the outermost one
+        yield
+        return
+    action = _Action(name)
+    token = _current_action.set(action)
+    try:
+        yield
+    finally:
+        _current_action.reset(token)
+        _monitor.finish_action(action)
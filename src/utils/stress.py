@@ -0,0 +1,232 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Simulates several check-in terminals writing to one database. Every
+# scenario runs in fresh spawned processes, because the journal mode and
+# busy timeout are read from the configuration when src is first imported;
+# like benchmark, nothing from src is imported at module level.
+
+# thread: a connection per terminal in one process; process: a process per
+# terminal; writer: terminal threads sharing the group-committing write service
+KINDS = ("thread", "process", "writer")
+
+def _is_locked(error) -> bool:
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+def _direct_scan(session_factory, record_scan):
+    """A scan written in its own transaction, like the pipeline did before the write service"""
+    def scan(member_id):
+        db = session_factory()
+        try:
+            record_scan(db, member_id, fingerprint_verified=True)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+    return scan
+
+def _terminal(scan, member_ids, seed, duration, burst, think_ms, start, stats):
+    """One terminal: bursts of scans by different members with a pause in between"""
+    from sqlalchemy.exc import OperationalError
+
+    rng = random.Random(seed)
+    start.wait()
+    started = time.monotonic()
+    deadline = started + duration
+    while time.monotonic() < deadline:
+        for member_id in rng.sample(member_ids, rng.randint(1, burst)):
+            scan_started = time.perf_counter()
+            try:
+                scan(member_id)
+                stats["latencies"].append((time.perf_counter() - scan_started) * 1000)
+            except OperationalError as e:
+                stats["locked" if _is_locked(e) else "errors"] += 1
+            except Exception:
+                stats["errors"] += 1
+        time.sleep(rng.uniform(0.5, 1.5) * think_ms / 1000)
+    stats["elapsed"] = time.monotonic() - started
+
+def run_terminals(db_path, journal_mode, busy_timeout, threads, writer, duration, burst, think_ms, seed,
+                  ready, start, results):
+    """Process entry point: run threads terminals and put their combined stats on results"""
+    os.environ.update({
+        "DATABASE_PATH": db_path,
+        "SQLITE_JOURNAL_MODE": journal_mode,
+        "SQLITE_BUSY_TIMEOUT": str(busy_timeout),
+        # One connection per terminal, so they contend for SQLite's lock and not the pool
+        "SQLITE_WRITER_POOL_SIZE": str(threads),
+    })
+    from src.models.database import SessionLocal, reader_engine
+    from src.models.attendance import AttendanceRecord
+    from src.services.writer import WriteService
+    from src.utils.config import WRITER_RESULT_TIMEOUT
+
+    with reader_engine.connect() as conn:
+        member_ids = [row[0] for row in conn.exec_driver_sql("SELECT id FROM members WHERE is_active = 1")]
+
+    service = None
+    if writer:
+        service = WriteService()
+        service.start()
+        scan = lambda member_id: service.record_scan(member_id, fingerprint_verified=True).result(WRITER_RESULT_TIMEOUT)
+    else:
+        scan = _direct_scan(SessionLocal, AttendanceRecord.record_scan)
+
+    stats = [{"latencies": [], "locked": 0, "errors": 0, "elapsed": 0.0} for _ in range(threads)]
+    workers = [
+        threading.Thread(target=_terminal, args=(scan, member_ids, seed + index, duration, burst, think_ms, start,
+                                                 stats[index]))
+        for index in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    ready.put(os.getpid())
+    for worker in workers:
+        worker.join()
+    if service is not None:
+        service.stop()
+    results.put({
+        "latencies": [value for terminal in stats for value in terminal["latencies"]],
+        "locked": sum(terminal["locked"] for terminal in stats),
+        "errors": sum(terminal["errors"] for terminal in stats),
+        "elapsed": max(terminal["elapsed"] for terminal in stats),
+    })
+
+def prepare(source, target, journal_mode):
+    """Copy source to target with the scenario's journal mode set"""
+    with sqlite3.connect(source) as src, sqlite3.connect(target) as dst:
+        src.backup(dst)
+    connection = sqlite3.connect(target)
+    try:
+        connection.execute(f"PRAGMA journal_mode = {journal_mode}")
+    finally:
+        connection.close()
+
+def run_scenario(source, workdir, kind, journal_mode, busy_timeout, terminals, duration, burst, think_ms, seed):
+    """Run one scenario on a fresh copy of source and return its summary"""
+    from src.utils.tracing import percentile
+
+    db_path = os.path.join(workdir, f"stress-{kind}-{journal_mode}-{busy_timeout}-{terminals}.db")
+    prepare(source, db_path, journal_mode)
+
+    processes, threads = (terminals, 1) if kind == "process" else (1, terminals)
+    context = multiprocessing.get_context("spawn")
+    ready, results, start = context.Queue(), context.Queue(), context.Event()
+    workers = [
+        context.Process(target=run_terminals, args=(db_path, journal_mode, busy_timeout, threads, kind == "writer",
+                                                    duration, burst, think_ms, seed + index * threads,
+                                                    ready, start, results))
+        for index in range(processes)
+    ]
+    try:
+        for worker in workers:
+            worker.start()
+        for _ in workers:
+            ready.get(timeout=60)
+        start.set()
+
+        latencies, locked, errors, elapsed = [], 0, 0, 0.0
+        for _ in workers:
+            stats = results.get(timeout=duration + 120)
+            latencies.extend(stats["latencies"])
+            locked += stats["locked"]
+            errors += stats["errors"]
+            elapsed = max(elapsed, stats["elapsed"])
+    except queue.Empty:
+        raise RuntimeError(f"terminal processes did not report ({kind}, {journal_mode}, {busy_timeout} ms)")
+    finally:
+        for worker in workers:
+            worker.join(5)
+            if worker.is_alive():
+                worker.terminate()
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    latencies.sort()
+    attempts = len(latencies) + locked + errors
+    return {
+        "kind": kind, "journal_mode": journal_mode, "busy_timeout": busy_timeout, "terminals": terminals,
+        "ok": len(latencies),
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.50) if latencies else None,
+        "p99_ms": percentile(latencies, 0.99) if latencies else None,
+        "max_ms": latencies[-1] if latencies else None,
+        "locked": locked,
+        "locked_rate": locked / attempts if attempts else 0.0,
+        "errors": errors,
+    }
+
+def _ms(value):
+    return "-" if value is None else f"{value:.1f}"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.utils.stress", description="اختبار ضغط تسجيل الحضور من عدة أجهزة")
+    parser.add_argument("--db", help="قاعدة بيانات مصدر تُنسخ لكل سيناريو (تُولَّد إن لم تكن موجودة)")
+    parser.add_argument("--scale", default="tiny", help="حجم البيانات إن احتجنا لتوليدها")
+    parser.add_argument("--terminals", default="1,4,8", help="أعداد الأجهزة المتزامنة")
+    parser.add_argument("--kinds", default="thread,process,writer", help="thread و/أو process و/أو writer")
+    parser.add_argument("--journal-modes", default="WAL,DELETE")
+    parser.add_argument("--busy-timeouts", default="0,5000", help="بالمللي ثانية")
+    parser.add_argument("--duration", type=float, default=5.0, help="مدة كل سيناريو بالثواني")
+    parser.add_argument("--burst", type=int, default=5, help="أقصى عدد مسحات متتالية في الدفعة")
+    parser.add_argument("--think-ms", type=float, default=20.0, help="متوسط التوقف بين الدفعات")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="حفظ النتائج في ملف JSON")
+    args = parser.parse_args(argv)
+
+    kinds = args.kinds.split(",")
+    if not set(kinds) <= set(KINDS):
+        parser.error(f"--kinds must be a subset of {','.join(KINDS)}")
+    terminals = [int(value) for value in args.terminals.split(",")]
+    timeouts = [int(value) for value in args.busy_timeouts.split(",")]
+    modes = [mode.upper() for mode in args.journal_modes.split(",")]
+
+    workdir = tempfile.mkdtemp(prefix="gym-stress-")
+    try:
+        source = args.db
+        if source is None or not os.path.exists(source):
+            from src.utils import datagen
+            if args.scale not in datagen.SCALES:
+                parser.error(f"--scale must be one of {', '.join(datagen.SCALES)}")
+            source = source or os.path.join(workdir, "source.db")
+            print(f"توليد {source} ({args.scale})")
+            datagen.generate(source, seed=args.seed, progress=lambda message: None, **datagen.SCALES[args.scale])
+
+        print(f"{'kind':8} {'journal':8} {'busy ms':>8} {'terms':>6} {'ok':>7} {'ops/s':>8} "
+              f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} {'locked':>7} {'locked %':>9} {'errors':>7}")
+        results = []
+        for mode in modes:
+            for timeout in timeouts:
+                for kind in kinds:
+                    for count in terminals:
+                        result = run_scenario(source, workdir, kind, mode, timeout, count, args.duration,
+                                              args.burst, args.think_ms, args.seed)
+                        results.append(result)
+                        print(f"{kind:8} {mode:8} {timeout:>8} {count:>6} {result['ok']:>7} "
+                              f"{result['throughput']:>8.0f} {_ms(result['p50_ms']):>8} {_ms(result['p99_ms']):>8} "
+                              f"{_ms(result['max_ms']):>8} {result['locked']:>7} "
+                              f"{result['locked_rate'] * 100:>8.1f}% {result['errors']:>7}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
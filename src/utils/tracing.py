@@ -0,0 +1,212 @@
+import argparse
+import contextvars
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from sqlalchemy import event
+from src.utils.config import TRACE_PATH, TRACE_MAX_BYTES, TRACE_BACKUP_COUNT
+
+# One JSON object per line; see Span.record()
+trace_logger = logging.getLogger("gym.trace")
+trace_logger.propagate = False
+
+_current_span = contextvars.ContextVar("trace_span", default=None)
+_enabled = False
+
+class Span:
+    """Wall time, database time and row counts of one user action.
+
+    A span stays open until its handler has returned and every query the
+    handler submitted to the executor has delivered its result, so wall_ms
+    covers the time until the screen shows the new data while handler_ms is
+    the time the GUI thread was blocked.
+    """
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.handler_ms = None
+        self.db_ms = 0.0
+        self.statements = 0
+        self.rows = 0
+        self.failed = False
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def add_statement(self, elapsed_ms):
+        with self._lock:
+            self.db_ms += elapsed_ms
+            self.statements += 1
+
+    def hold(self):
+        """Keep the span open for asynchronous work started by the action"""
+        with self._lock:
+            self._pending += 1
+
+    def release(self):
+        with self._lock:
+            self._pending -= 1
+            done = self._pending == 0 and self.handler_ms is not None
+        if done:
+            self._finish()
+
+    def close_handler(self):
+        with self._lock:
+            self.handler_ms = (time.perf_counter() - self.started) * 1000
+            done = self._pending == 0
+        if done:
+            self._finish()
+
+    def _finish(self):
+        trace_logger.info(json.dumps(self.record(), ensure_ascii=False))
+
+    def record(self) -> dict:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "start": round(self.started_at, 3),
+            "wall_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "handler_ms": round(self.handler_ms, 3),
+            "db_ms": round(self.db_ms, 3),
+            "statements": self.statements,
+            "rows": self.rows,
+            "failed": self.failed,
+        }
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_span.get() is not None:
+        conn.info.setdefault("trace_started", []).append(time.perf_counter())
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    span = _current_span.get()
+    started = conn.info.get("trace_started")
+    if span is not None and started:
+        span.add_statement((time.perf_counter() - started.pop()) * 1000)
+
+def _on_error(context):
+    started = context.connection.info.get("trace_started") if context.connection is not None else None
+    if context.cursor is not None and _current_span.get() is not None and started:
+        started.pop()
+
+def install_tracing(*engines, path=TRACE_PATH):
+    """Start exporting spans to a rotating JSON-lines file and timing the engines' statements"""
+    global _enabled
+    if not _enabled:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=TRACE_MAX_BYTES, backupCount=TRACE_BACKUP_COUNT, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        trace_logger.addHandler(handler)
+        trace_logger.setLevel(logging.INFO)
+        _enabled = True
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_execute)
+        event.listen(engine, "after_cursor_execute", _after_execute)
+        event.listen(engine, "handle_error", _on_error)
+
+def tracing_enabled() -> bool:
+    return _enabled
+
+def current_span():
+    return _current_span.get()
+
+@contextmanager
+def span(name, kind="action"):
+    """Trace the block as a user action; nested spans count towards the outermost one"""
+    if not _enabled or _current_span.get() is not None:
+        yield _current_span.get()
+        return
+    current = Span(name, kind)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.failed = True
+        raise
+    finally:
+        _current_span.reset(token)
+        current.close_handler()
+
+def traced(name, kind="action"):
+    """Decorator form of span() for event handlers"""
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            with span(name, kind):
+                return handler(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@contextmanager
+def attach(current):
+    """Run the block, possibly on another thread, as part of an existing span"""
+    if current is None:
+        yield
+        return
+    token = _current_span.set(current)
+    try:
+        yield
+    finally:
+        _current_span.reset(token)
+
+def add_rows(count):
+    """Count rows the current action loaded into the UI"""
+    current = _current_span.get()
+    if current is not None:
+        current.rows += count
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values"""
+    return values[max(math.ceil(fraction * len(values)) - 1, 0)]
+
+def summarize(paths) -> list:
+    """Return (name, count, p50, p95, p99, mean db ms, mean rows) of wall_ms per action, slowest p95 first"""
+    spans = defaultdict(list)
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if "wall_ms" in record:
+                    spans[record["name"]].append(record)
+
+    summary = []
+    for name, records in spans.items():
+        wall = sorted(record["wall_ms"] for record in records)
+        summary.append((
+            name, len(records),
+            percentile(wall, 0.50), percentile(wall, 0.95), percentile(wall, 0.99),
+            sum(record["db_ms"] for record in records) / len(records),
+            sum(record["rows"] for record in records) / len(records),
+        ))
+    return sorted(summary, key=lambda row: row[3], reverse=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.utils.tracing", description="ملخص زمن الإجراءات")
+    parser.add_argument("paths", nargs="*", default=[TRACE_PATH], help="ملفات التتبع (JSON lines)")
+    args = parser.parse_args(argv)
+
+    # Include the rotated files
+    candidates = [f"{path}.{i}" for path in args.paths for i in range(TRACE_BACKUP_COUNT, 0, -1)] + args.paths
+    paths = [path for path in candidates if os.path.exists(path)]
+    if not paths:
+        print("لا توجد ملفات تتبع", file=sys.stderr)
+        return 1
+    print(f"{'action':40} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'db ms':>8} {'rows':>7}")
+    for name, count, p50, p95, p99, db_ms, rows in summarize(paths):
+        print(f"{name:40} {count:>6} {p50:>9.1f} {p95:>9.1f} {p99:>9.1f} {db_ms:>8.1f} {rows:>7.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
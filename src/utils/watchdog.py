@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from PyQt6.QtCore import QObject, QTimer
+from src.utils import tracing
+from src.utils.config import WATCHDOG_STALL_MS, WATCHDOG_LOG_PATH
+
+logger = logging.getLogger("gym.watchdog")
+
+class EventLoopWatchdog(QObject):
+    """Measures GUI event-loop latency and captures the GUI thread's stack when it stalls.
+
+    A timer on the GUI thread beats every interval_ms; how late each beat
+    fires is the event-loop latency. A helper thread watches the beats, and
+    once none has arrived for stall_ms it samples the GUI thread's Python
+    stack with sys._current_frames(), so the log shows the handler that was
+    blocking. The stall is reported with its full length when the loop
+    beats again.
+    """
+
+    def __init__(self, stall_ms=WATCHDOG_STALL_MS, interval_ms=50, log_path=WATCHDOG_LOG_PATH, parent=None):
+        super().__init__(parent)
+        self.stall_ms = stall_ms
+        self.interval_ms = interval_ms
+        self.gui_thread_id = threading.get_ident()
+        self.latencies = deque(maxlen=1200)  # the last minute of beats
+        self.stalls = deque(maxlen=100)
+        self.last_beat = time.monotonic()
+        self._captured = None  # (beat the stall started after, stack) while stalled
+        self._stopped = threading.Event()
+        self._thread = None
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.beat)
+
+        if log_path and not logger.handlers:
+            os.makedirs(os.path.dirname(log_path) or ".", exist_ok=True)
+            handler = RotatingFileHandler(log_path, maxBytes=2 * 1024 * 1024, backupCount=3, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logger.addHandler(handler)
+
+    def start(self):
+        if self._thread is not None or self.stall_ms <= 0:
+            return
+        self.last_beat = time.monotonic()
+        self.timer.start(self.interval_ms)
+        self._thread = threading.Thread(target=self._watch, name="event-loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self.timer.stop()
+
+    def beat(self):
+        now = time.monotonic()
+        previous, self.last_beat = self.last_beat, now
+        late_ms = max((now - previous) * 1000 - self.interval_ms, 0)
+        self.latencies.append(late_ms)
+        captured, self._captured = self._captured, None
+        # A sample taken after an earlier beat is a leftover from racing that beat
+        if captured is not None and captured[0] == previous:
+            self._report(late_ms, captured[1])
+
+    def _report(self, stalled_ms, stack):
+        self.stalls.append((time.time(), stalled_ms, stack))
+        logger.warning("event loop stalled for %.0f ms; GUI thread was in:\n%s", stalled_ms, "".join(stack))
+        if tracing.tracing_enabled():
+            tracing.trace_logger.info(json.dumps({
+                "name": "stall", "kind": "stall", "start": round(time.time() - stalled_ms / 1000, 3),
+                "stalled_ms": round(stalled_ms, 3), "stack": stack[-8:],
+            }, ensure_ascii=False))
+
+    def _watch(self):
+        while not self._stopped.wait(self.interval_ms / 1000):
+            beat = self.last_beat
+            if self._captured is not None and self._captured[0] == beat:
+                continue  # Already sampled this stall
+            if (time.monotonic() - beat) * 1000 - self.interval_ms < self.stall_ms:
+                continue
+            frame = sys._current_frames().get(self.gui_thread_id)
+            if frame is not None:
+                self._captured = (beat, traceback.format_stack(frame))
+
+    def latency_percentiles(self) -> dict:
+        """p50/p95/p99 event-loop latency over the recent beats, in milliseconds"""
+        values = sorted(self.latencies)
+        if not values:
+            return {}
+        return {name: tracing.percentile(values, fraction)
+                for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))}
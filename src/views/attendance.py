@@ -1,12 +1,137 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-                               QLabel, QTableWidget, QTableWidgetItem, QComboBox,
-                               QMessageBox)
+                               QLabel, QTableView, QComboBox, QLineEdit,
+                               QListWidget, QListWidgetItem, QDialog, QMessageBox)
 from PyQt6.QtCore import Qt, QTimer
-from src.models.database import SessionLocal
+from sqlalchemy import select, func
 from src.models.member import Member
 from src.models.attendance import AttendanceRecord
+from src.models.search import search_members
+from src.services import checkin_pipeline
+from src.services.validity_cache import get_validity_cache
+from src.services.writer import get_write_service
+from src.utils.query_executor import get_executor, LoadingIndicator
+from src.utils.tracing import span, traced
+from src.views.table_model import TableColumn, PagedTableModel
 from datetime import datetime, timedelta
 
+def format_duration(row):
+    """Format the visit duration of a fetched attendance row"""
+    if not row.check_out:
+        return "-"
+    hours = (row.check_out - row.check_in).total_seconds() / 3600
+    return f"{hours:.1f} ساعة"
+
+ATTENDANCE_COLUMNS = [
+    TableColumn("الاسم", lambda row: row.full_name, Member.full_name, width=200),
+    TableColumn("وقت الدخول", lambda row: row.check_in.strftime("%Y-%m-%d %H:%M"), AttendanceRecord.check_in, width=150),
+    TableColumn(
+        "وقت الخروج",
+        lambda row: row.check_out.strftime("%Y-%m-%d %H:%M") if row.check_out else "-",
+        func.coalesce(AttendanceRecord.check_out, datetime.min),
+        width=150
+    ),
+    TableColumn("المدة", format_duration, width=100),
+    TableColumn(
+        "تم التحقق",
+        lambda row: "✓" if row.fingerprint_verified else "✗",
+        foreground=lambda row: Qt.GlobalColor.green if row.fingerprint_verified else Qt.GlobalColor.red,
+        width=100
+    ),
+]
+
+# Status line shown for each fingerprint scan
+SCAN_MESSAGES = {
+    checkin_pipeline.CHECKED_IN: ("تم تسجيل دخول {name}", "#4caf50"),
+    checkin_pipeline.CHECKED_OUT: ("تم تسجيل خروج {name}", "#ff9800"),
+    checkin_pipeline.EXPIRED: ("عضوية {name} منتهية", "#f44336"),
+    checkin_pipeline.DUPLICATE: ("تم تسجيل البصمة مسبقاً", "#757575"),
+    checkin_pipeline.UNKNOWN: ("البصمة غير معروفة", "#f44336"),
+    checkin_pipeline.ERROR: ("حدث خطأ أثناء تسجيل الحضور", "#f44336"),
+}
+
+class SelectMemberDialog(QDialog):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.member_id = None
+        self.init_ui()
+
+    def init_ui(self):
+        self.setWindowTitle("اختيار العضو")
+        self.setMinimumWidth(400)
+
+        layout = QVBoxLayout()
+
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("بحث عن عضو...")
+        self.search_input.textChanged.connect(lambda: self.search_timer.start())
+        layout.addWidget(self.search_input)
+
+        self.loading = LoadingIndicator("member-picker")
+        layout.addWidget(self.loading)
+
+        self.results = QListWidget()
+        self.results.itemDoubleClicked.connect(self.accept)
+        layout.addWidget(self.results)
+
+        # Add buttons
+        button_box = QHBoxLayout()
+        select_button = QPushButton("اختيار")
+        select_button.clicked.connect(self.accept)
+        cancel_button = QPushButton("إلغاء")
+        cancel_button.clicked.connect(self.reject)
+
+        button_box.addWidget(select_button)
+        button_box.addWidget(cancel_button)
+        layout.addLayout(button_box)
+
+        self.setLayout(layout)
+
+        # Debounce typing
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.find_members)
+
+        self.find_members()
+
+    def find_members(self):
+        """Search active members off the GUI thread"""
+        text = self.search_input.text()
+        get_executor().submit("member-picker", lambda db: self.fetch_members(db, text), self.show_members)
+
+    @staticmethod
+    def fetch_members(db, text, limit=50):
+        """Query (id, name, phone) of active members matching text"""
+        query = db.query(Member.id, Member.full_name, Member.phone).filter(Member.is_active == True)
+        if not text.strip():
+            return query.order_by(Member.full_name).limit(limit).all()
+
+        ids = search_members(db, text, limit)
+        if ids is None:
+            return query.filter(Member.full_name.ilike(f"%{text}%")).limit(limit).all()
+        rows = {row.id: row for row in query.filter(Member.id.in_(ids))}
+        return [rows[member_id] for member_id in ids if member_id in rows]
+
+    def show_members(self, rows):
+        self.results.clear()
+        for row in rows:
+            item = QListWidgetItem(f"{row.full_name} - {row.phone}")
+            item.setData(Qt.ItemDataRole.UserRole, row.id)
+            self.results.addItem(item)
+        if rows:
+            self.results.setCurrentRow(0)
+
+    def accept(self):
+        item = self.results.currentItem()
+        if item is None:
+            return
+        self.member_id = item.data(Qt.ItemDataRole.UserRole)
+        super().accept()
+
+    def done(self, result):
+        get_executor().cancel("member-picker")
+        super().done(result)
+
 class AttendanceWidget(QWidget):
     def __init__(self):
         super().__init__()
@@ -41,17 +166,34 @@ class AttendanceWidget(QWidget):
         
         layout.addLayout(header_layout)
         
-        # Create table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels([
-            "الاسم", "وقت الدخول", "وقت الخروج", "المدة", "تم التحقق"
-        ])
-        self.table.setColumnWidth(0, 200)  # Name
-        self.table.setColumnWidth(1, 150)  # Check-in
-        self.table.setColumnWidth(2, 150)  # Check-out
-        self.table.setColumnWidth(3, 100)  # Duration
-        self.table.setColumnWidth(4, 100)  # Verified
+        # Fingerprint scan status
+        self.scan_status = QLabel()
+        self.scan_status.setObjectName("scan-status")
+        self.scan_status.setVisible(False)
+        layout.addWidget(self.scan_status)
+        
+        # Loading state
+        self.loading = LoadingIndicator("attendance")
+        layout.addWidget(self.loading)
+        
+        # Create table backed by a paged model, newest check-ins first
+        self.model = PagedTableModel(
+            "attendance",
+            select(
+                AttendanceRecord.id, Member.full_name, AttendanceRecord.check_in,
+                AttendanceRecord.check_out, AttendanceRecord.fingerprint_verified
+            ).join(Member),
+            AttendanceRecord.id,
+            ATTENDANCE_COLUMNS,
+            sort_column=1,
+            descending=True,
+            change_column=AttendanceRecord.change_seq
+        )
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(1, Qt.SortOrder.DescendingOrder)
+        self.model.apply_widths(self.table)
         
         layout.addWidget(self.table)
         
@@ -90,62 +232,93 @@ class AttendanceWidget(QWidget):
         # Load initial data
         self.load_attendance()
         
-        # Update table every minute
+        # Pick up new check-ins every minute
         self.timer = QTimer()
-        self.timer.timeout.connect(self.load_attendance)
+        self.timer.timeout.connect(self.update_attendance)
         self.timer.start(60000)  # 1 minute
         
+    def filter_start_date(self):
+        """Start of the range selected in the date filter"""
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        if self.date_filter.currentText() == "اليوم":
+            return today
+        elif self.date_filter.currentText() == "الأسبوع":
+            return today - timedelta(days=7)
+        else:  # Month
+            return today - timedelta(days=30)
+        
     def load_attendance(self):
         """Load attendance records based on selected date filter"""
-        db = SessionLocal()
-        try:
-            now = datetime.utcnow()
-            
-            # Calculate date range
-            if self.date_filter.currentText() == "اليوم":
-                start_date = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            elif self.date_filter.currentText() == "الأسبوع":
-                start_date = now - timedelta(days=7)
-            else:  # Month
-                start_date = now - timedelta(days=30)
-                
-            # Get records
-            records = db.query(AttendanceRecord).join(Member).filter(
-                AttendanceRecord.check_in >= start_date
-            ).order_by(AttendanceRecord.check_in.desc()).all()
-            
-            self.table.setRowCount(len(records))
+        self.start_date = self.filter_start_date()
+        self.model.set_filters(AttendanceRecord.check_in >= self.start_date)
+        
+    @traced("timer:attendance", "timer")
+    def update_attendance(self):
+        """Apply records written since the last load; reload when the day changes"""
+        if self.filter_start_date() != self.start_date:
+            self.load_attendance()
+        else:
+            self.model.refresh_changes()
             
-            for i, record in enumerate(records):
-                self.table.setItem(i, 0, QTableWidgetItem(record.member.full_name))
-                self.table.setItem(i, 1, QTableWidgetItem(record.check_in.strftime("%Y-%m-%d %H:%M")))
-                
-                if record.check_out:
-                    self.table.setItem(i, 2, QTableWidgetItem(record.check_out.strftime("%Y-%m-%d %H:%M")))
-                    duration = record.duration
-                    if duration:
-                        hours = duration.total_seconds() / 3600
-                        self.table.setItem(i, 3, QTableWidgetItem(f"{hours:.1f} ساعة"))
-                else:
-                    self.table.setItem(i, 2, QTableWidgetItem("-"))
-                    self.table.setItem(i, 3, QTableWidgetItem("-"))
-                    
-                verified = "✓" if record.fingerprint_verified else "✗"
-                verified_item = QTableWidgetItem(verified)
-                verified_item.setForeground(
-                    Qt.GlobalColor.green if record.fingerprint_verified else Qt.GlobalColor.red
-                )
-                self.table.setItem(i, 4, verified_item)
-                
-        finally:
-            db.close()
+    def show_scan_result(self, result):
+        """Show the outcome of a fingerprint scan"""
+        message, color = SCAN_MESSAGES[result.status]
+        self.set_scan_status(message.format(name=result.member_name or ""), color)
+        if result.status in (checkin_pipeline.CHECKED_IN, checkin_pipeline.CHECKED_OUT):
+            self.update_attendance()
+
+    def set_scan_status(self, text, color="#757575"):
+        self.scan_status.setText(text)
+        self.scan_status.setStyleSheet(f"color: {color}; font-size: 16px; margin: 5px;")
+        self.scan_status.setVisible(True)
+
+    def select_member(self):
+        """Ask the user to pick a member; returns the id or None"""
+        dialog = SelectMemberDialog(self)
+        if dialog.exec() == QDialog.DialogCode.Accepted:
+            return dialog.member_id
+        return None
             
     def handle_check_in(self):
         """Handle member check-in"""
-        # TODO: Implement manual member selection for testing
-        QMessageBox.information(self, "تنبيه", "سيتم إضافة خيار اختيار العضو في التحديث القادم")
+        member_id = self.select_member()
+        if member_id is None:
+            return
+
+        validity = get_validity_cache().get(member_id)
+        if validity is None or not validity.is_valid():
+            QMessageBox.warning(self, "تنبيه", "عضوية هذا العضو منتهية")
+            return
+
+        def checked_in(record_id):
+            self.update_attendance()
+            QMessageBox.information(self, "نجاح", f"تم تسجيل دخول {validity.full_name}")
+
+        def failed(error):
+            if isinstance(error, ValueError):
+                QMessageBox.warning(self, "تنبيه", str(error))
+            else:
+                QMessageBox.critical(self, "خطأ", f"حدث خطأ: {str(error)}")
+
+        # The write is confirmed on the GUI thread once committed, so a locked database never freezes the window
+        with span("dialog:check-in", "dialog"):
+            get_executor().watch(f"check-in:{member_id}", get_write_service().check_in(member_id), checked_in, failed)
             
     def handle_check_out(self):
         """Handle member check-out"""
-        # TODO: Implement manual member selection for testing
-        QMessageBox.information(self, "تنبيه", "سيتم إضافة خيار اختيار العضو في التحديث القادم")
+        member_id = self.select_member()
+        if member_id is None:
+            return
+
+        def checked_out(record_id):
+            if record_id is None:
+                QMessageBox.warning(self, "تنبيه", "لا يوجد تسجيل دخول مفتوح لهذا العضو")
+                return
+            self.update_attendance()
+            QMessageBox.information(self, "نجاح", "تم تسجيل الخروج بنجاح")
+
+        with span("dialog:check-out", "dialog"):
+            get_executor().watch(
+                f"check-out:{member_id}", get_write_service().check_out(member_id), checked_out,
+                lambda error: QMessageBox.critical(self, "خطأ", f"حدث خطأ: {str(error)}")
+            )
@@ -1,10 +1,14 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
                                QLabel, QFrame)
 from PyQt6.QtCore import Qt, QTimer
-from src.models.database import SessionLocal
+from sqlalchemy import func
+from src.models.changes import get_change_seqs
 from src.models.member import Member
-from src.models.attendance import AttendanceRecord
 from src.models.subscription import Subscription
+from src.models.rollups import visits_on
+from src.utils.query_executor import get_executor, LoadingIndicator
+from src.utils import startup
+from src.utils.tracing import traced
 from datetime import datetime, timedelta
 
 class StatCard(QFrame):
@@ -31,6 +35,8 @@ class StatCard(QFrame):
 class DashboardWidget(QWidget):
     def __init__(self):
         super().__init__()
+        self.seen_seqs = {}  # table -> change seq the shown counts were computed at
+        self.valid_until = {}  # table -> time the shown counts go stale without any write
         self.init_ui()
         
         # Update stats every 5 minutes
@@ -46,6 +52,10 @@ class DashboardWidget(QWidget):
         title.setObjectName("dashboard-title")
         layout.addWidget(title)
         
+        # Loading state
+        self.loading = LoadingIndicator("dashboard")
+        layout.addWidget(self.loading)
+        
         # Create stats container
         stats_layout = QHBoxLayout()
         
@@ -98,36 +108,75 @@ class DashboardWidget(QWidget):
         # Initial stats update
         self.update_stats()
         
+    @traced("timer:dashboard", "timer")
     def update_stats(self):
-        """Update dashboard statistics"""
-        db = SessionLocal()
-        try:
+        """Update dashboard statistics that may have changed"""
+        seen_seqs, valid_until = dict(self.seen_seqs), dict(self.valid_until)
+        get_executor().submit(
+            "dashboard",
+            lambda db: self.fetch_stats(db, seen_seqs, valid_until),
+            self.show_stats
+        )
+        
+    @staticmethod
+    def fetch_stats(db, seen_seqs=None, valid_until=None):
+        """Recount the statistics whose table changed or whose time window moved (runs on a worker thread)"""
+        seen_seqs = seen_seqs or {}
+        valid_until = valid_until or {}
+        seqs = get_change_seqs(db)
+        now = datetime.utcnow()
+        stats = {'seqs': {}, 'valid_until': {}}
+        
+        def is_stale(table):
+            return seqs[table] != seen_seqs.get(table) or now >= valid_until.get(table, now)
+        
+        if is_stale('members'):
             # Get total members
-            total_members = db.query(Member).count()
-            self.total_members.findChild(QLabel, "stat-value").setText(str(total_members))
+            stats['total_members'] = db.query(func.count(Member.id)).scalar()
             
             # Get active members
-            now = datetime.utcnow()
-            active_members = db.query(Member).filter(
+            stats['active_members'] = db.query(func.count(Member.id)).filter(
                 Member.is_active == True,
                 Member.end_date >= now
-            ).count()
-            self.active_members.findChild(QLabel, "stat-value").setText(str(active_members))
-            
-            # Get today's attendance
-            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            today_attendance = db.query(AttendanceRecord).filter(
-                AttendanceRecord.check_in >= today_start
-            ).count()
-            self.today_attendance.findChild(QLabel, "stat-value").setText(str(today_attendance))
+            ).scalar()
             
             # Get subscriptions expiring in next 7 days
             week_later = now + timedelta(days=7)
-            expiring_soon = db.query(Member).filter(
+            stats['expiring_soon'] = db.query(func.count(Member.id)).filter(
                 Member.is_active == True,
                 Member.end_date.between(now, week_later)
-            ).count()
-            self.expiring_soon.findChild(QLabel, "stat-value").setText(str(expiring_soon))
+            ).scalar()
             
-        finally:
-            db.close()
+            # The counts change without any write when a membership expires
+            # or enters the 7 day window
+            next_expiry = db.query(func.min(Member.end_date)).filter(
+                Member.is_active == True,
+                Member.end_date >= now
+            ).scalar()
+            next_window_entry = db.query(func.min(Member.end_date)).filter(
+                Member.is_active == True,
+                Member.end_date > week_later
+            ).scalar()
+            boundaries = [next_expiry, next_window_entry and next_window_entry - timedelta(days=7)]
+            stats['seqs']['members'] = seqs['members']
+            stats['valid_until']['members'] = min(
+                (boundary for boundary in boundaries if boundary), default=datetime.max
+            )
+        
+        if is_stale('attendance_records'):
+            # Get today's attendance
+            today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            stats['today_attendance'] = visits_on(db, today_start.date())
+            stats['seqs']['attendance_records'] = seqs['attendance_records']
+            stats['valid_until']['attendance_records'] = today_start + timedelta(days=1)
+        
+        return stats
+        
+    def show_stats(self, stats):
+        """Display fetched statistics on the cards"""
+        self.seen_seqs.update(stats['seqs'])
+        self.valid_until.update(stats['valid_until'])
+        for name in ('total_members', 'active_members', 'today_attendance', 'expiring_soon'):
+            if name in stats:
+                getattr(self, name).findChild(QLabel, "stat-value").setText(str(stats[name]))
+        startup.mark("dashboard")
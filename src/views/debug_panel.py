@@ -0,0 +1,90 @@
+from datetime import datetime
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QLabel,
+                               QTableView, QTabWidget)
+from PyQt6.QtCore import QTimer
+from src.utils.sql_monitor import get_sql_monitor
+from src.views.table_model import TableColumn, RowsTableModel
+
+STATEMENT_COLUMNS = [
+    TableColumn("الاستعلام", lambda stats: " ".join(stats.statement.split()), width=600),
+    TableColumn("العدد", lambda stats: stats.count),
+    TableColumn("الإجمالي (مللي ثانية)", lambda stats: f"{stats.total_ms:.1f}"),
+    TableColumn("الأقصى (مللي ثانية)", lambda stats: f"{stats.max_ms:.1f}"),
+]
+
+ACTION_COLUMNS = [
+    TableColumn("الوقت", lambda action: datetime.fromtimestamp(action.finished_at).strftime("%H:%M:%S")),
+    TableColumn("الإجراء", lambda action: action.name, width=200),
+    TableColumn("الاستعلامات", lambda action: action.statements),
+    TableColumn("المدة (مللي ثانية)", lambda action: f"{action.total_ms:.1f}"),
+    TableColumn("تكرار مشبوه (N+1)", lambda action: "; ".join(
+        f"{count}× {' '.join(statement.split())[:80]}" for statement, count in action.repeated.items()
+    ), width=500),
+]
+
+SLOW_QUERY_COLUMNS = [
+    TableColumn("الوقت", lambda query: datetime.fromtimestamp(query.recorded_at).strftime("%H:%M:%S")),
+    TableColumn("المدة (مللي ثانية)", lambda query: f"{query.elapsed_ms:.1f}"),
+    TableColumn("الإجراء", lambda query: query.action or "-"),
+    TableColumn("الاستعلام", lambda query: " ".join(query.statement.split()), width=500),
+    TableColumn("خطة التنفيذ", lambda query: " | ".join(query.plan), width=400),
+]
+
+class SqlDebugPanel(QWidget):
+    """Statement timings, per-action counts and slow queries recorded by the SQL monitor"""
+
+    def __init__(self):
+        super().__init__()
+        self.init_ui()
+
+        # Refresh while visible
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(2000)
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        # Create header
+        header_layout = QHBoxLayout()
+        title = QLabel("مراقبة الاستعلامات")
+        title.setObjectName("page-title")
+        header_layout.addWidget(title)
+
+        reset_button = QPushButton("تصفير")
+        reset_button.clicked.connect(self.reset)
+        header_layout.addWidget(reset_button)
+        layout.addLayout(header_layout)
+
+        # One tab per view of the recorded data
+        tabs = QTabWidget()
+        self.models = {}
+        for name, label, columns in (
+            ("actions", "الإجراءات", ACTION_COLUMNS),
+            ("statements", "الاستعلامات", STATEMENT_COLUMNS),
+            ("slow", "الاستعلامات البطيئة", SLOW_QUERY_COLUMNS),
+        ):
+            table = QTableView()
+            model = RowsTableModel(columns)
+            table.setModel(model)
+            model.apply_widths(table)
+            tabs.addTab(table, label)
+            self.models[name] = model
+        layout.addWidget(tabs)
+
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        monitor = get_sql_monitor()
+        if monitor is None or not self.isVisible():
+            return
+        self.models["actions"].set_rows(list(reversed(monitor.actions)))
+        self.models["statements"].set_rows(monitor.statement_stats())
+        self.models["slow"].set_rows(list(reversed(monitor.slow_queries)))
+
+    def reset(self):
+        monitor = get_sql_monitor()
+        if monitor is not None:
+            monitor.reset()
+        self.refresh()
@@ -1,15 +1,26 @@
+import importlib
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
                                QHBoxLayout, QPushButton, QLabel, QStackedWidget)
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, pyqtSignal
 from .login import LoginWidget
-from .dashboard import DashboardWidget
-from .members import MembersWidget
-from .attendance import AttendanceWidget
-from .subscriptions import SubscriptionsWidget
-from .reports import ReportsWidget
-from .settings import SettingsWidget
+from src.services.fingerprint import open_reader
+from src.services.checkin_pipeline import CheckInPipeline
+from src.services.backup import BackupScheduler
+from src.services.writer import stop_write_service
+from src.utils.export_runner import shutdown_export_runner
+from src.utils import startup, tracing
+from src.utils.sql_monitor import sql_action, get_sql_monitor
+
+def page_factory(module, class_name):
+    """Factory that imports a page's module only when the page is first built"""
+    def create():
+        return getattr(importlib.import_module(f".{module}", __package__), class_name)()
+    return create
 
 class MainWindow(QMainWindow):
+    # Carries ScanResults from the pipeline thread to the GUI thread
+    scan_result = pyqtSignal(object)
+    
     def __init__(self):
         super().__init__()
         self.initUI()
@@ -41,6 +52,14 @@ class MainWindow(QMainWindow):
         # Show login screen first
         self.show_login()
         
+        # Start listening to the fingerprint device
+        self.pipeline = None
+        self.start_checkin_pipeline()
+        
+        # Back the database up in the background
+        self.backup_scheduler = BackupScheduler()
+        self.backup_scheduler.start()
+        
     def create_sidebar(self):
         sidebar = QWidget()
         sidebar.setObjectName("sidebar")
@@ -53,6 +72,7 @@ class MainWindow(QMainWindow):
         self.subscriptions_btn = self.create_nav_button("الاشتراكات")
         self.reports_btn = self.create_nav_button("التقارير")
         self.settings_btn = self.create_nav_button("الإعدادات")
+        self.sql_btn = self.create_nav_button("مراقبة الاستعلامات")
         
         # Add buttons to layout
         sidebar_layout.addWidget(self.dashboard_btn)
@@ -62,14 +82,16 @@ class MainWindow(QMainWindow):
         sidebar_layout.addWidget(self.reports_btn)
         sidebar_layout.addStretch()
         sidebar_layout.addWidget(self.settings_btn)
+        sidebar_layout.addWidget(self.sql_btn)
         
         # Connect buttons
-        self.dashboard_btn.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.dashboard))
-        self.members_btn.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.members))
-        self.attendance_btn.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.attendance))
-        self.subscriptions_btn.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.subscriptions))
-        self.reports_btn.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.reports))
-        self.settings_btn.clicked.connect(lambda: self.stacked_widget.setCurrentWidget(self.settings))
+        self.dashboard_btn.clicked.connect(lambda: self.show_page("dashboard"))
+        self.members_btn.clicked.connect(lambda: self.show_page("members"))
+        self.attendance_btn.clicked.connect(lambda: self.show_page("attendance"))
+        self.subscriptions_btn.clicked.connect(lambda: self.show_page("subscriptions"))
+        self.reports_btn.clicked.connect(lambda: self.show_page("reports"))
+        self.settings_btn.clicked.connect(lambda: self.show_page("settings"))
+        self.sql_btn.clicked.connect(lambda: self.show_page("sql"))
         
         return sidebar
     
@@ -80,23 +102,65 @@ class MainWindow(QMainWindow):
         return button
     
     def init_widgets(self):
-        # Create all main widgets
+        # Only the login screen is built up front; the other pages load
+        # their data when constructed, so each is built on first navigation
         self.login = LoginWidget(self)
-        self.dashboard = DashboardWidget()
-        self.members = MembersWidget()
-        self.attendance = AttendanceWidget()
-        self.subscriptions = SubscriptionsWidget()
-        self.reports = ReportsWidget()
-        self.settings = SettingsWidget()
-        
-        # Add widgets to stacked widget
         self.stacked_widget.addWidget(self.login)
-        self.stacked_widget.addWidget(self.dashboard)
-        self.stacked_widget.addWidget(self.members)
-        self.stacked_widget.addWidget(self.attendance)
-        self.stacked_widget.addWidget(self.subscriptions)
-        self.stacked_widget.addWidget(self.reports)
-        self.stacked_widget.addWidget(self.settings)
+        
+        self.pages = {}
+        self.page_factories = {
+            "dashboard": page_factory("dashboard", "DashboardWidget"),
+            "members": page_factory("members", "MembersWidget"),
+            "attendance": self.create_attendance_page,
+            "subscriptions": page_factory("subscriptions", "SubscriptionsWidget"),
+            "reports": page_factory("reports", "ReportsWidget"),
+            "settings": page_factory("settings", "SettingsWidget"),
+            "sql": page_factory("debug_panel", "SqlDebugPanel"),
+        }
+        
+    def page(self, name):
+        """Return a page, building it the first time it is needed"""
+        page = self.pages.get(name)
+        if page is None:
+            with sql_action(f"page:{name}"):
+                page = self.pages[name] = self.page_factories[name]()
+            self.stacked_widget.addWidget(page)
+        return page
+        
+    def show_page(self, name):
+        with tracing.span(f"nav:{name}", "navigation"):
+            self.stacked_widget.setCurrentWidget(self.page(name))
+        
+    def create_attendance_page(self):
+        from .attendance import AttendanceWidget
+        
+        page = AttendanceWidget()
+        if self.reader_error:
+            page.set_scan_status(f"جهاز البصمة غير متصل: {self.reader_error}", "#f44336")
+        return page
+    
+    def start_checkin_pipeline(self):
+        """Process fingerprint scans in the background"""
+        self.reader_error = None
+        try:
+            reader = open_reader()
+        except Exception as e:
+            self.reader_error = str(e)
+            return
+        self.scan_result.connect(self.show_scan_result)
+        self.pipeline = CheckInPipeline(reader, on_result=self.scan_result.emit)
+        self.pipeline.start()
+        
+    def show_scan_result(self, result):
+        self.page("attendance").show_scan_result(result)
+        
+    def closeEvent(self, event):
+        if self.pipeline:
+            self.pipeline.stop()
+        self.backup_scheduler.stop()
+        stop_write_service()
+        shutdown_export_runner()
+        super().closeEvent(event)
     
     def show_login(self):
         """Show login screen and hide sidebar"""
@@ -107,16 +171,20 @@ class MainWindow(QMainWindow):
         self.subscriptions_btn.setVisible(False)
         self.reports_btn.setVisible(False)
         self.settings_btn.setVisible(False)
+        self.sql_btn.setVisible(False)
     
     def show_dashboard(self):
         """Show dashboard and sidebar after successful login"""
-        self.stacked_widget.setCurrentWidget(self.dashboard)
+        startup.login_accepted()
+        self.show_page("dashboard")
         self.dashboard_btn.setVisible(True)
         self.members_btn.setVisible(True)
         self.attendance_btn.setVisible(True)
         self.subscriptions_btn.setVisible(True)
         self.reports_btn.setVisible(True)
         self.settings_btn.setVisible(True)
+        # Only when DEBUG installed the SQL monitor
+        self.sql_btn.setVisible(get_sql_monitor() is not None)
         
     def apply_stylesheet(self):
         """Apply custom styling to the application"""
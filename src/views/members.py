@@ -1,14 +1,42 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-                               QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
+                               QLabel, QLineEdit, QTableView, QAbstractItemView,
                                QComboBox, QMessageBox, QDialog, QFormLayout,
-                               QDateEdit, QTextEdit)
-from PyQt6.QtCore import Qt, QDate
+                               QDateEdit, QTextEdit, QFileDialog, QProgressDialog)
+from PyQt6.QtCore import Qt, QDate, QTimer
+from sqlalchemy import select, func, or_, case
 from src.models.database import SessionLocal
 from src.models.member import Member, MembershipType
 from src.models.user import User
+from src.models.search import search_members
+from src.services.card_print import print_cards
+from src.utils.export_runner import get_export_runner
+from src.utils.query_executor import get_executor, LoadingIndicator
+from src.utils.tracing import span
+from src.views.table_model import TableColumn, PagedTableModel
 from datetime import datetime, timedelta
 import bcrypt
 
+def is_membership_valid(row) -> bool:
+    """Same rule as Member.is_membership_valid, evaluated on a fetched row"""
+    now = datetime.utcnow()
+    frozen = row.frozen_until is not None and now < row.frozen_until
+    return row.is_active and not frozen and row.start_date <= now <= row.end_date
+
+MEMBER_COLUMNS = [
+    TableColumn("الاسم", lambda row: row.full_name, Member.full_name, width=200),
+    TableColumn("رقم الهاتف", lambda row: row.phone, Member.phone),
+    TableColumn("البريد الإلكتروني", lambda row: row.email or "", func.coalesce(Member.email, ""), width=200),
+    TableColumn("نوع العضوية", lambda row: row.membership_type.value, Member.membership_type),
+    TableColumn("تاريخ البدء", lambda row: row.start_date.strftime("%Y-%m-%d"), Member.start_date),
+    TableColumn("تاريخ الانتهاء", lambda row: row.end_date.strftime("%Y-%m-%d"), Member.end_date),
+    TableColumn(
+        "الحالة",
+        lambda row: "نشط" if is_membership_valid(row) else "منتهي",
+        foreground=lambda row: Qt.GlobalColor.green if is_membership_valid(row) else Qt.GlobalColor.red,
+        width=100
+    ),
+]
+
 class AddMemberDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -79,28 +107,45 @@ class MembersWidget(QWidget):
         add_button.clicked.connect(self.show_add_member_dialog)
         header_layout.addWidget(add_button)
         
-        # Add search box
+        # Print the selected members' cards
+        print_cards_button = QPushButton("طباعة البطاقات")
+        print_cards_button.setObjectName("primary-button")
+        print_cards_button.clicked.connect(self.print_selected_cards)
+        header_layout.addWidget(print_cards_button)
+        
+        # Add search box; queries run once typing pauses
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("بحث عن عضو...")
-        self.search_input.textChanged.connect(self.filter_members)
+        self.search_timer = QTimer()
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.filter_members)
+        self.search_input.textChanged.connect(self.search_timer.start)
         header_layout.addWidget(self.search_input)
         
         layout.addLayout(header_layout)
         
-        # Create table
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "الاسم", "رقم الهاتف", "البريد الإلكتروني",
-            "نوع العضوية", "تاريخ البدء", "تاريخ الانتهاء", "الحالة"
-        ])
-        self.table.setColumnWidth(0, 200)  # Name
-        self.table.setColumnWidth(1, 120)  # Phone
-        self.table.setColumnWidth(2, 200)  # Email
-        self.table.setColumnWidth(3, 120)  # Membership Type
-        self.table.setColumnWidth(4, 120)  # Start Date
-        self.table.setColumnWidth(5, 120)  # End Date
-        self.table.setColumnWidth(6, 100)  # Status
+        # Loading state
+        self.loading = LoadingIndicator("members", "member-search")
+        layout.addWidget(self.loading)
+        
+        # Create table backed by a paged model
+        self.model = PagedTableModel(
+            "members",
+            select(
+                Member.id, Member.full_name, Member.phone, Member.email, Member.membership_type,
+                Member.start_date, Member.end_date, Member.is_active, Member.frozen_until
+            ),
+            Member.id,
+            MEMBER_COLUMNS
+        )
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        self.model.apply_widths(self.table)
         
         layout.addWidget(self.table)
         
@@ -130,12 +175,12 @@ class MembersWidget(QWidget):
                 border-radius: 4px;
                 margin: 5px;
             }
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ddd;
                 border-radius: 4px;
                 background-color: white;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
             }
         """)
@@ -145,26 +190,7 @@ class MembersWidget(QWidget):
         
     def load_members(self):
         """Load members from database into table"""
-        db = SessionLocal()
-        try:
-            members = db.query(Member).all()
-            self.table.setRowCount(len(members))
-            
-            for i, member in enumerate(members):
-                self.table.setItem(i, 0, QTableWidgetItem(member.full_name))
-                self.table.setItem(i, 1, QTableWidgetItem(member.phone))
-                self.table.setItem(i, 2, QTableWidgetItem(member.email or ""))
-                self.table.setItem(i, 3, QTableWidgetItem(member.membership_type.value))
-                self.table.setItem(i, 4, QTableWidgetItem(member.start_date.strftime("%Y-%m-%d")))
-                self.table.setItem(i, 5, QTableWidgetItem(member.end_date.strftime("%Y-%m-%d")))
-                
-                status = "نشط" if member.is_membership_valid() else "منتهي"
-                status_item = QTableWidgetItem(status)
-                status_item.setForeground(Qt.GlobalColor.green if status == "نشط" else Qt.GlobalColor.red)
-                self.table.setItem(i, 6, status_item)
-                
-        finally:
-            db.close()
+        self.model.refresh()
             
     def show_add_member_dialog(self):
         """Show dialog for adding new member"""
@@ -186,24 +212,88 @@ class MembersWidget(QWidget):
             
             db = SessionLocal()
             try:
-                db.add(member)
-                db.commit()
+                with span("dialog:add-member", "dialog"):
+                    db.add(member)
+                    db.commit()
+                    self.load_members()
                 QMessageBox.information(self, "نجاح", "تم إضافة العضو بنجاح")
-                self.load_members()
             except Exception as e:
                 db.rollback()
                 QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء إضافة العضو: {str(e)}")
             finally:
                 db.close()
                 
+    def print_selected_cards(self):
+        """Lay out the selected members' cards into a PDF in a worker process"""
+        member_ids = [self.model.rows[index.row()].id for index in self.table.selectionModel().selectedRows()]
+        if not member_ids:
+            QMessageBox.information(self, "طباعة البطاقات", "اختر الأعضاء المراد طباعة بطاقاتهم أولاً")
+            return
+        
+        path, _ = QFileDialog.getSaveFileName(self, "طباعة البطاقات", "cards.pdf", "PDF (*.pdf)")
+        if not path:
+            return
+        if not path.lower().endswith(".pdf"):
+            path = f"{path}.pdf"
+        
+        job = get_export_runner().start_job(print_cards, member_ids, path)
+        job.setParent(self)
+        
+        progress = QProgressDialog("جاري تجهيز البطاقات...", "إلغاء", 0, 0, self)
+        progress.setWindowTitle("طباعة البطاقات")
+        progress.setMinimumDuration(0)
+        progress.canceled.connect(job.cancel)
+        
+        def show_progress(written, total):
+            progress.setMaximum(max(total, 1))
+            progress.setValue(written)
+            
+        def finish(message=None):
+            progress.canceled.disconnect(job.cancel)
+            progress.close()
+            job.deleteLater()
+            if message:
+                QMessageBox.information(self, "طباعة البطاقات", message)
+                
+        def fail(error):
+            finish()
+            QMessageBox.critical(self, "خطأ", f"فشلت طباعة البطاقات: {error}")
+                
+        job.progress.connect(show_progress)
+        job.finished.connect(lambda written: finish(f"تم تجهيز {written} بطاقة في {path}"))
+        job.cancelled.connect(lambda: finish("تم إلغاء الطباعة"))
+        job.failed.connect(fail)
+        
     def filter_members(self):
         """Filter members table based on search input"""
-        search_text = self.search_input.text().lower()
-        for row in range(self.table.rowCount()):
-            show_row = False
-            for col in range(self.table.columnCount()):
-                item = self.table.item(row, col)
-                if item and search_text in item.text().lower():
-                    show_row = True
-                    break
-            self.table.setRowHidden(row, not show_row)
+        search_text = self.search_input.text().strip()
+        if not search_text:
+            get_executor().cancel("member-search")
+            self.model.set_filters()
+            return
+        
+        get_executor().submit(
+            "member-search",
+            lambda db: search_members(db, search_text),
+            lambda member_ids: self.show_search_results(search_text, member_ids)
+        )
+        
+    def show_search_results(self, search_text, member_ids):
+        """Show ranked search results, or fall back to a LIKE filter without the index"""
+        if member_ids is None:
+            pattern = f"%{search_text}%"
+            self.model.set_filters(or_(
+                Member.full_name.ilike(pattern),
+                Member.phone.ilike(pattern),
+                Member.email.ilike(pattern)
+            ))
+            return
+        
+        if not member_ids:
+            self.model.set_filters(Member.id.in_([]))
+            return
+        
+        # Drop any column sort so rows keep their search rank
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        rank = case({member_id: i for i, member_id in enumerate(member_ids)}, value=Member.id, else_=len(member_ids))
+        self.model.set_filters(Member.id.in_(member_ids), rank=rank)
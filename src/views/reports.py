@@ -1,14 +1,64 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-                               QLabel, QTableWidget, QTableWidgetItem, QComboBox,
+                               QLabel, QTableView, QComboBox,
                                QMessageBox, QDialog, QFormLayout, QLineEdit,
-                               QDateEdit)
+                               QDateEdit, QFileDialog, QProgressDialog)
 from PyQt6.QtCore import Qt, QDate
-from src.models.database import SessionLocal
+from sqlalchemy import select, func
 from src.models.member import Member
 from src.models.attendance import AttendanceRecord
 from src.models.subscription import Subscription
+from src.services.report_cache import cached_report
+from src.services.export import FORMATS
+from src.utils.export_runner import get_export_runner
+from src.utils.query_executor import get_executor, LoadingIndicator
+from src.views.table_model import TableColumn, RowsTableModel, PagedTableModel
+from collections import namedtuple
 from datetime import datetime, timedelta
-import pandas as pd
+
+ATTENDANCE_REPORT_COLUMNS = [
+    TableColumn("التاريخ", lambda row: row.check_in.strftime("%Y-%m-%d %H:%M"), AttendanceRecord.check_in),
+    TableColumn("العضو", lambda row: row.full_name, Member.full_name, width=200),
+    TableColumn("نوع التقرير", lambda row: "الحضور"),
+    TableColumn("القيمة", lambda row: "1", width=100),
+    TableColumn("ملاحظات", lambda row: row.notes or "", func.coalesce(AttendanceRecord.notes, ""), width=200),
+]
+
+SUBSCRIPTIONS_REPORT_COLUMNS = [
+    TableColumn("التاريخ", lambda row: row.start_date.strftime("%Y-%m-%d"), Subscription.start_date),
+    TableColumn("العضو", lambda row: row.full_name, Member.full_name, width=200),
+    TableColumn("نوع التقرير", lambda row: "الاشتراكات"),
+    TableColumn("القيمة", lambda row: f"{row.amount:.2f}", Subscription.amount, width=100),
+    TableColumn("ملاحظات", lambda row: row.notes or "", func.coalesce(Subscription.notes, ""), width=200),
+]
+
+ATTENDANCE_SUMMARY_COLUMNS = [
+    TableColumn("الفترة", lambda row: row.period),
+    TableColumn("عدد الزيارات", lambda row: str(row.visits)),
+    TableColumn("الإجمالي التراكمي", lambda row: str(row.visits_total)),
+]
+
+REVENUE_REPORT_COLUMNS = [
+    TableColumn("الفترة", lambda row: row.period),
+    TableColumn("عدد الاشتراكات", lambda row: str(row.subscriptions)),
+    TableColumn("الإيرادات", lambda row: f"{row.amount:.2f}"),
+    TableColumn("الإجمالي التراكمي", lambda row: f"{row.amount_total:.2f}"),
+]
+
+# Export name of each report type
+REPORT_EXPORTS = {
+    "الحضور": "attendance",
+    "ملخص الحضور": "attendance_summary",
+    "الاشتراكات": "subscriptions",
+    "الإيرادات": "revenue",
+}
+
+# Grouping choices for the summary reports
+REPORT_BUCKETS = {"يومي": "day", "أسبوعي": "week", "شهري": "month"}
+
+def report_rows(columns):
+    """Turn a columnar report result into rows for a table model"""
+    Row = namedtuple("Row", columns.keys())
+    return [Row(*values) for values in zip(*columns.values())]
 
 class ReportsWidget(QWidget):
     def __init__(self):
@@ -26,10 +76,16 @@ class ReportsWidget(QWidget):
         
         # Report type selector
         self.report_type = QComboBox()
-        self.report_type.addItems(["الحضور", "الاشتراكات", "الإيرادات"])
+        self.report_type.addItems(["الحضور", "ملخص الحضور", "الاشتراكات", "الإيرادات"])
         self.report_type.currentTextChanged.connect(self.load_report)
         header_layout.addWidget(self.report_type)
         
+        # Grouping for the summary reports
+        self.bucket = QComboBox()
+        self.bucket.addItems(list(REPORT_BUCKETS))
+        self.bucket.currentTextChanged.connect(self.load_report)
+        header_layout.addWidget(self.bucket)
+        
         # Date range selector
         self.start_date = QDateEdit()
         self.start_date.setDate(QDate.currentDate().addMonths(-1))
@@ -46,19 +102,43 @@ class ReportsWidget(QWidget):
         refresh_button.clicked.connect(self.load_report)
         header_layout.addWidget(refresh_button)
         
+        # Export button
+        export_button = QPushButton("تصدير")
+        export_button.clicked.connect(self.export_report)
+        header_layout.addWidget(export_button)
+        
         layout.addLayout(header_layout)
         
+        # Loading state
+        self.loading = LoadingIndicator("reports")
+        layout.addWidget(self.loading)
+        
+        # Create report models; they share the "reports" key so switching
+        # report type supersedes any page still being fetched
+        self.attendance_model = PagedTableModel(
+            "reports",
+            select(
+                AttendanceRecord.id, AttendanceRecord.check_in, Member.full_name, AttendanceRecord.notes
+            ).join(Member),
+            AttendanceRecord.id,
+            ATTENDANCE_REPORT_COLUMNS
+        )
+        self.subscriptions_model = PagedTableModel(
+            "reports",
+            select(
+                Subscription.id, Subscription.start_date, Member.full_name,
+                Subscription.amount, Subscription.notes
+            ).join(Member),
+            Subscription.id,
+            SUBSCRIPTIONS_REPORT_COLUMNS
+        )
+        self.attendance_summary_model = RowsTableModel(ATTENDANCE_SUMMARY_COLUMNS)
+        self.revenue_model = RowsTableModel(REVENUE_REPORT_COLUMNS)
+        
         # Create table
-        self.table = QTableWidget()
-        self.table.setColumnCount(5)
-        self.table.setHorizontalHeaderLabels([
-            "التاريخ", "العضو", "نوع التقرير", "القيمة", "ملاحظات"
-        ])
-        self.table.setColumnWidth(0, 120)  # Date
-        self.table.setColumnWidth(1, 200)  # Member
-        self.table.setColumnWidth(2, 120)  # Report Type
-        self.table.setColumnWidth(3, 100)  # Value
-        self.table.setColumnWidth(4, 200)  # Notes
+        self.table = QTableView()
+        self.table.setModel(self.attendance_model)
+        self.attendance_model.apply_widths(self.table)
         
         layout.addWidget(self.table)
         
@@ -89,66 +169,84 @@ class ReportsWidget(QWidget):
         start_date = self.start_date.date().toPyDate()
         end_date = self.end_date.date().toPyDate()
         
-        db = SessionLocal()
-        try:
-            if report_type == "الحضور":
-                self.load_attendance_report(db, start_date, end_date)
-            elif report_type == "الاشتراكات":
-                self.load_subscriptions_report(db, start_date, end_date)
-            elif report_type == "الإيرادات":
-                self.load_revenue_report(db, start_date, end_date)
-        finally:
-            db.close()
+        if report_type == "الحضور":
+            self.show_model(self.attendance_model)
+            self.attendance_model.set_filters(
+                AttendanceRecord.check_in >= start_date,
+                AttendanceRecord.check_in < end_date + timedelta(days=1)
+            )
+        elif report_type == "ملخص الحضور":
+            self.show_model(self.attendance_summary_model)
+            self.run_summary("attendance", self.attendance_summary_model, start_date, end_date)
+        elif report_type == "الاشتراكات":
+            self.show_model(self.subscriptions_model)
+            self.subscriptions_model.set_filters(
+                Subscription.start_date >= start_date,
+                Subscription.start_date < end_date + timedelta(days=1)
+            )
+        elif report_type == "الإيرادات":
+            self.show_model(self.revenue_model)
+            self.run_summary("revenue", self.revenue_model, start_date, end_date)
             
-    def load_attendance_report(self, db, start_date, end_date):
-        """Load attendance report"""
-        records = db.query(AttendanceRecord).filter(
-            AttendanceRecord.check_in >= start_date,
-            AttendanceRecord.check_in <= end_date
-        ).all()
-        
-        self.table.setRowCount(len(records))
-        for i, record in enumerate(records):
-            self.table.setItem(i, 0, QTableWidgetItem(record.check_in.strftime("%Y-%m-%d %H:%M")))
-            self.table.setItem(i, 1, QTableWidgetItem(record.member.full_name))
-            self.table.setItem(i, 2, QTableWidgetItem("الحضور"))
-            self.table.setItem(i, 3, QTableWidgetItem("1"))
-            self.table.setItem(i, 4, QTableWidgetItem(record.notes or ""))
+    def run_summary(self, name, model, start_date, end_date):
+        """Run an aggregated report from the report engine into a model"""
+        bucket = REPORT_BUCKETS[self.bucket.currentText()]
+        get_executor().submit(
+            "reports",
+            lambda db: cached_report(db, name, start_date, end_date, bucket),
+            lambda columns: model.set_rows(report_rows(columns))
+        )
             
-    def load_subscriptions_report(self, db, start_date, end_date):
-        """Load subscriptions report"""
-        subscriptions = db.query(Subscription).filter(
-            Subscription.start_date >= start_date,
-            Subscription.start_date <= end_date
-        ).all()
-        
-        self.table.setRowCount(len(subscriptions))
-        for i, subscription in enumerate(subscriptions):
-            self.table.setItem(i, 0, QTableWidgetItem(subscription.start_date.strftime("%Y-%m-%d")))
-            self.table.setItem(i, 1, QTableWidgetItem(subscription.member.full_name))
-            self.table.setItem(i, 2, QTableWidgetItem("الاشتراكات"))
-            self.table.setItem(i, 3, QTableWidgetItem(f"{subscription.amount:.2f}"))
-            self.table.setItem(i, 4, QTableWidgetItem(subscription.notes or ""))
+    def show_model(self, model):
+        """Attach a report model to the table; sorting only applies to paged models"""
+        if self.table.model() is not model:
+            self.table.setSortingEnabled(False)
+            self.table.setModel(model)
+            model.apply_widths(self.table)
+        self.table.setSortingEnabled(isinstance(model, PagedTableModel))
+        self.bucket.setEnabled(not isinstance(model, PagedTableModel))
+        
+    def export_report(self):
+        """Export the selected report to CSV, Excel or PDF in a worker process"""
+        path, selected_filter = QFileDialog.getSaveFileName(
+            self, "تصدير التقرير", "", ";;".join(FORMATS.values())
+        )
+        if not path:
+            return
+        extension = next(ext for ext, file_filter in FORMATS.items() if file_filter == selected_filter)
+        if not path.lower().endswith(f".{extension}"):
+            path = f"{path}.{extension}"
             
-    def load_revenue_report(self, db, start_date, end_date):
-        """Load revenue report"""
-        subscriptions = db.query(Subscription).filter(
-            Subscription.start_date >= start_date,
-            Subscription.start_date <= end_date
-        ).all()
-        
-        df = pd.DataFrame([{
-            "date": sub.start_date,
-            "amount": sub.amount
-        } for sub in subscriptions])
-        
-        if not df.empty:
-            df = df.groupby(pd.Grouper(key="date", freq="D")).sum().reset_index()
+        job = get_export_runner().start(
+            REPORT_EXPORTS[self.report_type.currentText()],
+            self.start_date.date().toPyDate(),
+            self.end_date.date().toPyDate(),
+            REPORT_BUCKETS[self.bucket.currentText()],
+            path
+        )
+        job.setParent(self)
+        
+        progress = QProgressDialog("جاري تصدير التقرير...", "إلغاء", 0, 0, self)
+        progress.setWindowTitle("تصدير")
+        progress.setMinimumDuration(0)
+        progress.canceled.connect(job.cancel)
+        
+        def show_progress(written, total):
+            progress.setMaximum(max(total, 1))
+            progress.setValue(written)
             
-        self.table.setRowCount(len(df))
-        for i, row in df.iterrows():
-            self.table.setItem(i, 0, QTableWidgetItem(row["date"].strftime("%Y-%m-%d")))
-            self.table.setItem(i, 1, QTableWidgetItem(""))
-            self.table.setItem(i, 2, QTableWidgetItem("الإيرادات"))
-            self.table.setItem(i, 3, QTableWidgetItem(f"{row['amount']:.2f}"))
-            self.table.setItem(i, 4, QTableWidgetItem(""))
+        def finish(message=None):
+            progress.canceled.disconnect(job.cancel)
+            progress.close()
+            job.deleteLater()
+            if message:
+                QMessageBox.information(self, "تصدير", message)
+                
+        def fail(error):
+            finish()
+            QMessageBox.critical(self, "خطأ", f"فشل التصدير: {error}")
+                
+        job.progress.connect(show_progress)
+        job.finished.connect(lambda written: finish(f"تم تصدير {written} سجل إلى {path}"))
+        job.cancelled.connect(lambda: finish("تم إلغاء التصدير"))
+        job.failed.connect(fail)
@@ -1,13 +1,52 @@
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
-                               QLabel, QTableWidget, QTableWidgetItem, QComboBox,
+                               QLabel, QTableView, QComboBox,
                                QMessageBox, QDialog, QFormLayout, QLineEdit,
                                QDateEdit)
 from PyQt6.QtCore import Qt, QDate
-from src.models.database import SessionLocal
+from sqlalchemy import select
 from src.models.member import Member, MembershipType
 from src.models.subscription import Subscription
+from src.services.writer import get_write_service
+from src.utils.query_executor import get_executor, LoadingIndicator
+from src.utils.tracing import span
+from src.views.table_model import TableColumn, PagedTableModel
 from datetime import datetime
 
+def days_remaining(row) -> int:
+    """Same rule as Subscription.days_remaining, evaluated on a fetched row"""
+    now = datetime.utcnow()
+    if now > row.end_date:
+        return 0
+    return (row.end_date - now).days
+
+def is_subscription_active(row) -> bool:
+    """Same rule as Subscription.is_active, evaluated on a fetched row"""
+    now = datetime.utcnow()
+    return row.payment_status == 'paid' and row.start_date <= now <= row.end_date
+
+def days_remaining_color(row):
+    days = days_remaining(row)
+    if days <= 0:
+        return Qt.GlobalColor.red
+    elif days <= 7:
+        return Qt.GlobalColor.darkYellow
+    return None
+
+SUBSCRIPTION_COLUMNS = [
+    TableColumn("العضو", lambda row: row.full_name, Member.full_name, width=200),
+    TableColumn("نوع الاشتراك", lambda row: row.type.value, Subscription.type),
+    TableColumn("المبلغ", lambda row: f"{row.amount:.2f}", Subscription.amount, width=100),
+    TableColumn("تاريخ البدء", lambda row: row.start_date.strftime("%Y-%m-%d"), Subscription.start_date),
+    TableColumn("تاريخ الانتهاء", lambda row: row.end_date.strftime("%Y-%m-%d"), Subscription.end_date),
+    TableColumn("الأيام المتبقية", lambda row: str(days_remaining(row)), Subscription.end_date, days_remaining_color),
+    TableColumn(
+        "الحالة",
+        lambda row: "نشط" if is_subscription_active(row) else "منتهي",
+        foreground=lambda row: Qt.GlobalColor.green if is_subscription_active(row) else Qt.GlobalColor.red,
+        width=100
+    ),
+]
+
 class AddSubscriptionDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -61,13 +100,17 @@ class AddSubscriptionDialog(QDialog):
         
     def load_members(self):
         """Load members into combo box"""
-        db = SessionLocal()
-        try:
-            members = db.query(Member).filter(Member.is_active == True).all()
-            for member in members:
-                self.member_combo.addItem(member.full_name, member.id)
-        finally:
-            db.close()
+        get_executor().submit("subscription-members", self.fetch_members, self.populate_members)
+        
+    @staticmethod
+    def fetch_members(db):
+        """Query active member names (runs on a worker thread)"""
+        return db.query(Member.full_name, Member.id).filter(Member.is_active == True).all()
+        
+    def populate_members(self, members):
+        """Fill the member combo box"""
+        for full_name, member_id in members:
+            self.member_combo.addItem(full_name, member_id)
 
 class SubscriptionsWidget(QWidget):
     def __init__(self):
@@ -97,20 +140,27 @@ class SubscriptionsWidget(QWidget):
         
         layout.addLayout(header_layout)
         
-        # Create table
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)
-        self.table.setHorizontalHeaderLabels([
-            "العضو", "نوع الاشتراك", "المبلغ", "تاريخ البدء",
-            "تاريخ الانتهاء", "الأيام المتبقية", "الحالة"
-        ])
-        self.table.setColumnWidth(0, 200)  # Member
-        self.table.setColumnWidth(1, 120)  # Type
-        self.table.setColumnWidth(2, 100)  # Amount
-        self.table.setColumnWidth(3, 120)  # Start Date
-        self.table.setColumnWidth(4, 120)  # End Date
-        self.table.setColumnWidth(5, 120)  # Days Remaining
-        self.table.setColumnWidth(6, 100)  # Status
+        # Loading state
+        self.loading = LoadingIndicator("subscriptions")
+        layout.addWidget(self.loading)
+        
+        # Create table backed by a paged model, newest subscriptions first
+        self.model = PagedTableModel(
+            "subscriptions",
+            select(
+                Subscription.id, Member.full_name, Subscription.type, Subscription.amount,
+                Subscription.start_date, Subscription.end_date, Subscription.payment_status
+            ).join(Member),
+            Subscription.id,
+            SUBSCRIPTION_COLUMNS,
+            sort_column=3,
+            descending=True
+        )
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(3, Qt.SortOrder.DescendingOrder)
+        self.model.apply_widths(self.table)
         
         layout.addWidget(self.table)
         
@@ -147,43 +197,13 @@ class SubscriptionsWidget(QWidget):
         
     def load_subscriptions(self):
         """Load subscriptions into table"""
-        db = SessionLocal()
-        try:
-            query = db.query(Subscription).join(Member)
-            
-            # Apply filter
-            if self.status_filter.currentText() == "نشط":
-                query = query.filter(Subscription.end_date >= datetime.utcnow())
-            elif self.status_filter.currentText() == "منتهي":
-                query = query.filter(Subscription.end_date < datetime.utcnow())
-                
-            subscriptions = query.order_by(Subscription.start_date.desc()).all()
-            self.table.setRowCount(len(subscriptions))
-            
-            for i, subscription in enumerate(subscriptions):
-                self.table.setItem(i, 0, QTableWidgetItem(subscription.member.full_name))
-                self.table.setItem(i, 1, QTableWidgetItem(subscription.type.value))
-                self.table.setItem(i, 2, QTableWidgetItem(f"{subscription.amount:.2f}"))
-                self.table.setItem(i, 3, QTableWidgetItem(subscription.start_date.strftime("%Y-%m-%d")))
-                self.table.setItem(i, 4, QTableWidgetItem(subscription.end_date.strftime("%Y-%m-%d")))
-                
-                days_remaining = subscription.days_remaining
-                days_item = QTableWidgetItem(str(days_remaining))
-                if days_remaining <= 0:
-                    days_item.setForeground(Qt.GlobalColor.red)
-                elif days_remaining <= 7:
-                    days_item.setForeground(Qt.GlobalColor.darkYellow)
-                self.table.setItem(i, 5, days_item)
-                
-                status = "نشط" if subscription.is_active else "منتهي"
-                status_item = QTableWidgetItem(status)
-                status_item.setForeground(
-                    Qt.GlobalColor.green if subscription.is_active else Qt.GlobalColor.red
-                )
-                self.table.setItem(i, 6, status_item)
-                
-        finally:
-            db.close()
+        # Apply filter
+        if self.status_filter.currentText() == "نشط":
+            self.model.set_filters(Subscription.end_date >= datetime.utcnow())
+        elif self.status_filter.currentText() == "منتهي":
+            self.model.set_filters(Subscription.end_date < datetime.utcnow())
+        else:
+            self.model.set_filters()
             
     def show_add_subscription_dialog(self):
         """Show dialog for adding new subscription"""
@@ -191,31 +211,27 @@ class SubscriptionsWidget(QWidget):
         if dialog.exec() == QDialog.DialogCode.Accepted:
             member_id = dialog.member_combo.currentData()
             
-            subscription = Subscription(
-                member_id=member_id,
-                type=MembershipType(dialog.type_combo.currentText()),
-                start_date=dialog.start_date.date().toPyDate(),
-                end_date=dialog.end_date.date().toPyDate(),
-                amount=float(dialog.amount_input.text() or 0),
-                payment_status="paid",  # Default to paid for now
-                notes=dialog.notes_input.text()
-            )
-            
-            db = SessionLocal()
-            try:
-                db.add(subscription)
-                
-                # Update member dates
-                member = db.query(Member).get(member_id)
-                if member:
-                    member.start_date = subscription.start_date
-                    member.end_date = subscription.end_date
-                    
-                db.commit()
-                QMessageBox.information(self, "نجاح", "تم إضافة الاشتراك بنجاح")
+            def added(subscription_id):
                 self.load_subscriptions()
-            except Exception as e:
-                db.rollback()
-                QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء إضافة الاشتراك: {str(e)}")
-            finally:
-                db.close()
+                QMessageBox.information(self, "نجاح", "تم إضافة الاشتراك بنجاح")
+                
+            def failed(error):
+                QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء إضافة الاشتراك: {str(error)}")
+                
+            try:
+                amount = float(dialog.amount_input.text() or 0)
+            except ValueError as e:
+                failed(e)
+                return
+            
+            with span("dialog:add-subscription", "dialog"):
+                future = get_write_service().add_subscription(
+                    member_id,
+                    dialog.type_combo.currentText(),
+                    dialog.start_date.date().toPyDate(),
+                    dialog.end_date.date().toPyDate(),
+                    amount,
+                    payment_status="paid",  # Default to paid for now
+                    notes=dialog.notes_input.text()
+                )
+                get_executor().watch(f"add-subscription:{member_id}", future, added, failed)
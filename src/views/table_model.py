@@ -0,0 +1,293 @@
+import enum
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QColor
+from sqlalchemy import select, literal, tuple_
+from src.models.changes import get_change_seqs
+from src.utils.query_executor import get_executor
+from src.utils import tracing
+
+class TableColumn:
+    """Column definition for a table model.
+
+    display and foreground receive the fetched row and return the cell text
+    and an optional Qt.GlobalColor. sort is the SQL expression used when the
+    user sorts by this column; it must never be NULL (wrap nullable columns
+    in coalesce) because it takes part in the keyset comparison.
+    """
+
+    def __init__(self, title, display, sort=None, foreground=None, width=120):
+        self.title = title
+        self.display = display
+        self.sort = sort
+        self.foreground = foreground
+        self.width = width
+
+class RowsTableModel(QAbstractTableModel):
+    """Read-only model over a list of fetched rows; cells are formatted on demand"""
+
+    def __init__(self, columns, parent=None):
+        super().__init__(parent)
+        self.columns = columns
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.columns[section].title
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        column = self.columns[index.column()]
+        row = self.rows[index.row()]
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            return column.display(row)
+        if role == Qt.ItemDataRole.ForegroundRole and column.foreground:
+            color = column.foreground(row)
+            return QColor(color) if color is not None else None
+        return None
+
+    def set_rows(self, rows):
+        """Replace all rows"""
+        self.beginResetModel()
+        self.rows = list(rows)
+        self.endResetModel()
+        tracing.add_rows(len(self.rows))
+
+    def apply_widths(self, view):
+        """Apply the column widths to a view"""
+        for i, column in enumerate(self.columns):
+            view.setColumnWidth(i, column.width)
+
+class PagedTableModel(RowsTableModel):
+    """Table model that pulls rows from SQL one page at a time.
+
+    Pages are fetched with keyset pagination on (sort expression, key column)
+    through the shared query executor, so scrolling never runs an OFFSET scan
+    and never blocks the GUI thread. Sorting and filtering are pushed down to
+    SQL and restart paging from the first page.
+
+    With a change_column (a change_seq column maintained by the change
+    tracking triggers), refresh_changes() patches the loaded rows with just
+    the rows written since the last load instead of reloading everything.
+    """
+
+    def __init__(self, key, statement, key_column, columns, page_size=200,
+                 sort_column=-1, descending=False, change_column=None, parent=None):
+        super().__init__(columns, parent)
+        self.key = key
+        self.statement = statement
+        self.key_column = key_column
+        self.page_size = page_size
+        self.sort_column = sort_column
+        self.descending = descending
+        self.change_column = change_column
+        self.watermark = None  # (seq, delete_seq) of the table when the first page was read
+        self.generation = 0
+        self.filters = []
+        self.rank = None
+        self.cursor = None
+        self.exhausted = True
+        self.fetching = False
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.exhausted and not self.fetching
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self.fetching = True
+        statement = self.page_statement()
+        table = self.change_column.table.name if self.change_column is not None and self.watermark is None else None
+        get_executor().submit(
+            self.key,
+            lambda db: self.fetch_page(db, statement, table),
+            self.append_page,
+            self.fetch_failed
+        )
+
+    def fetch_failed(self, error):
+        """A failed fetch (e.g. a busy database) leaves the model ready to try again"""
+        self.fetching = False
+
+    @staticmethod
+    def fetch_page(db, statement, table=None):
+        """Fetch one page; with a table, first read its change seq as the watermark"""
+        seq = get_change_seqs(db)[table] if table else None
+        return seq, db.execute(statement).all()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sort_column = column
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self.refresh()
+
+    def set_filters(self, *criteria, rank=None):
+        """Replace the SQL filter criteria and reload.
+
+        rank is an optional SQL expression that orders the rows while no
+        column sort is selected (for example search relevance).
+        """
+        self.filters = list(criteria)
+        self.rank = rank
+        self.refresh()
+
+    def refresh(self):
+        """Drop loaded rows and fetch the first page again"""
+        self.beginResetModel()
+        self.rows = []
+        self.cursor = None
+        self.watermark = None
+        self.generation += 1
+        self.exhausted = False
+        self.fetching = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def sort_expression(self):
+        if 0 <= self.sort_column < len(self.columns) and self.columns[self.sort_column].sort is not None:
+            return self.columns[self.sort_column].sort
+        return self.rank
+
+    def base_statement(self):
+        """The filtered SELECT with the keyset cursor columns added"""
+        sort = self.sort_expression()
+
+        # The last two fields of each row carry the keyset cursor
+        statement = self.statement.add_columns(
+            (sort if sort is not None else self.key_column).label("page_sort"),
+            self.key_column.label("page_key")
+        )
+        if self.filters:
+            statement = statement.where(*self.filters)
+        return statement
+
+    def page_statement(self):
+        """Build the SELECT for the page after the current cursor"""
+        sort = self.sort_expression()
+        order_keys = [self.key_column] if sort is None else [sort, self.key_column]
+        statement = self.base_statement()
+
+        if self.cursor is not None:
+            # Bind the cursor with each key's type so enums and dates compare like stored values
+            values = [literal(value, type_=key.type) for value, key in zip(self.cursor, order_keys)]
+            current = tuple_(*order_keys) if len(order_keys) > 1 else order_keys[0]
+            last = tuple_(*values) if len(order_keys) > 1 else values[0]
+            statement = statement.where(current < last if self.descending else current > last)
+
+        order_by = [key.desc() if self.descending else key.asc() for key in order_keys]
+        return statement.order_by(*order_by).limit(self.page_size)
+
+    def append_page(self, page):
+        seq, rows = page
+        if seq is not None:
+            self.watermark = seq
+        self.fetching = False
+        tracing.add_rows(len(rows))
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if not rows:
+            return
+
+        last = rows[-1]
+        self.cursor = (last[-2], last[-1]) if self.sort_expression() is not None else (last[-1],)
+
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def refresh_changes(self):
+        """Patch the loaded rows with the rows written since the last load"""
+        # Skip while a page is loading; the next call picks the changes up
+        if self.change_column is None or self.watermark is None or self.fetching:
+            return
+        table = self.change_column.table.name
+        watermark = self.watermark
+        generation = self.generation
+        rows_statement = self.base_statement().where(self.change_column > watermark[0]).limit(self.page_size + 1)
+        keys_statement = select(self.key_column).where(self.change_column > watermark[0]).limit(self.page_size + 1)
+        get_executor().submit(
+            f"{self.key}-changes",
+            lambda db: self.fetch_changes(db, table, watermark, rows_statement, keys_statement),
+            lambda changes: self.apply_changes(generation, *changes),
+            self.changes_failed
+        )
+
+    def changes_failed(self, error):
+        """Nothing was applied, so the watermark stands and the next refresh_changes tries again"""
+
+    def fetch_changes(self, db, table, watermark, rows_statement, keys_statement):
+        """Return (seq, changed rows, changed keys); rows is None when a full reload is needed"""
+        seq = get_change_seqs(db)[table]
+        if seq == watermark:
+            return seq, [], []
+        if seq[1] != watermark[1]:
+            return seq, None, None  # Deleted rows can't be found by a delta query
+
+        keys = db.execute(keys_statement).scalars().all()
+        if len(keys) > self.page_size:
+            return seq, None, None
+        return seq, db.execute(rows_statement).all(), keys
+
+    def apply_changes(self, generation, seq, rows, keys):
+        # The model was reloaded while the changes were being fetched
+        if generation != self.generation or self.fetching:
+            return
+        if rows is None:
+            self.refresh()
+            return
+        self.watermark = seq
+        tracing.add_rows(len(rows))
+
+        # Keys that changed but no longer match the filters are only removed
+        current = {row[-1]: row for row in rows}
+        for key in keys:
+            index = self.index_of(key)
+            row = current.get(key)
+            if index is not None and row is not None and self.order_key(self.rows[index]) == self.order_key(row):
+                self.rows[index] = row
+                self.dataChanged.emit(self.index(index, 0), self.index(index, len(self.columns) - 1))
+                continue
+
+            if index is not None:
+                self.beginRemoveRows(QModelIndex(), index, index)
+                del self.rows[index]
+                self.endRemoveRows()
+            if row is not None:
+                position = self.insert_position(row)
+                # Rows past the last loaded one arrive with a later page
+                if position == len(self.rows) and not self.exhausted:
+                    continue
+                self.beginInsertRows(QModelIndex(), position, position)
+                self.rows.insert(position, row)
+                self.endInsertRows()
+
+    def index_of(self, key):
+        for index, row in enumerate(self.rows):
+            if row[-1] == key:
+                return index
+        return None
+
+    @staticmethod
+    def order_key(row):
+        """The (page_sort, page_key) of a row, comparable the way SQL orders them"""
+        return tuple(value.name if isinstance(value, enum.Enum) else value for value in (row[-2], row[-1]))
+
+    def insert_position(self, row):
+        """Binary search for where a row belongs in the loaded rows"""
+        target = self.order_key(row)
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            current = self.order_key(self.rows[middle])
+            if (current > target) if self.descending else (current < target):
+                low = middle + 1
+            else:
+                high = middle
+        return low
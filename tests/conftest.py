@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The tests import the application as the src package, like python -m does from the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
@@ -0,0 +1,27 @@
+import os
+import shutil
+import pytest
+from sqlalchemy import create_engine
+from src.models.migrations import MIGRATIONS, migrate, hot_queries, explain
+
+BASELINE_DB = os.path.join(os.path.dirname(__file__), os.pardir, "db", "gym.db")
+
+@pytest.fixture(params=["baseline", "fresh"])
+def migrated_engine(request, tmp_path):
+    """An engine on a database migrated to the latest version, from the v0 baseline or from nothing"""
+    path = tmp_path / "gym.db"
+    if request.param == "baseline":
+        shutil.copyfile(BASELINE_DB, path)
+    engine = create_engine(f"sqlite:///{path}")
+    assert migrate(bind=engine) == MIGRATIONS[-1][0]
+    yield engine
+    engine.dispose()
+
+@pytest.mark.parametrize("name, index, statement", hot_queries(), ids=[query[0] for query in hot_queries()])
+def test_hot_query_uses_index(migrated_engine, name, index, statement):
+    with migrated_engine.connect() as conn:
+        plan = explain(conn, statement)
+    assert any(index in line for line in plan), f"{name}: {plan}"
+
+def test_migrate_is_idempotent(migrated_engine):
+    assert migrate(bind=migrated_engine) == MIGRATIONS[-1][0]